@@ -12,7 +12,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.
 
 from app.core.config import settings  # Importa la configuración
 from app.db.base import Base         # Importa la base de modelos
-from app.models import user, profile, product, category, transaction, kpi, ai_log
+from app.models import user, profile, product, category, transaction, kpi, kpi_history, ai_log, email_outbox, idempotency_key, ai_suggestion_cache
 
 
 DATABASE_URL = settings.DATABASE_URL # Obtiene la URL de la base de datos
@@ -0,0 +1,39 @@
+"""historico de kpis
+
+Revision ID: 9c4d1e7a2b3f
+Revises: 5b2e8c1d4f6a
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4d1e7a2b3f'
+down_revision: Union[str, None] = '5b2e8c1d4f6a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('kpi_history',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kpi_id', sa.Integer(), nullable=False),
+        sa.Column('value', sa.Numeric(precision=15, scale=5), nullable=False),
+        sa.Column('recorded_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['kpi_id'], ['kpis.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_kpi_history_kpi_id_recorded_at', 'kpi_history', ['kpi_id', 'recorded_at'], unique=False)
+    # Punto de partida del histórico: el valor actual de cada KPI existente
+    op.execute("INSERT INTO kpi_history (kpi_id, value, recorded_at) SELECT id, value, last_updated FROM kpis")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_kpi_history_kpi_id_recorded_at', table_name='kpi_history')
+    op.drop_table('kpi_history')
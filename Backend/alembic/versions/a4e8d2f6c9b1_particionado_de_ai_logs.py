@@ -0,0 +1,154 @@
+"""particionado de ai_logs por mes y area
+
+Revision ID: a4e8d2f6c9b1
+Revises: f1c6a3d8e2b5
+Create Date: 2026-10-19 19:00:00.000000
+
+Convierte ai_logs en una tabla particionada: RANGE por mes sobre timestamp y, dentro de
+cada mes, LIST por feature_area (ver app/crud/aio/ai_log_partitions.py). Los meses con
+datos se crean aquí solo con la subpartición DEFAULT; los siguientes los crea la tarea de
+mantenimiento (app/services/ai_log_retention.py) con una subpartición por área con retención
+propia. Añade archive_ref y comprime input_data/output_data con lz4 (PostgreSQL 14+).
+
+La tabla se reconstruye copiando las filas dentro de la transacción de la migración: bloquea
+ai_logs mientras dura, conviene aplicarla en una ventana de mantenimiento si ya es grande.
+La clave primaria pasa a ser (id, timestamp, feature_area): en una tabla particionada una
+restricción única debe incluir las columnas de partición de todos los niveles (timestamp en
+ai_logs, feature_area en cada mes). La secuencia de id se conserva.
+"""
+from datetime import date, datetime, timezone
+from typing import List, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4e8d2f6c9b1'
+down_revision: Union[str, None] = 'f1c6a3d8e2b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Meses creados por adelantado (la tarea de mantenimiento sigue a partir de ahí)
+MONTHS_AHEAD = 2
+
+COLUMNS = 'id, timestamp, user_id, feature_area, input_data, output_data, decision_reason, metrics'
+
+INDEXES = [
+    'CREATE INDEX ix_ai_logs_id ON ai_logs (id)',
+    'CREATE INDEX ix_ai_logs_timestamp ON ai_logs (timestamp)',
+    'CREATE INDEX ix_ai_logs_user_id_timestamp ON ai_logs (user_id, timestamp)',
+    'CREATE INDEX ix_ai_logs_feature_area_timestamp ON ai_logs (feature_area, timestamp)',
+    'CREATE INDEX ix_ai_logs_metrics ON ai_logs USING gin (metrics jsonb_path_ops)',
+    "CREATE INDEX ix_ai_logs_latency_ms ON ai_logs (CAST(metrics ->> 'latency_ms' AS FLOAT))",
+    'CREATE INDEX ix_ai_logs_errors_feature_area_timestamp ON ai_logs (feature_area, timestamp) '
+    'WHERE metrics @> \'{"error": true}\'',
+]
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _months(first: date, last: date) -> List[date]:
+    months = [first]
+    while months[-1] < last:
+        months.append(_next_month(months[-1]))
+    return months
+
+
+def _detach_sequence(table: str) -> str:
+    """Desvincula la secuencia de id de `table` (para que no se borre con ella) y devuelve su nombre."""
+    sequence = op.get_bind().execute(sa.text(f"SELECT pg_get_serial_sequence('{table}', 'id')")).scalar()
+    op.execute(f'ALTER SEQUENCE {sequence} OWNED BY NONE')
+    return sequence
+
+
+def _finish(sequence: str) -> None:
+    op.execute(f'ALTER SEQUENCE {sequence} OWNED BY ai_logs.id')
+    op.execute('ALTER TABLE ai_logs ADD CONSTRAINT ai_logs_user_id_fkey FOREIGN KEY (user_id) REFERENCES users (id)')
+    op.execute("COMMENT ON COLUMN ai_logs.feature_area IS 'Ej: InventoryRestock, KpiAnalysis, UserProfiling'")
+    for statement in INDEXES:
+        op.execute(statement)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    now = datetime.now(timezone.utc)
+    current = date(now.year, now.month, 1)
+    oldest = bind.execute(sa.text("SELECT min(timestamp) AT TIME ZONE 'UTC' FROM ai_logs")).scalar()
+    first = date(oldest.year, oldest.month, 1) if oldest is not None else current
+    if first > current:
+        first = current
+
+    op.execute('ALTER TABLE ai_logs RENAME TO ai_logs_unpartitioned')
+    sequence = _detach_sequence('ai_logs_unpartitioned')
+    op.execute(f"""
+        CREATE TABLE ai_logs (
+            id integer NOT NULL DEFAULT nextval('{sequence}'::regclass),
+            timestamp timestamp with time zone NOT NULL DEFAULT now(),
+            user_id integer,
+            feature_area varchar NOT NULL,
+            input_data text,
+            output_data text,
+            decision_reason text,
+            metrics jsonb,
+            archive_ref varchar
+        ) PARTITION BY RANGE (timestamp)
+    """)
+    # Antes de crear las particiones, para que la hereden. Sin soporte lz4 en el servidor
+    # se queda la compresión por defecto (pglz)
+    if bind.dialect.server_version_info >= (14,):
+        try:
+            with bind.begin_nested():
+                bind.execute(sa.text(
+                    'ALTER TABLE ai_logs ALTER COLUMN input_data SET COMPRESSION lz4, '
+                    'ALTER COLUMN output_data SET COMPRESSION lz4'
+                ))
+        except sa.exc.DBAPIError:
+            pass
+
+    last = current
+    for _ in range(MONTHS_AHEAD):
+        last = _next_month(last)
+    for month in _months(first, last):
+        name = f'ai_logs_y{month.year:04d}m{month.month:02d}'
+        op.execute(
+            f"CREATE TABLE {name} PARTITION OF ai_logs FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+            f"TO ('{_next_month(month).isoformat()} 00:00:00+00') PARTITION BY LIST (feature_area)"
+        )
+        op.execute(f'CREATE TABLE {name}_default PARTITION OF {name} DEFAULT')
+    op.execute('CREATE TABLE ai_logs_default PARTITION OF ai_logs DEFAULT')
+
+    op.execute(
+        f'INSERT INTO ai_logs ({COLUMNS}) '
+        f'SELECT id, coalesce(timestamp, now()), user_id, feature_area, input_data, output_data, decision_reason, metrics '
+        f'FROM ai_logs_unpartitioned'
+    )
+    op.execute('DROP TABLE ai_logs_unpartitioned')
+    op.execute('ALTER TABLE ai_logs ADD CONSTRAINT ai_logs_pkey PRIMARY KEY (id, timestamp, feature_area)')
+    _finish(sequence)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Los payloads ya archivados siguen solo en los ficheros de AI_LOG_ARCHIVE_DIR
+    op.execute('ALTER TABLE ai_logs RENAME TO ai_logs_partitioned')
+    sequence = _detach_sequence('ai_logs_partitioned')
+    op.execute(f"""
+        CREATE TABLE ai_logs (
+            id integer NOT NULL DEFAULT nextval('{sequence}'::regclass),
+            timestamp timestamp with time zone DEFAULT now(),
+            user_id integer,
+            feature_area varchar NOT NULL,
+            input_data text,
+            output_data text,
+            decision_reason text,
+            metrics jsonb
+        )
+    """)
+    op.execute(f'INSERT INTO ai_logs ({COLUMNS}) SELECT {COLUMNS} FROM ai_logs_partitioned')
+    op.execute('DROP TABLE ai_logs_partitioned')
+    op.execute('ALTER TABLE ai_logs ADD CONSTRAINT ai_logs_pkey PRIMARY KEY (id)')
+    _finish(sequence)
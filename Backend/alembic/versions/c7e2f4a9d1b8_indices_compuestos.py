@@ -0,0 +1,86 @@
+"""indices compuestos para las consultas calientes
+
+Revision ID: c7e2f4a9d1b8
+Revises: 9c4d1e7a2b3f
+Create Date: 2026-10-19 14:00:00.000000
+
+Los índices se construyen con CREATE INDEX CONCURRENTLY para no bloquear las
+escrituras en tablas grandes. CONCURRENTLY no puede ir dentro de una transacción,
+por eso todo se ejecuta en un autocommit_block. Si la migración se interrumpe,
+puede quedar un índice INVALID con el mismo nombre, que if_not_exists daría por creado:
+antes de cada CREATE se borra el índice si existe y es INVALID, así que basta con volver
+a ejecutarla.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e2f4a9d1b8'
+down_revision: Union[str, None] = '9c4d1e7a2b3f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (nombre, tabla, columnas, columnas INCLUDE)
+NEW_INDEXES = [
+    ('ix_products_owner_id_id', 'products', ['owner_id', 'id'], None),
+    ('ix_products_owner_id_category_id_id', 'products', ['owner_id', 'category_id', 'id'], None),
+    ('ix_transactions_product_id_timestamp', 'transactions', ['product_id', 'timestamp'], None),
+    ('ix_transactions_user_id_timestamp', 'transactions', ['user_id', 'timestamp'], None),
+    ('ix_ai_logs_user_id_timestamp', 'ai_logs', ['user_id', 'timestamp'], None),
+    ('ix_ai_logs_feature_area_timestamp', 'ai_logs', ['feature_area', 'timestamp'], None),
+    ('ix_kpi_history_kpi_id_recorded_at_value', 'kpi_history', ['kpi_id', 'recorded_at'], ['value']),
+]
+
+# Índices de una columna que quedan cubiertos por el prefijo de un índice compuesto
+REDUNDANT_INDEXES = [
+    ('ix_products_owner_id', 'products', ['owner_id'], None),
+    ('ix_transactions_product_id', 'transactions', ['product_id'], None),
+    ('ix_transactions_user_id', 'transactions', ['user_id'], None),
+    ('ix_ai_logs_user_id', 'ai_logs', ['user_id'], None),
+    ('ix_ai_logs_feature_area', 'ai_logs', ['feature_area'], None),
+    ('ix_kpi_history_kpi_id_recorded_at', 'kpi_history', ['kpi_id', 'recorded_at'], None),
+]
+
+
+def _drop_if_invalid(name: str, table: str) -> None:
+    # Resto de un CREATE INDEX CONCURRENTLY interrumpido: existe pero no se usa ni se actualiza
+    invalid = op.get_bind().execute(
+        sa.text("SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"), {"name": name}
+    ).scalar()
+    if invalid:
+        op.drop_index(name, table_name=table, postgresql_concurrently=True)
+
+
+def _create(indexes) -> None:
+    for name, table, columns, include in indexes:
+        _drop_if_invalid(name, table)
+        op.create_index(
+            name, table, columns, unique=False, if_not_exists=True,
+            postgresql_concurrently=True, postgresql_include=include or [],
+        )
+
+
+def _drop(indexes) -> None:
+    for name, table, _columns, _include in indexes:
+        op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        # Primero crear, luego borrar: las consultas nunca se quedan sin índice
+        _create(NEW_INDEXES)
+        _drop(REDUNDANT_INDEXES)
+        # El índice cubriente de kpi_history conserva el nombre que usa el modelo
+        op.execute('ALTER INDEX ix_kpi_history_kpi_id_recorded_at_value RENAME TO ix_kpi_history_kpi_id_recorded_at')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute('ALTER INDEX ix_kpi_history_kpi_id_recorded_at RENAME TO ix_kpi_history_kpi_id_recorded_at_value')
+        _create(REDUNDANT_INDEXES)
+        _drop(NEW_INDEXES)
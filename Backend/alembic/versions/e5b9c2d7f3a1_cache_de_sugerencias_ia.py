@@ -0,0 +1,39 @@
+"""cache de sugerencias ia
+
+Revision ID: e5b9c2d7f3a1
+Revises: d3a8f6b1c2e4
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b9c2d7f3a1'
+down_revision: Union[str, None] = 'd3a8f6b1c2e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('ai_suggestion_cache',
+        sa.Column('key_hash', sa.LargeBinary(length=32), nullable=False),
+        sa.Column('feature_area', sa.String(), nullable=False),
+        sa.Column('suggestion', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('explanation', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('key_hash')
+    )
+    op.create_index('ix_ai_suggestion_cache_expires_at', 'ai_suggestion_cache', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_ai_suggestion_cache_expires_at', table_name='ai_suggestion_cache')
+    op.drop_table('ai_suggestion_cache')
@@ -0,0 +1,61 @@
+"""indices sobre las metricas de ai_logs
+
+Revision ID: f1c6a3d8e2b5
+Revises: e5b9c2d7f3a1
+Create Date: 2026-10-19 18:00:00.000000
+
+Índices sobre la columna JSONB metrics: GIN (jsonb_path_ops) para los filtros por
+contenido (@>), uno de expresión para la latencia y uno parcial con las filas con error.
+Como en c7e2f4a9d1b8, se crean CONCURRENTLY fuera de transacción: ai_logs crece con
+cada llamada a la IA y no debe bloquearse mientras se construyen. Un índice INVALID que
+haya dejado una ejecución interrumpida se borra antes de volver a crearlo.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c6a3d8e2b5'
+down_revision: Union[str, None] = 'e5b9c2d7f3a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+NAMES = ('ix_ai_logs_metrics', 'ix_ai_logs_latency_ms', 'ix_ai_logs_errors_feature_area_timestamp')
+
+
+def _drop_if_invalid(name: str) -> None:
+    invalid = op.get_bind().execute(
+        sa.text("SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"), {"name": name}
+    ).scalar()
+    if invalid:
+        op.drop_index(name, table_name='ai_logs', postgresql_concurrently=True)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name in NAMES:
+            _drop_if_invalid(name)
+        op.create_index(
+            'ix_ai_logs_metrics', 'ai_logs', ['metrics'], unique=False, if_not_exists=True,
+            postgresql_concurrently=True, postgresql_using='gin', postgresql_ops={'metrics': 'jsonb_path_ops'},
+        )
+        op.create_index(
+            'ix_ai_logs_latency_ms', 'ai_logs', [sa.text("CAST(metrics ->> 'latency_ms' AS FLOAT)")],
+            unique=False, if_not_exists=True, postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_ai_logs_errors_feature_area_timestamp', 'ai_logs', ['feature_area', 'timestamp'],
+            unique=False, if_not_exists=True, postgresql_concurrently=True,
+            postgresql_where=sa.text('metrics @> \'{"error": true}\''),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name in reversed(NAMES):
+            op.drop_index(name, table_name='ai_logs', if_exists=True, postgresql_concurrently=True)
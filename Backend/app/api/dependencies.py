@@ -2,11 +2,13 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Annotated # Usar Annotated para tipado moderno de Depends
 
-from app.db.session import get_db
+from app.db.session import get_db, get_async_db, get_read_db, get_async_read_db
 from app.security import core as security_core
 from app.crud import user as crud_user
+from app.crud.aio import user as crud_user_async
 from app.models.user import User
 from app.schemas.token import TokenData
 from app.core.config import settings
@@ -17,6 +19,12 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/token
 
 # Alias de tipo para inyección de dependencias de sesión de DB
 DbSession = Annotated[Session, Depends(get_db)]
+# Alias para la sesión asíncrona (routers `async def`)
+AsyncDbSession = Annotated[AsyncSession, Depends(get_async_db)]
+# Alias para sesiones de solo lectura (réplica sana o, si no hay, el primario).
+# Usar solo en endpoints GET que toleren unos segundos de retraso de replicación.
+ReadOnlyDbSession = Annotated[Session, Depends(get_read_db)]
+AsyncReadOnlyDbSession = Annotated[AsyncSession, Depends(get_async_read_db)]
 # Alias de tipo para inyección de dependencias de token
 TokenDep = Annotated[str, Depends(oauth2_scheme)]
 
@@ -51,6 +59,10 @@ def get_current_active_user(
     Dependencia para obtener el usuario activo actual.
     Lanza HTTPException si el usuario no está autenticado o está inactivo.
     """
+    return _ensure_active(current_user)
+
+def _ensure_active(current_user: User | None) -> User:
+    """Lanza HTTPException si no hay usuario autenticado o está inactivo."""
     if current_user is None:
          raise HTTPException(
              status_code=status.HTTP_401_UNAUTHORIZED,
@@ -61,10 +73,54 @@ def get_current_active_user(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
     return current_user
 
+# --- Variantes asíncronas (para routers `async def` con AsyncDbSession) ---
+# El usuario queda asociado a la misma AsyncSession que usa el endpoint.
+
+async def get_current_user_async(
+    db: AsyncDbSession, token: TokenDep
+) -> User | None:
+    """Igual que `get_current_user`, pero consultando con la sesión asíncrona."""
+    token_data = security_core.decode_access_token(token)
+    if not token_data or not token_data.email:
+        return None
+    return await crud_user_async.get_user_by_email(db, email=token_data.email)
+
+async def get_current_active_user_async(
+    current_user: Annotated[User | None, Depends(get_current_user_async)]
+) -> User:
+    """Igual que `get_current_active_user`, para routers asíncronos."""
+    return _ensure_active(current_user)
+
+async def get_current_user_async_read(
+    read_db: AsyncReadOnlyDbSession, db: AsyncDbSession, token: TokenDep
+) -> User | None:
+    """
+    Igual que `get_current_user_async`, pero consultando la réplica de la petición: los
+    endpoints de solo lectura no tocan el primario. Si la réplica aún no tiene al usuario
+    (alta reciente, retraso de replicación) se busca en el primario.
+    """
+    token_data = security_core.decode_access_token(token)
+    if not token_data or not token_data.email:
+        return None
+    user = await crud_user_async.get_user_by_email(read_db, email=token_data.email)
+    if user is None and read_db is not db:
+        user = await crud_user_async.get_user_by_email(db, email=token_data.email)
+    return user
+
+async def get_current_active_user_async_read(
+    current_user: Annotated[User | None, Depends(get_current_user_async_read)]
+) -> User:
+    """Igual que `get_current_active_user_async`, para endpoints con AsyncReadOnlyDbSession."""
+    return _ensure_active(current_user)
+
 # Dependencia para obtener el usuario actual (puede ser None si el token es inválido/ausente)
 CurrentUser = Annotated[User | None, Depends(get_current_user)]
 # Dependencia para obtener el usuario activo actual (lanza error si no es válido o activo)
 ActiveUser = Annotated[User, Depends(get_current_active_user)]
+# Equivalente para routers asíncronos
+AsyncActiveUser = Annotated[User, Depends(get_current_active_user_async)]
+# Para endpoints de solo lectura (AsyncReadOnlyDbSession): el usuario sale de la misma réplica
+AsyncReadActiveUser = Annotated[User, Depends(get_current_active_user_async_read)]
 
 # --- Podrías añadir dependencias para roles/permisos aquí si fuera necesario ---
 # def get_current_admin_user(...) -> User: ...
\ No newline at end of file
@@ -0,0 +1,25 @@
+# app/api/health.py
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.services.health import health_state
+
+router = APIRouter()
+
+@router.get("/health/live", summary="Liveness: el proceso responde")
+async def liveness():
+    """
+    El proceso está vivo y su event loop atiende peticiones. No consulta dependencias:
+    si fallara por la base de datos, el orquestador reiniciaría workers sanos.
+    """
+    return {"status": "alive"}
+
+@router.get("/health/ready", summary="Readiness: puede recibir tráfico")
+async def readiness():
+    """
+    Devuelve el último resultado de la sonda de fondo (app/services/health.py):
+    base de datos, migraciones y tareas de fondo. 503 si algo falla o si la
+    sonda no se ha ejecutado recientemente. No toca la base en cada llamada.
+    """
+    report = health_state.report()
+    return JSONResponse(report, status_code=200 if health_state.ready else 503)
@@ -0,0 +1,29 @@
+# app/api/metrics.py
+import os
+
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest
+from prometheus_client import multiprocess
+
+from app.db.pool import PoolCollector
+
+router = APIRouter()
+
+def _registry():
+    # Con varios workers de gunicorn (ver gunicorn.conf.py) cada proceso escribe sus métricas
+    # en PROMETHEUS_MULTIPROC_DIR y aquí se agregan. El estado del pool es el del worker que responde.
+    if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(PoolCollector())
+    return registry
+
+@router.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    """
+    Métricas en formato de texto Prometheus: latencia/errores/tiempo de DB por
+    ruta (app/core/metrics.py) y estado del pool de conexiones (app/db/pool.py).
+    Pensado para ser consultado por Prometheus, no por la app móvil.
+    """
+    return Response(generate_latest(_registry()), media_type=CONTENT_TYPE_LATEST)
@@ -1,35 +1,44 @@
 # app/api/v1/endpoints/ai.py
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import Annotated, Any
+import json
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Annotated, Any, AsyncIterator, Dict, List, Literal, Optional, Tuple
 
-from app.db.session import get_db
-from app.api.dependencies import ActiveUser, DbSession
+from app.api.dependencies import AsyncActiveUser, AsyncDbSession
 from app.models.user import User
-from app.schemas.ai import AIContextInput, AISuggestion # Importar schemas AI
-from app.services import external_ai_service # Importar el servicio
+from app.crud.aio import ai_log as crud_ai_log
+from app.schemas.ai import AIContextInput, AIEntityInput, AISuggestion, AiLogStats # Importar schemas AI
+from app.services import ai_context, external_ai_service # Importar el servicio
+from app.services.ai_guard import AIUnavailableError, retry_after_header
 
 router = APIRouter()
 
 @router.post("/advice", response_model=AISuggestion)
 async def get_ai_advice(
     *,
-    db: DbSession,
+    db: AsyncDbSession,
     input_data: AIContextInput, # Recibe el contexto del request body
     feature: str = "GeneralAdvice", # Podría ser un query param para indicar el área
-    current_user: ActiveUser, # Requiere autenticación
+    current_user: AsyncActiveUser, # Requiere autenticación
 ):
     """
     Endpoint genérico para obtener consejo o sugerencia de la IA.
     El cuerpo de la petición debe contener el `context`.
     Se puede especificar el `feature` como query parameter.
     """
+    return await _advice(db, feature, input_data.context, input_data.user_prompt, current_user.id)
+
+
+async def _advice(db: AsyncSession, feature: str, context: Dict[str, Any], user_prompt: Optional[str], user_id: int) -> AISuggestion:
     try:
         suggestion = await external_ai_service.get_ai_suggestion(
             db=db,
             feature=feature,
-            context=input_data.context,
-            user_prompt=input_data.user_prompt,
-            user_id=current_user.id
+            context=context,
+            user_prompt=user_prompt,
+            user_id=user_id
         )
         # Si el servicio devolvió una respuesta de error encapsulada
         if isinstance(suggestion.suggestion, dict) and suggestion.suggestion.get("error"):
@@ -38,11 +47,113 @@ async def get_ai_advice(
         return suggestion
     except HTTPException as e:
          raise e # Re-lanzar excepciones HTTP
+    except AIUnavailableError as e:
+        # Proveedor saturado o caído: 503 inmediato, el cliente reintenta pasado Retry-After
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e), headers=retry_after_header(e)
+        )
     except Exception as e:
         # Loggear el error
         # logger.error(f"Error en endpoint /advice: {e}", exc_info=True)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error processing AI request")
 
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+async def _relay(events: AsyncIterator[Tuple[str, Dict[str, Any]]]) -> AsyncIterator[str]:
+    async for event, data in events:
+        yield _sse(event, data)
+
+
+@router.post("/advice/stream")
+async def stream_ai_advice(
+    *,
+    db: AsyncDbSession,
+    input_data: AIContextInput,
+    feature: str = "GeneralAdvice",
+    current_user: AsyncActiveUser,
+):
+    """
+    Igual que /advice, pero la respuesta llega como Server-Sent Events a medida que el
+    modelo la genera:
+
+    - `event: delta` con `{"text": ...}`: fragmento nuevo del texto del modelo.
+    - `event: done` con `{"suggestion", "explanation", "log_id"}`: resultado final.
+    - `event: error` con `{"detail", "retry_after"?}`: la llamada falló a mitad.
+
+    Si el cliente se desconecta, la llamada al proveedor se cancela. Con el proveedor
+    no disponible (circuito abierto) responde 503 antes de abrir el stream.
+    """
+    try:
+        events = await external_ai_service.stream_ai_suggestion(
+            db=db,
+            feature=feature,
+            context=input_data.context,
+            user_prompt=input_data.user_prompt,
+            user_id=current_user.id,
+        )
+    except AIUnavailableError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e), headers=retry_after_header(e)
+        )
+    # Starlette cancela el envío cuando el cliente se desconecta; la cancelación cierra el
+    # generador y con él la conexión con el proveedor
+    return StreamingResponse(
+        _relay(events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}, # Sin buffer en nginx
+    )
+
+@router.post("/advice/{feature}/{entity_id}", response_model=AISuggestion)
+async def get_ai_advice_for_entity(
+    *,
+    db: AsyncDbSession,
+    feature: str,
+    entity_id: int,
+    input_data: Optional[AIEntityInput] = None,
+    current_user: AsyncActiveUser,
+):
+    """
+    Sugerencia de la IA sobre una entidad dada solo por su id: el servidor construye el
+    contexto (stock y movimientos de un producto para `InventoryRestock`, valor, objetivo
+    e histórico de un KPI para `KpiAnalysis`) con consultas agregadas.
+    """
+    try:
+        context = await ai_context.build_context(db, feature, entity_id, current_user.id)
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Área '{feature}' sin contexto automático (disponibles: {', '.join(ai_context.available_features())}).",
+        )
+    if context is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Entidad {entity_id} no encontrada para '{feature}'.")
+    user_prompt = input_data.user_prompt if input_data else None
+    return await _advice(db, feature, context, user_prompt, current_user.id)
+
+@router.get("/logs/stats", response_model=List[AiLogStats])
+async def get_ai_log_stats(
+    *,
+    db: AsyncDbSession,
+    current_user: AsyncActiveUser,
+    feature: Optional[str] = Query(None, description="Solo esta área funcional."),
+    bucket: Literal["hour", "day", "week"] = Query("hour", description="Tamaño de cada intervalo."),
+    hours: int = Query(24, ge=1, le=24 * 90, description="Horas hacia atrás desde ahora."),
+):
+    """
+    Uso de la IA del usuario por área e intervalo: volumen, tasa de error, respuestas
+    desde caché, latencia p50/p95 y tokens. Se calcula en la base de datos a partir de
+    `metrics` de cada log, sin traer los logs.
+    """
+    rows = await crud_ai_log.get_usage_stats(
+        db,
+        since=datetime.now(timezone.utc) - timedelta(hours=hours),
+        bucket=bucket,
+        user_id=current_user.id,
+        feature_area=feature,
+    )
+    return [AiLogStats.model_validate(row) for row in rows]
+
 # Podrías añadir endpoints más específicos si lo prefieres:
 # @router.post("/advice/inventory_restock", ...)
 # async def get_inventory_advice(...)
\ No newline at end of file
@@ -5,7 +5,7 @@ from app.db.session import get_db
 from app.schemas.user import UserCreate, UserRead, UserUpdate
 from app.crud import user as crud_user
 from app.models.user import User
-from app.api.dependencies import ActiveUser, DbSession, get_current_active_user # Importamos dependencias
+from app.api.dependencies import ActiveUser, DbSession, ReadOnlyDbSession, get_current_active_user # Importamos dependencias
 
 router = APIRouter()
 
@@ -67,7 +67,7 @@ def update_current_user_me(
 
 @router.get("/", response_model=List[UserRead])
 def read_users(
-    db: DbSession,
+    db: ReadOnlyDbSession,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=200),
     # current_user: ActiveUser = Depends(get_current_active_user), # Descomentar para proteger
@@ -85,7 +85,7 @@ def read_users(
 @router.get("/{user_id}", response_model=UserRead)
 def read_user_by_id(
     user_id: int,
-    db: DbSession,
+    db: ReadOnlyDbSession,
     # current_user: ActiveUser = Depends(get_current_active_user), # Descomentar para proteger
 ) -> Any:
     """
@@ -0,0 +1,247 @@
+# app/core/compression.py
+# Compresión de respuestas negociada con el cliente (Accept-Encoding): zstd, brotli o gzip.
+# Las tablets de campo trabajan sobre enlaces satelitales, donde el ancho de banda pesa
+# mucho más que la CPU que cuesta comprimir.
+#
+# - Respuestas completas: se comprimen solo si superan COMPRESSION_MINIMUM_SIZE.
+# - Respuestas en streaming (exportaciones): se comprimen trozo a trozo con flush, así el
+#   cliente recibe datos desde el primer bloque sin esperar al final.
+# - El nivel se elige por perfil ("fast", "default", "best"); una ruta puede fijar el suyo
+#   con el decorador @compression(...). text/event-stream nunca se comprime.
+#
+# brotli y zstandard son opcionales: si no están instalados, esa codificación no se ofrece.
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+from prometheus_client import Counter
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError: # pragma: no cover - dependencia opcional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError: # pragma: no cover - dependencia opcional
+    zstandard = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+# SSE necesita que cada evento llegue en cuanto se emite
+NEVER_COMPRESS_TYPES = ("text/event-stream",)
+
+RESPONSE_BYTES = Counter(
+    "http_response_body_bytes_total", "Bytes de cuerpo de respuesta, antes y después de comprimir",
+    ["encoding", "stage"],
+)
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31) # 31 = cabecera gzip
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliCompressor:
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdCompressor:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+# Niveles por perfil y codificación. "best" de brotli se queda en 9: 10-11 son
+# demasiado lentos para comprimir en línea.
+CODECS: Dict[str, Tuple[Callable, Dict[str, int]]] = {
+    "gzip": (_GzipCompressor, {"fast": 1, "default": 6, "best": 9}),
+}
+if brotli is not None:
+    CODECS["br"] = (_BrotliCompressor, {"fast": 1, "default": 5, "best": 9})
+if zstandard is not None:
+    CODECS["zstd"] = (_ZstdCompressor, {"fast": 1, "default": 3, "best": 12})
+
+
+def compression(profile: str):
+    """
+    Fija el perfil de compresión de un endpoint ("fast", "default", "best" u "off").
+
+        @router.get("/export")
+        @compression("fast")
+        async def export(...): ...
+    """
+    def decorator(func):
+        func.compression_profile = profile
+        return func
+    return decorator
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Codificaciones aceptadas por el cliente con su peso q."""
+    accepted = {}
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+    return accepted
+
+
+def negotiate_encoding(header: str, preference: List[str]) -> Optional[str]:
+    """Mejor codificación disponible: mayor q del cliente y, a igual q, la preferencia del servidor."""
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for name in preference:
+        quality = accepted.get(name, wildcard)
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+def _is_compressible(headers: Headers) -> bool:
+    content_type = headers.get("content-type", "").lower()
+    if content_type.startswith(NEVER_COMPRESS_TYPES):
+        return False
+    return content_type.startswith(COMPRESSIBLE_TYPES) and "content-encoding" not in headers
+
+
+class CompressionMiddleware:
+    """Middleware ASGI puro que comprime el cuerpo de la respuesta según Accept-Encoding."""
+
+    def __init__(self, app: ASGIApp, minimum_size: Optional[int] = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MINIMUM_SIZE if minimum_size is None else minimum_size
+        self.preference = [
+            name.strip() for name in settings.COMPRESSION_ENCODINGS.split(",") if name.strip() in CODECS
+        ]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), self.preference)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressedResponder(self.app, encoding, self.minimum_size)(scope, receive, send)
+
+
+class _CompressedResponder:
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send: Send = None
+        self.scope: Scope = None
+        self.start_message: Optional[Message] = None
+        self.compressor = None
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.scope = scope
+        self.send = send
+        await self.app(scope, receive, self.send_wrapper)
+
+    def _profile(self) -> str:
+        endpoint = getattr(self.scope.get("route"), "endpoint", None)
+        return getattr(endpoint, "compression_profile", settings.COMPRESSION_PROFILE)
+
+    async def send_wrapper(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Se retiene hasta ver el primer trozo del cuerpo (tamaño / streaming)
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            profile = self._profile()
+            if not _is_compressible(headers) or profile == "off" or message["status"] in (204, 304):
+                self.passthrough = True
+            else:
+                MutableHeaders(raw=message["headers"]).add_vary_header("Accept-Encoding")
+            return
+
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            start, self.start_message = self.start_message, None
+            if self.passthrough or (not more_body and len(body) < self.minimum_size):
+                await self.send(start)
+                await self.send(message)
+                self.passthrough = True
+                return
+            codec, levels = CODECS[self.encoding]
+            self.compressor = codec(levels.get(self._profile(), levels["default"]))
+            headers = MutableHeaders(raw=start["headers"])
+            headers["Content-Encoding"] = self.encoding
+            if not more_body:
+                # Respuesta completa: se comprime de una vez
+                compressed = self.compressor.compress(body) + self.compressor.finish()
+                headers["Content-Length"] = str(len(compressed))
+                self._count(len(body), len(compressed))
+                await self.send(start)
+                await self.send({"type": "http.response.body", "body": compressed})
+                return
+            # Streaming: longitud desconocida, se envía por chunks
+            del headers["Content-Length"]
+            await self.send(start)
+
+        if self.passthrough:
+            await self.send(message)
+            return
+
+        chunk = self.compressor.compress(body)
+        chunk += self.compressor.flush() if more_body else self.compressor.finish()
+        self._count(len(body), len(chunk))
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    def _count(self, raw_size: int, compressed_size: int) -> None:
+        RESPONSE_BYTES.labels(self.encoding, "raw").inc(raw_size)
+        RESPONSE_BYTES.labels(self.encoding, "compressed").inc(compressed_size)
@@ -7,6 +7,13 @@ from pydantic import EmailStr
 # Carga las variables de entorno desde el archivo .env
 load_dotenv()
 
+def to_async_database_url(url: str) -> str:
+    """Convierte una URL de PostgreSQL síncrona (psycopg2) a su variante asyncpg."""
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
 class Settings(BaseSettings):
     PROJECT_NAME: str = "VectorKPI API"
     API_V1_STR: str = "/api/v1"
@@ -21,6 +28,144 @@ class Settings(BaseSettings):
     DATABASE_URL: Optional[str] = os.getenv("DATABASE_URL")
     if not DATABASE_URL:
         DATABASE_URL = f"postgresql+psycopg2://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}:{POSTGRES_PORT}/{POSTGRES_DB}"
+    # URL para el motor asíncrono (asyncpg); por defecto se deriva de DATABASE_URL
+    ASYNC_DATABASE_URL: Optional[str] = os.getenv("ASYNC_DATABASE_URL")
+    if not ASYNC_DATABASE_URL:
+        ASYNC_DATABASE_URL = to_async_database_url(DATABASE_URL)
+
+    # Pool de conexiones (se aplica por motor y por proceso/worker)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30")) # Segundos esperando una conexión libre
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800")) # -1 desactiva el reciclado
+    # Estrategia de pre-ping: "always" (un SELECT 1 en cada checkout), "idle" (solo si la
+    # conexión estuvo ociosa más de DB_POOL_PRE_PING_IDLE_SECONDS) u "off"
+    DB_POOL_PRE_PING: str = os.getenv("DB_POOL_PRE_PING", "idle").lower()
+    DB_POOL_PRE_PING_IDLE_SECONDS: float = float(os.getenv("DB_POOL_PRE_PING_IDLE_SECONDS", "30"))
+    # True si la app se conecta a través de PgBouncer en modo transaction pooling
+    # (desactiva las sentencias preparadas con nombre de asyncpg)
+    DB_PGBOUNCER: bool = os.getenv("DB_PGBOUNCER", "False").lower() == "true"
+
+    # Réplicas de lectura (URLs psycopg2 separadas por comas; vacío = todo al primario)
+    DATABASE_REPLICA_URLS: str = os.getenv("DATABASE_REPLICA_URLS", "")
+    # Una réplica con más retraso que esto deja de recibir lecturas hasta ponerse al día
+    REPLICA_MAX_LAG_SECONDS: float = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+    REPLICA_HEALTH_CHECK_SECONDS: float = float(os.getenv("REPLICA_HEALTH_CHECK_SECONDS", "5"))
+
+    # Inspector de consultas (desarrollo/canary): detecta N+1 y consultas lentas por petición
+    QUERY_INSPECTOR_ENABLED: bool = os.getenv("QUERY_INSPECTOR_ENABLED", "False").lower() == "true"
+    SLOW_QUERY_MS: float = float(os.getenv("SLOW_QUERY_MS", "200"))
+    # Misma forma de consulta repetida al menos N veces en una petición = posible N+1
+    N_PLUS_ONE_THRESHOLD: int = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+    # Registrar el plan (EXPLAIN) de las consultas señaladas
+    QUERY_INSPECTOR_EXPLAIN: bool = os.getenv("QUERY_INSPECTOR_EXPLAIN", "True").lower() == "true"
+
+    # Sonda de /health/ready: cada cuánto se comprueban las dependencias, timeout de la
+    # consulta a la base y antigüedad máxima del resultado antes de darlo por no listo
+    HEALTH_PROBE_SECONDS: float = float(os.getenv("HEALTH_PROBE_SECONDS", "5"))
+    HEALTH_PROBE_TIMEOUT_SECONDS: float = float(os.getenv("HEALTH_PROBE_TIMEOUT_SECONDS", "2"))
+    HEALTH_PROBE_MAX_AGE_SECONDS: float = float(os.getenv("HEALTH_PROBE_MAX_AGE_SECONDS", "15"))
+
+    # Endpoint /metrics (formato Prometheus)
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+
+    # Serialización de los listados grandes (ver app/core/fast_json.py):
+    # "off" (FastAPI estándar), "validated" (TypeAdapter precompilado) o "trusted" (orjson sin validar)
+    FAST_JSON_MODE: str = os.getenv("FAST_JSON_MODE", "off").lower()
+
+    # Compresión de respuestas negociada por Accept-Encoding (ver app/core/compression.py)
+    COMPRESSION_ENABLED: bool = os.getenv("COMPRESSION_ENABLED", "True").lower() == "true"
+    # Respuestas más pequeñas se envían sin comprimir (no compensa)
+    COMPRESSION_MINIMUM_SIZE: int = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+    # Orden de preferencia del servidor cuando el cliente acepta varias con el mismo peso
+    COMPRESSION_ENCODINGS: str = os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip")
+    # Perfil por defecto ("fast", "default", "best"); las rutas pueden fijar el suyo
+    COMPRESSION_PROFILE: str = os.getenv("COMPRESSION_PROFILE", "default")
+
+    # Cabecera Idempotency-Key en POST/PATCH (ver app/core/idempotency.py)
+    IDEMPOTENCY_ENABLED: bool = os.getenv("IDEMPOTENCY_ENABLED", "True").lower() == "true"
+    # Tiempo durante el que un reintento con la misma clave recibe la respuesta guardada
+    IDEMPOTENCY_TTL_SECONDS: float = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    # Una petición "en curso" más antigua que esto se da por abandonada (worker caído)
+    IDEMPOTENCY_LOCK_SECONDS: float = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+    # Respuestas recientes en memoria por worker, para no ir a la base en cada reintento
+    IDEMPOTENCY_CACHE_SIZE: int = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "1024"))
+    # Respuestas más grandes no se guardan (la clave se libera)
+    IDEMPOTENCY_MAX_RESPONSE_BYTES: int = int(os.getenv("IDEMPOTENCY_MAX_RESPONSE_BYTES", "65536"))
+    IDEMPOTENCY_CLEANUP_SECONDS: float = float(os.getenv("IDEMPOTENCY_CLEANUP_SECONDS", "300"))
+
+    # Proveedor de IA externo (ver app/services/ai_providers.py):
+    # "simulated" (sin red, para desarrollo), "openai" (API compatible con OpenAI) o "gemini"
+    AI_PROVIDER: str = os.getenv("AI_PROVIDER", "simulated").lower()
+    AI_BASE_URL: str = os.getenv("AI_BASE_URL", "") # Vacío = URL pública del proveedor
+    AI_API_KEY: str = os.getenv("AI_API_KEY", "")
+    AI_MODEL: str = os.getenv("AI_MODEL", "gpt-4o-mini")
+    # Cliente HTTP compartido (ver app/services/ai_client.py); límites por worker
+    AI_HTTP2: bool = os.getenv("AI_HTTP2", "True").lower() == "true"
+    AI_MAX_CONNECTIONS: int = int(os.getenv("AI_MAX_CONNECTIONS", "20"))
+    AI_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("AI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    AI_KEEPALIVE_EXPIRY_SECONDS: float = float(os.getenv("AI_KEEPALIVE_EXPIRY_SECONDS", "60"))
+    AI_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("AI_CONNECT_TIMEOUT_SECONDS", "5"))
+    # Tiempo máximo de respuesta del modelo por llamada (se puede ajustar por llamada)
+    AI_TIMEOUT_SECONDS: float = float(os.getenv("AI_TIMEOUT_SECONDS", "30"))
+
+    # Caché de sugerencias de IA (ver app/services/ai_cache.py): misma feature + contexto + prompt
+    # devuelve la sugerencia guardada sin llamar al proveedor
+    AI_CACHE_ENABLED: bool = os.getenv("AI_CACHE_ENABLED", "True").lower() == "true"
+    AI_CACHE_TTL_SECONDS: float = float(os.getenv("AI_CACHE_TTL_SECONDS", "900"))
+    AI_CACHE_MAX_ENTRIES: int = int(os.getenv("AI_CACHE_MAX_ENTRIES", "2048")) # Por worker
+    # Guarda además en PostgreSQL (tabla ai_suggestion_cache), compartida entre workers y reinicios
+    AI_CACHE_PERSISTENT: bool = os.getenv("AI_CACHE_PERSISTENT", "False").lower() == "true"
+    # Límites frente a un proveedor lento o caído (ver app/services/ai_guard.py); por proveedor y worker
+    AI_MAX_CONCURRENCY: int = int(os.getenv("AI_MAX_CONCURRENCY", "10"))
+    AI_MAX_QUEUE: int = int(os.getenv("AI_MAX_QUEUE", "50")) # Llamadas esperando turno; más => 503
+    # Tiempo total de una llamada (cola + proveedor)
+    AI_DEADLINE_SECONDS: float = float(os.getenv("AI_DEADLINE_SECONDS", "20"))
+    AI_BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("AI_BREAKER_FAILURE_THRESHOLD", "5")) # Fallos seguidos
+    AI_BREAKER_RESET_SECONDS: float = float(os.getenv("AI_BREAKER_RESET_SECONDS", "30")) # Abierto antes de probar
+    # Peticiones idénticas simultáneas comparten una sola llamada al proveedor
+    AI_COALESCE_ENABLED: bool = os.getenv("AI_COALESCE_ENABLED", "True").lower() == "true"
+
+    # Sugerencias de reposición (feature InventoryRestock) calculadas localmente con un pronóstico
+    # de la demanda (ver app/services/forecasting.py), sin llamar al proveedor de IA
+    FORECAST_LOCAL_ENABLED: bool = os.getenv("FORECAST_LOCAL_ENABLED", "True").lower() == "true"
+    FORECAST_HISTORY_DAYS: int = int(os.getenv("FORECAST_HISTORY_DAYS", "180")) # Historial de salidas usado
+    FORECAST_HORIZON_DAYS: int = int(os.getenv("FORECAST_HORIZON_DAYS", "14")) # Días a cubrir con la reposición
+    FORECAST_ALPHA: float = float(os.getenv("FORECAST_ALPHA", "0.2")) # Suavizado exponencial
+    FORECAST_SERVICE_LEVEL_Z: float = float(os.getenv("FORECAST_SERVICE_LEVEL_Z", "1.65")) # Stock de seguridad (~95%)
+    # El cálculo es por propietario (todos sus productos a la vez) y se reutiliza durante este tiempo
+    FORECAST_CACHE_SECONDS: float = float(os.getenv("FORECAST_CACHE_SECONDS", "60"))
+
+    # Contexto de IA construido en el servidor a partir de un id (ver app/services/ai_context.py)
+    AI_CONTEXT_CACHE_SECONDS: float = float(os.getenv("AI_CONTEXT_CACHE_SECONDS", "30"))
+    AI_CONTEXT_HISTORY_DAYS: int = int(os.getenv("AI_CONTEXT_HISTORY_DAYS", "90")) # Histórico de KPIs
+
+    # Escritura de ai_logs en segundo plano (ver app/services/ai_log_writer.py): los logs se
+    # encolan y se insertan por lotes cada AI_LOG_BATCH_SIZE registros o AI_LOG_FLUSH_INTERVAL_MS
+    AI_LOG_BUFFERED: bool = os.getenv("AI_LOG_BUFFERED", "True").lower() == "true"
+    AI_LOG_QUEUE_SIZE: int = int(os.getenv("AI_LOG_QUEUE_SIZE", "10000"))
+    AI_LOG_BATCH_SIZE: int = int(os.getenv("AI_LOG_BATCH_SIZE", "200"))
+    AI_LOG_FLUSH_INTERVAL_MS: float = float(os.getenv("AI_LOG_FLUSH_INTERVAL_MS", "500"))
+    # Con la cola llena se espera como mucho esto; después el log va al fichero de respaldo
+    AI_LOG_ENQUEUE_TIMEOUT_SECONDS: float = float(os.getenv("AI_LOG_ENQUEUE_TIMEOUT_SECONDS", "0.05"))
+    # Fichero JSONL donde se guardan los logs si la base no está disponible; se reinsertan al volver
+    AI_LOG_FALLBACK_PATH: str = os.getenv("AI_LOG_FALLBACK_PATH", "ai_logs_fallback.jsonl")
+    # IDs que se reservan de la secuencia en cada viaje a la base
+    AI_LOG_ID_BLOCK_SIZE: int = int(os.getenv("AI_LOG_ID_BLOCK_SIZE", "100"))
+    # Mantenimiento de ai_logs (ver app/services/ai_log_retention.py): la tabla está particionada
+    # por mes y, dentro de cada mes, por feature_area; la retención borra particiones enteras
+    AI_LOG_MAINTENANCE_ENABLED: bool = os.getenv("AI_LOG_MAINTENANCE_ENABLED", "True").lower() == "true"
+    AI_LOG_MAINTENANCE_SECONDS: float = float(os.getenv("AI_LOG_MAINTENANCE_SECONDS", "3600"))
+    AI_LOG_PARTITIONS_AHEAD: int = int(os.getenv("AI_LOG_PARTITIONS_AHEAD", "2")) # Meses creados por adelantado
+    AI_LOG_RETENTION_DAYS: int = int(os.getenv("AI_LOG_RETENTION_DAYS", "365")) # 0 = sin límite
+    # Retención propia por área, p. ej. "InventoryRestock=90,KpiAnalysis=730" (0 = sin límite).
+    # Cada área listada tiene su propia subpartición en los meses creados a partir de entonces
+    AI_LOG_RETENTION_BY_FEATURE: str = os.getenv("AI_LOG_RETENTION_BY_FEATURE", "")
+    # input_data/output_data de los meses terminados hace más de estos días se mueven a ficheros
+    # comprimidos (la fila guarda archive_ref); 0 = no archivar
+    AI_LOG_ARCHIVE_AFTER_DAYS: int = int(os.getenv("AI_LOG_ARCHIVE_AFTER_DAYS", "30"))
+    AI_LOG_ARCHIVE_MIN_BYTES: int = int(os.getenv("AI_LOG_ARCHIVE_MIN_BYTES", "2048")) # Payloads menores se quedan en la fila
+    AI_LOG_ARCHIVE_DIR: str = os.getenv("AI_LOG_ARCHIVE_DIR", "ai_logs_archive")
 
     # Seguridad JWT
     SECRET_KEY: str = os.getenv("SECRET_KEY", "default_secret_key_please_change")
@@ -43,6 +188,17 @@ class Settings(BaseSettings):
     MAIL_SSL_TLS: bool = os.getenv("MAIL_SSL_TLS", "False").lower() == "true"
     USE_CREDENTIALS: bool = os.getenv("USE_CREDENTIALS", "True").lower() == "true"
     VALIDATE_CERTS: bool = os.getenv("VALIDATE_CERTS", "True").lower() == "true"
+    # Tiempo máximo (segundos) de una conexión/comando SMTP
+    MAIL_TIMEOUT: float = float(os.getenv("MAIL_TIMEOUT", "30"))
+
+    # Outbox de emails: el envío lo hace un worker en segundo plano, no la petición
+    EMAIL_OUTBOX_WORKER_ENABLED: bool = os.getenv("EMAIL_OUTBOX_WORKER_ENABLED", "True").lower() == "true"
+    EMAIL_OUTBOX_POLL_SECONDS: float = float(os.getenv("EMAIL_OUTBOX_POLL_SECONDS", "5"))
+    EMAIL_OUTBOX_BATCH_SIZE: int = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", "50"))
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", "6"))
+    # Espera base entre reintentos; se duplica en cada intento (backoff exponencial)
+    EMAIL_OUTBOX_BACKOFF_SECONDS: float = float(os.getenv("EMAIL_OUTBOX_BACKOFF_SECONDS", "30"))
+    EMAIL_OUTBOX_MAX_BACKOFF_SECONDS: float = float(os.getenv("EMAIL_OUTBOX_MAX_BACKOFF_SECONDS", "3600"))
 
 
     class Config:
@@ -0,0 +1,119 @@
+# app/core/fast_json.py
+# Camino rápido (opt-in) para serializar los listados grandes (KPIs, productos, transacciones).
+#
+# FAST_JSON_MODE:
+#   off       -> FastAPI estándar: valida cada objeto ORM con el response_model y usa el encoder de la stdlib.
+#   validated -> TypeAdapter precompilado por schema: valida igual, pero serializa directamente a bytes
+#                con pydantic-core y evita la segunda pasada de FastAPI.
+#   trusted   -> no valida: los datos vienen de nuestra propia base. Recorre los atributos ORM según los
+#                campos del schema y serializa con orjson (Decimal como string, datetimes UTC con "Z",
+#                igual que pydantic).
+#
+# Los endpoints conservan su response_model para la documentación OpenAPI; cuando el modo está
+# activo devuelven una Response ya renderizada y FastAPI no vuelve a validarla.
+import decimal
+import types
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Callable, Iterable, List, Optional, Type, Union, get_args, get_origin
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+from app.core.config import settings
+
+_ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+class JSONBytesResponse(Response):
+    """Respuesta JSON cuyo cuerpo ya viene serializado en bytes."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return content
+
+
+def _default(value: Any) -> Any:
+    # orjson no soporta Decimal: se emite como string, igual que pydantic en modo JSON
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    raise TypeError(f"Tipo no serializable a JSON: {type(value).__name__}")
+
+
+def dumps(value: Any) -> bytes:
+    """Serializa a JSON con orjson usando las mismas convenciones que pydantic."""
+    return orjson.dumps(value, default=_default, option=_ORJSON_OPTIONS)
+
+
+# --- Modo "trusted": conversores precompilados a partir de los campos del schema ---
+
+def _compile_converter(annotation: Any) -> Optional[Callable[[Any], Any]]:
+    """Conversor para el valor de un campo, o None si el valor se copia tal cual."""
+    origin = get_origin(annotation)
+    if origin in (Union, types.UnionType):
+        options = [arg for arg in get_args(annotation) if arg is not type(None)]
+        return _compile_converter(options[0]) if len(options) == 1 else None
+    if origin in (list, List):
+        (item_type,) = get_args(annotation) or (Any,)
+        item_converter = _compile_converter(item_type)
+        if item_converter is None:
+            return list
+        return lambda items: [item_converter(item) for item in items]
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return row_serializer(annotation)
+    return None
+
+
+@lru_cache(maxsize=None)
+def row_serializer(schema: Type[BaseModel]) -> Callable[[Any], dict]:
+    """Función que convierte un objeto ORM en dict siguiendo los campos de `schema`, sin validar."""
+    fields = [
+        (name, attrgetter(name), _compile_converter(info.annotation))
+        for name, info in schema.model_fields.items()
+    ]
+
+    def serialize(obj: Any) -> dict:
+        row = {}
+        for name, getter, converter in fields:
+            value = getter(obj)
+            row[name] = converter(value) if converter is not None and value is not None else value
+        return row
+
+    return serialize
+
+
+# --- Modo "validated": TypeAdapter compilado una sola vez por schema ---
+
+@lru_cache(maxsize=None)
+def list_adapter(schema: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[schema])
+
+
+def _render_rows(schema: Type[BaseModel], rows: Iterable[Any]) -> bytes:
+    if settings.FAST_JSON_MODE == "trusted":
+        serialize = row_serializer(schema)
+        return dumps([serialize(row) for row in rows])
+    adapter = list_adapter(schema)
+    return adapter.dump_json(adapter.validate_python(list(rows), from_attributes=True))
+
+
+def fast_json_enabled() -> bool:
+    return settings.FAST_JSON_MODE in ("validated", "trusted")
+
+
+def list_response(schema: Type[BaseModel], rows: List[Any]) -> Union[Response, List[Any]]:
+    """
+    Respuesta para un listado `List[schema]`. Si el camino rápido está desactivado
+    devuelve las filas tal cual para que FastAPI aplique el response_model.
+    """
+    if not fast_json_enabled():
+        return rows
+    return JSONBytesResponse(_render_rows(schema, rows))
+
+
+def page_response(schema: Type[BaseModel], rows: List[Any], count: int) -> Union[Response, dict]:
+    """Igual que list_response, para respuestas paginadas `{"count": n, "results": [...]}`."""
+    if not fast_json_enabled():
+        return {"count": count, "results": rows}
+    return JSONBytesResponse(b'{"count":%d,"results":%s}' % (count, _render_rows(schema, rows)))
@@ -0,0 +1,231 @@
+# app/core/idempotency.py
+# Soporte de la cabecera Idempotency-Key para las peticiones de escritura (POST/PATCH).
+# La app móvil reintenta las altas cuando el enlace se corta; con la misma clave el
+# reintento recibe la respuesta original en lugar de crear (y descontar stock) otra vez.
+#
+# - Primera petición con una clave: se reserva la clave en la tabla idempotency_keys,
+#   se procesa y se guarda la respuesta (comprimida) junto a un hash de la petición.
+# - Reintento: se devuelve la respuesta guardada con la cabecera Idempotent-Replayed.
+#   Las recientes se sirven desde una caché LRU en memoria sin tocar la base.
+# - Duplicado concurrente (la original sigue en curso): 409 con Retry-After.
+# - Misma clave con otra petición (otro cuerpo o ruta): 422.
+# - Respuestas 5xx no se guardan: la clave se libera y el reintento se procesa de nuevo.
+#
+# Las claves son por usuario (sujeto del token); sin token válido no se aplica y el
+# endpoint responde 401 como siempre. Una tarea periódica borra las claves expiradas.
+import hashlib
+import json
+import logging
+import zlib
+from typing import List, NamedTuple, Optional
+
+from prometheus_client import Counter
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.tasks import PeriodicTask, register_background_task
+from app.crud.aio import idempotency_key as crud_idempotency_key
+from app.db import session as db_session
+from app.security.core import decode_access_token
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = ("POST", "PATCH")
+HEADER = "idempotency-key"
+MAX_KEY_LENGTH = 255
+CLEANUP_BATCH_SIZE = 1000
+
+IDEMPOTENCY_REQUESTS = Counter(
+    "idempotency_requests_total", "Peticiones con Idempotency-Key según el resultado",
+    ["outcome"], # new, replayed_cache, replayed_db, in_progress, mismatch
+)
+
+
+class StoredResponse(NamedTuple):
+    request_hash: bytes
+    status_code: int
+    content_type: Optional[str]
+    body: bytes # Sin comprimir
+
+
+# Respuestas ya guardadas, con la misma caducidad que en la base
+response_cache = TTLCache(settings.IDEMPOTENCY_CACHE_SIZE, settings.IDEMPOTENCY_TTL_SECONDS)
+
+
+def _principal(headers: Headers) -> Optional[str]:
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    token_data = decode_access_token(token)
+    return token_data.email if token_data else None
+
+
+def _digest(*parts: bytes) -> bytes:
+    return hashlib.sha256(b"\0".join(parts)).digest()
+
+
+async def _read_body(receive: Receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+async def _send_json(send: Send, status_code: int, detail: str, extra_headers: Optional[list] = None) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    await send({"type": "http.response.start", "status": status_code, "headers": headers + (extra_headers or [])})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _replay(send: Send, response: StoredResponse) -> None:
+    headers = [(b"content-length", str(len(response.body)).encode()), (b"idempotent-replayed", b"true")]
+    if response.content_type:
+        headers.append((b"content-type", response.content_type.encode("latin-1")))
+    await send({"type": "http.response.start", "status": response.status_code, "headers": headers})
+    await send({"type": "http.response.body", "body": response.body})
+
+
+class IdempotencyMiddleware:
+    """Middleware ASGI puro: responde a los reintentos con la respuesta guardada."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in IDEMPOTENT_METHODS:
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        key = headers.get(HEADER)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not key.strip() or len(key) > MAX_KEY_LENGTH:
+            await _send_json(send, 400, f"Idempotency-Key debe tener entre 1 y {MAX_KEY_LENGTH} caracteres.")
+            return
+        principal = _principal(headers)
+        if principal is None:
+            await self.app(scope, receive, send)
+            return
+
+        body = await _read_body(receive)
+        key_hash = _digest(principal.encode(), key.encode())
+        request_hash = _digest(scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b""), body)
+
+        cached = response_cache.get(key_hash)
+        if cached is not None:
+            await self._answer_existing(send, cached, request_hash, "replayed_cache")
+            return
+
+        async with db_session.AsyncSessionLocal() as db:
+            row, claimed = await crud_idempotency_key.claim_key(
+                db, key_hash=key_hash, request_hash=request_hash,
+                ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS, lock_seconds=settings.IDEMPOTENCY_LOCK_SECONDS,
+            )
+            row_id, row_request_hash, row_status = row.id, row.request_hash, row.status_code
+            stored = None
+            if not claimed and row_status is not None:
+                body_bytes = zlib.decompress(row.response_body) if row.response_body else b""
+                stored = StoredResponse(row_request_hash, row_status, row.content_type, body_bytes)
+
+        if not claimed:
+            if row_request_hash != request_hash:
+                IDEMPOTENCY_REQUESTS.labels("mismatch").inc()
+                await _send_json(send, 422, "Idempotency-Key ya usada con una petición distinta.")
+            elif stored is None:
+                IDEMPOTENCY_REQUESTS.labels("in_progress").inc()
+                await _send_json(
+                    send, 409, "Una petición con esta Idempotency-Key se está procesando.", [(b"retry-after", b"1")]
+                )
+            else:
+                response_cache.put(key_hash, stored)
+                await self._answer_existing(send, stored, request_hash, "replayed_db")
+            return
+
+        IDEMPOTENCY_REQUESTS.labels("new").inc()
+        await self._process(scope, receive, send, body, key_hash, row_id, request_hash)
+
+    async def _answer_existing(self, send: Send, stored: StoredResponse, request_hash: bytes, outcome: str) -> None:
+        if stored.request_hash != request_hash:
+            IDEMPOTENCY_REQUESTS.labels("mismatch").inc()
+            await _send_json(send, 422, "Idempotency-Key ya usada con una petición distinta.")
+            return
+        IDEMPOTENCY_REQUESTS.labels(outcome).inc()
+        await _replay(send, stored)
+
+    async def _process(
+        self, scope: Scope, receive: Receive, send: Send, body: bytes, key_hash: bytes, key_id: int, request_hash: bytes
+    ) -> None:
+        body_sent = False
+
+        async def replay_receive() -> Message:
+            # El cuerpo ya se leyó para calcular el hash: se entrega de nuevo a la app
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        status_code: Optional[int] = None
+        content_type: Optional[str] = None
+        chunks: List[bytes] = []
+        size = 0
+
+        async def capture_send(message: Message) -> None:
+            nonlocal status_code, content_type, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                content_type = Headers(raw=message["headers"]).get("content-type")
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                size += len(chunk)
+                if size <= settings.IDEMPOTENCY_MAX_RESPONSE_BYTES:
+                    chunks.append(chunk)
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        finally:
+            store = status_code is not None and status_code < 500 and size <= settings.IDEMPOTENCY_MAX_RESPONSE_BYTES
+            async with db_session.AsyncSessionLocal() as db:
+                if store:
+                    response_body = b"".join(chunks)
+                    await crud_idempotency_key.save_response(
+                        db, key_id=key_id, status_code=status_code, content_type=content_type,
+                        body=zlib.compress(response_body),
+                    )
+                    response_cache.put(key_hash, StoredResponse(request_hash, status_code, content_type, response_body))
+                else:
+                    await crud_idempotency_key.release_key(db, key_id=key_id)
+
+
+async def delete_expired_keys() -> None:
+    """Borra por lotes las claves expiradas (tarea periódica)."""
+    total = 0
+    while True:
+        async with db_session.AsyncSessionLocal() as db:
+            deleted = await crud_idempotency_key.delete_expired(db, limit=CLEANUP_BATCH_SIZE)
+        total += deleted
+        if deleted < CLEANUP_BATCH_SIZE:
+            break
+    if total:
+        logger.info(f"Idempotencia: {total} clave(s) expirada(s) eliminadas.")
+
+
+idempotency_cleanup = PeriodicTask(
+    name="idempotency-cleanup",
+    func=delete_expired_keys,
+    interval=settings.IDEMPOTENCY_CLEANUP_SECONDS,
+    jitter=10.0,
+)
+
+if settings.IDEMPOTENCY_ENABLED:
+    register_background_task(idempotency_cleanup)
@@ -0,0 +1,111 @@
+# app/core/metrics.py
+# Métricas HTTP por ruta (latencia, volumen, errores, peticiones en curso y tiempo
+# de base de datos) expuestas en /metrics junto a las del pool de conexiones.
+import time
+from typing import Dict, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.db.instrumentation import start_request_stats
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+
+REQUESTS = Counter(
+    "http_requests_total", "Peticiones HTTP atendidas", ["method", "route", "status"]
+)
+REQUEST_ERRORS = Counter(
+    "http_request_errors_total", "Peticiones que terminaron en 5xx o con excepción", ["method", "route"]
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Latencia de las peticiones HTTP", ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Peticiones HTTP en curso", ["method"],
+    multiprocess_mode="livesum", # Con varios workers: suma de los vivos
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_seconds", "Tiempo de base de datos por petición", ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries", "Consultas SQL por petición", ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+
+# Las rutas sin coincidencia (404) se agrupan para no disparar la cardinalidad
+UNMATCHED_ROUTE = "unmatched"
+
+
+class _RouteMetrics:
+    """Hijos de los histogramas ya resueltos para un (método, ruta): evita labels() por petición."""
+    __slots__ = ("latency", "db_time", "db_queries", "errors", "statuses", "method", "route")
+
+    def __init__(self, method: str, route: str):
+        self.method = method
+        self.route = route
+        self.latency = REQUEST_LATENCY.labels(method, route)
+        self.db_time = REQUEST_DB_TIME.labels(method, route)
+        self.db_queries = REQUEST_DB_QUERIES.labels(method, route)
+        self.errors = REQUEST_ERRORS.labels(method, route)
+        self.statuses: Dict[int, Counter] = {}
+
+    def count(self, status_code: int) -> None:
+        counter = self.statuses.get(status_code)
+        if counter is None:
+            counter = self.statuses[status_code] = REQUESTS.labels(self.method, self.route, str(status_code))
+        counter.inc()
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI puro (sin BaseHTTPMiddleware, que añade una tarea y colas por
+    petición). La ruta se etiqueta con su plantilla (/kpis/{kpi_id}), que el router
+    deja en scope["route"] después de resolver la petición.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._route_metrics: Dict[Tuple[str, str], _RouteMetrics] = {}
+        self._in_progress: Dict[str, Gauge] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        in_progress = self._in_progress.get(method)
+        if in_progress is None:
+            in_progress = self._in_progress[method] = REQUESTS_IN_PROGRESS.labels(method)
+        status_code = 500
+        stats = start_request_stats()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            status_code = 500
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            in_progress.dec()
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or UNMATCHED_ROUTE
+            metrics = self._route_metrics.get((method, route_path))
+            if metrics is None:
+                metrics = self._route_metrics[(method, route_path)] = _RouteMetrics(method, route_path)
+            metrics.latency.observe(elapsed)
+            metrics.db_time.observe(stats.db_time)
+            metrics.db_queries.observe(stats.query_count)
+            metrics.count(status_code)
+            if status_code >= 500:
+                metrics.errors.inc()
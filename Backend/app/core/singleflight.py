@@ -0,0 +1,35 @@
+# app/core/singleflight.py
+# Agrupación de llamadas concurrentes idénticas ("single-flight"): mientras una llamada
+# con una clave está en curso, las demás con la misma clave esperan su resultado en
+# lugar de repetirla. Por worker, solo desde el event loop (no necesita locks).
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: Dict[Hashable, "asyncio.Task[Any]"] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Ejecuta `func` una sola vez por clave en curso. Devuelve (resultado, compartido):
+        compartido es True si se reutilizó la llamada de otro. Las excepciones también
+        se comparten.
+        """
+        task = self._calls.get(key)
+        shared = task is not None
+        if task is None:
+            # Tarea propia: si se cancela la petición que la lanzó, las demás siguen esperando
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._forget(key, task))
+        return await asyncio.shield(task), shared
+
+    def _forget(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception() # Marca la excepción como recuperada aunque nadie la esperara
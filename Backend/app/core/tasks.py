@@ -0,0 +1,122 @@
+# app/core/tasks.py
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """
+    Tarea de fondo que ejecuta una corrutina cada `interval` segundos
+    dentro del event loop de la aplicación.
+
+    Se puede "despertar" antes de tiempo con `wake()` (por ejemplo, cuando un
+    endpoint encola trabajo nuevo) y expone su estado para los health checks.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[object]],
+        interval: float,
+        jitter: float = 0.0,
+    ):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.last_run: Optional[float] = None # time.monotonic() de la última ejecución
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake_event: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopping = False
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Arranca la tarea en el event loop actual (idempotente)."""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake_event = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(), name=self.name)
+        logger.info(f"Tarea de fondo '{self.name}' iniciada (intervalo {self.interval}s).")
+
+    async def stop(self) -> None:
+        """Detiene la tarea esperando a que termine la iteración en curso."""
+        if not self.running:
+            return
+        self._stopping = True
+        self.wake()
+        try:
+            await asyncio.wait_for(self._task, timeout=max(self.interval, 5.0))
+        except asyncio.TimeoutError:
+            self._task.cancel()
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info(f"Tarea de fondo '{self.name}' detenida.")
+
+    def wake(self) -> None:
+        """Adelanta la siguiente ejecución. Se puede llamar desde cualquier hilo."""
+        if self._wake_event is None or self._loop is None or self._loop.is_closed():
+            return
+        try:
+            current_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            current_loop = None
+        if current_loop is self._loop:
+            self._wake_event.set()
+        else:
+            # Llamado desde el threadpool (endpoints síncronos)
+            self._loop.call_soon_threadsafe(self._wake_event.set)
+
+    async def run_once(self) -> None:
+        try:
+            await self.func()
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"Error en la tarea de fondo '{self.name}': {e}", exc_info=True)
+        finally:
+            self.last_run = time.monotonic()
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            await self.run_once()
+            if self._stopping:
+                break
+            delay = self.interval + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+            try:
+                await asyncio.wait_for(self._wake_event.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wake_event.clear()
+
+
+# Registro de tareas de fondo que se arrancan/detienen en el lifespan de la app
+background_tasks: List[PeriodicTask] = []
+
+
+def register_background_task(task: PeriodicTask) -> PeriodicTask:
+    """Registra una tarea para que el lifespan de la aplicación la gestione."""
+    if task not in background_tasks:
+        background_tasks.append(task)
+    return task
+
+
+async def start_background_tasks() -> None:
+    for task in background_tasks:
+        task.start()
+
+
+async def stop_background_tasks() -> None:
+    for task in reversed(background_tasks):
+        await task.stop()
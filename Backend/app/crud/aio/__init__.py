@@ -0,0 +1,3 @@
+# Variantes asíncronas (AsyncSession) de los módulos CRUD.
+# Las relaciones que serializan los schemas se cargan siempre de forma explícita
+# (joinedload), porque en modo async una carga perezosa lanza MissingGreenlet.
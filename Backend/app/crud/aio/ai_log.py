@@ -0,0 +1,149 @@
+# app/crud/aio/ai_log.py
+import datetime
+from sqlalchemy import select, desc, insert, text, func, literal_column, DateTime, Float, Integer
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, Optional, List
+
+from app.models.ai_log import AiLog
+from app.schemas.ai import AiLogCreate
+
+async def create_log(db: AsyncSession, *, log_in: AiLogCreate) -> AiLog:
+    """Crea un nuevo registro de log de IA."""
+    db_log = AiLog(
+        user_id=log_in.user_id,
+        feature_area=log_in.feature_area,
+        input_data=log_in.input_data,
+        output_data=log_in.output_data,
+        decision_reason=log_in.decision_reason,
+        metrics=log_in.metrics
+    )
+    db.add(db_log)
+    await db.commit()
+    await db.refresh(db_log)
+    return db_log
+
+async def allocate_log_ids(db: AsyncSession, *, count: int) -> List[int]:
+    """
+    Reserva `count` IDs de la secuencia de ai_logs (solo PostgreSQL), para conocer
+    el ID de un log antes de insertarlo (ver app/services/ai_log_writer.py).
+    """
+    result = await db.execute(
+        text("SELECT nextval(pg_get_serial_sequence('ai_logs', 'id')) FROM generate_series(1, :count)"),
+        {"count": count},
+    )
+    ids = [row[0] for row in result]
+    await db.commit()
+    return ids
+
+async def create_logs(db: AsyncSession, *, rows: List[Dict[str, Any]], ignore_conflicts: bool = False) -> None:
+    """
+    Inserta varios logs en una sola sentencia multi-fila. Con `ignore_conflicts`
+    se saltan los IDs ya existentes (reintento de un lote que pudo insertarse).
+    """
+    if not rows:
+        return
+    stmt = insert(AiLog)
+    if ignore_conflicts and db.bind.dialect.name == "postgresql":
+        # Clave primaria de la tabla particionada: id más las columnas de partición (timestamp
+        # se fija al encolar, así que un reintento repite la misma clave)
+        stmt = postgresql.insert(AiLog).on_conflict_do_nothing(index_elements=["id", "timestamp", "feature_area"])
+    # Una sentencia por conjunto de columnas: el INSERT se compila con las claves de la
+    # primera fila, y un lote puede mezclar logs con ID reservado y sin él
+    groups: Dict[frozenset, List[Dict[str, Any]]] = {}
+    for row in rows:
+        groups.setdefault(frozenset(row), []).append(row)
+    for group in groups.values():
+        await db.execute(stmt, group)
+    await db.commit()
+
+async def get_log(db: AsyncSession, log_id: int) -> Optional[AiLog]:
+    """Obtiene un log por ID."""
+    return await db.get(AiLog, log_id)
+
+async def get_logs(
+    db: AsyncSession,
+    *,
+    user_id: Optional[int] = None,
+    feature_area: Optional[str] = None,
+    errors_only: bool = False,
+    min_latency_ms: Optional[float] = None,
+    skip: int = 0,
+    limit: int = 100
+) -> List[AiLog]:
+    """Obtiene una lista de logs, con filtros opcionales."""
+    query = select(AiLog)
+    if user_id:
+        query = query.where(AiLog.user_id == user_id)
+    if feature_area:
+        query = query.where(AiLog.feature_area == feature_area)
+    if errors_only:
+        query = query.where(_is_error())
+    if min_latency_ms is not None:
+        query = query.where(_latency_ms() >= min_latency_ms)
+
+    result = await db.execute(query.order_by(desc(AiLog.timestamp)).offset(skip).limit(limit))
+    return list(result.scalars().all())
+
+
+# Expresiones sobre metrics. Deben coincidir con las de los índices del modelo
+# (ix_ai_logs_metrics, ix_ai_logs_latency_ms, ix_ai_logs_errors_*) para que se usen;
+# van como literales y no como parámetros para que el planner pueda emparejarlas
+# también con el plan genérico de una sentencia preparada.
+def _contains(document: str):
+    return AiLog.metrics.op("@>")(literal_column(f"'{document}'"))
+
+def _key(key: str):
+    return AiLog.metrics.op("->>")(literal_column(f"'{key}'"))
+
+def _is_error():
+    return _contains('{"error": true}')
+
+def _latency_ms():
+    return _key("latency_ms").cast(Float)
+
+def _tokens(key: str):
+    return func.coalesce(func.sum(_key(key).cast(Integer)), 0)
+
+async def get_usage_stats(
+    db: AsyncSession,
+    *,
+    since: datetime.datetime,
+    bucket: str = "hour",
+    user_id: Optional[int] = None,
+    feature_area: Optional[str] = None,
+) -> List[Row]:
+    """
+    Uso de la IA por área y por intervalo (`bucket`: hour, day o week) desde `since`,
+    agregado en la base (solo PostgreSQL: percentile_cont y operadores JSONB). Filas
+    (feature_area, bucket, requests, errors, error_rate, cached, p50_latency_ms,
+    p95_latency_ms, prompt_tokens, completion_tokens).
+    """
+    period = func.date_trunc(bucket, AiLog.timestamp, type_=DateTime(timezone=True)).label("bucket")
+    requests = func.count()
+    errors = func.count().filter(_is_error())
+    latency = _latency_ms()
+    query = (
+        select(
+            AiLog.feature_area,
+            period,
+            requests.label("requests"),
+            errors.label("errors"),
+            (errors.cast(Float) / requests.cast(Float)).label("error_rate"),
+            func.count().filter(_contains('{"cached": true}')).label("cached"),
+            func.percentile_cont(0.5).within_group(latency).label("p50_latency_ms"),
+            func.percentile_cont(0.95).within_group(latency).label("p95_latency_ms"),
+            _tokens("prompt_tokens").label("prompt_tokens"),
+            _tokens("completion_tokens").label("completion_tokens"),
+        )
+        .where(AiLog.timestamp >= since)
+        .group_by(AiLog.feature_area, period)
+        .order_by(AiLog.feature_area, period)
+    )
+    if user_id is not None:
+        query = query.where(AiLog.user_id == user_id)
+    if feature_area:
+        query = query.where(AiLog.feature_area == feature_area)
+    result = await db.execute(query)
+    return list(result.all())
@@ -0,0 +1,194 @@
+# app/crud/aio/ai_log_partitions.py
+# Particiones de ai_logs (solo PostgreSQL). Dos niveles:
+#   ai_logs                          RANGE (timestamp)
+#     ai_logs_y2026m10               un mes, LIST (feature_area)
+#       ai_logs_y2026m10_kpianalysis   un área con retención propia
+#       ai_logs_y2026m10_default       el resto de áreas
+#     ai_logs_default                filas fuera de los meses creados (red de seguridad: el
+#                                    mantenimiento crea esos meses y les pasa las filas)
+# El mes se lee del nombre de la partición y las áreas de su FOR VALUES IN (...).
+import re
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.ai_log import AiLog
+
+# Clave de pg_try_advisory_xact_lock: un solo worker hace el mantenimiento a la vez
+MAINTENANCE_LOCK_KEY = 0x41494C4F47 # "AILOG"
+# Comentario que marca una partición cuyos payloads ya se archivaron
+ARCHIVED_COMMENT = "payloads archivados"
+
+_MONTH_NAME = re.compile(r"^ai_logs_y(\d{4})m(\d{2})$")
+_LIST_VALUE = re.compile(r"'((?:[^']|'')*)'")
+
+
+class LeafPartition(NamedTuple):
+    name: str
+    features: Optional[Tuple[str, ...]] # None = DEFAULT (áreas sin subpartición propia)
+    archived: bool
+
+
+def month_partition_name(month: date) -> str:
+    return f"ai_logs_y{month.year:04d}m{month.month:02d}"
+
+
+def next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _feature_suffix(feature: str, used: set) -> str:
+    suffix = re.sub(r"[^a-z0-9]+", "_", feature.lower()).strip("_")[:40] or "area"
+    base, n = suffix, 2
+    while suffix in used or suffix == "default":
+        suffix, n = f"{base}_{n}", n + 1
+    used.add(suffix)
+    return suffix
+
+
+def month_partition_ddl(month: date, features: Sequence[str]) -> List[str]:
+    """Sentencias para crear el mes `month` con una subpartición por área de `features` y la DEFAULT."""
+    name = month_partition_name(month)
+    end = next_month(month)
+    statements = [
+        f"CREATE TABLE IF NOT EXISTS {_quote(name)} PARTITION OF ai_logs "
+        f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{end.isoformat()} 00:00:00+00') "
+        f"PARTITION BY LIST (feature_area)"
+    ]
+    used: set = set()
+    for feature in sorted(set(features)):
+        leaf = f"{name}_{_feature_suffix(feature, used)}"
+        statements.append(
+            f"CREATE TABLE IF NOT EXISTS {_quote(leaf)} PARTITION OF {_quote(name)} FOR VALUES IN ({_literal(feature)})"
+        )
+    statements.append(f"CREATE TABLE IF NOT EXISTS {_quote(name + '_default')} PARTITION OF {_quote(name)} DEFAULT")
+    return statements
+
+
+def _parse_features(bound: str) -> Optional[Tuple[str, ...]]:
+    if bound.strip().upper() == "DEFAULT":
+        return None
+    return tuple(value.replace("''", "'") for value in _LIST_VALUE.findall(bound))
+
+
+async def try_maintenance_lock(db: AsyncSession) -> bool:
+    """Bloqueo de mantenimiento hasta el final de la transacción en curso (False si lo tiene otro)."""
+    result = await db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY})
+    return bool(result.scalar())
+
+
+async def is_partitioned(db: AsyncSession) -> bool:
+    """True si ai_logs ya es una tabla particionada (migración aplicada)."""
+    result = await db.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass('ai_logs')"))
+    return result.scalar() == "p"
+
+
+async def list_partitions(db: AsyncSession) -> Dict[date, List[LeafPartition]]:
+    """Meses existentes (primer día) con sus subparticiones."""
+    result = await db.execute(text(
+        "SELECT c.relname AS name, p.relname AS parent, t.level, t.isleaf, "
+        "pg_get_expr(c.relpartbound, c.oid) AS bound, obj_description(c.oid, 'pg_class') AS comment "
+        "FROM pg_partition_tree('ai_logs') t "
+        "JOIN pg_class c ON c.oid = t.relid JOIN pg_class p ON p.oid = t.parentrelid "
+        "WHERE t.level > 0"
+    ))
+    months: Dict[str, date] = {}
+    leaves: List[Any] = []
+    for row in result:
+        match = _MONTH_NAME.match(row.name)
+        if row.level == 1 and match:
+            months[row.name] = date(int(match.group(1)), int(match.group(2)), 1)
+        elif row.level == 2 and row.isleaf:
+            leaves.append(row)
+    partitions: Dict[date, List[LeafPartition]] = {month: [] for month in months.values()}
+    for row in leaves:
+        month = months.get(row.parent)
+        if month is not None:
+            partitions[month].append(
+                LeafPartition(row.name, _parse_features(row.bound), row.comment == ARCHIVED_COMMENT)
+            )
+    return partitions
+
+
+async def create_month_partition(db: AsyncSession, month: date, features: Sequence[str]) -> None:
+    for statement in month_partition_ddl(month, features):
+        await db.execute(text(statement))
+
+
+async def get_default_months(db: AsyncSession) -> Dict[date, int]:
+    """Filas de ai_logs_default por mes (primer día). Vacío si todo cae en meses creados."""
+    result = await db.execute(text(
+        "SELECT date_trunc('month', timestamp AT TIME ZONE 'UTC') AS month, count(*) AS total "
+        "FROM ai_logs_default GROUP BY 1"
+    ))
+    return {row.month.date(): row.total for row in result}
+
+
+async def move_default_rows(db: AsyncSession, month: date, features: Sequence[str]) -> int:
+    """
+    Crea el mes `month` y le pasa sus filas de ai_logs_default (devuelve cuántas). Primero se
+    sacan a una tabla temporal: PostgreSQL no deja crear la partición si la DEFAULT tiene filas
+    de su rango. Todo en la transacción en curso.
+    """
+    end = next_month(month)
+    bounds = {
+        "start": datetime(month.year, month.month, 1, tzinfo=timezone.utc),
+        "end": datetime(end.year, end.month, 1, tzinfo=timezone.utc),
+    }
+    await db.execute(text("CREATE TEMP TABLE ai_logs_moving (LIKE ai_logs)"))
+    await db.execute(
+        text(
+            "WITH moved AS (DELETE FROM ai_logs_default WHERE timestamp >= :start AND timestamp < :end RETURNING *) "
+            "INSERT INTO ai_logs_moving SELECT * FROM moved"
+        ),
+        bounds,
+    )
+    await create_month_partition(db, month, features)
+    result = await db.execute(text("INSERT INTO ai_logs SELECT * FROM ai_logs_moving"))
+    await db.execute(text("DROP TABLE ai_logs_moving"))
+    return result.rowcount
+
+
+async def drop_partition(db: AsyncSession, name: str) -> None:
+    await db.execute(text(f"DROP TABLE IF EXISTS {_quote(name)}"))
+
+
+async def mark_archived(db: AsyncSession, name: str) -> None:
+    await db.execute(text(f"COMMENT ON TABLE {_quote(name)} IS {_literal(ARCHIVED_COMMENT)}"))
+
+
+async def get_archivable_logs(
+    db: AsyncSession, *, partition: str, min_bytes: int, after_id: int, limit: int
+) -> List[Any]:
+    """Logs de `partition` con payload de al menos `min_bytes` aún sin archivar, por id."""
+    result = await db.execute(
+        text(
+            f"SELECT id, timestamp, input_data, output_data FROM {_quote(partition)} "
+            "WHERE archive_ref IS NULL AND id > :after_id "
+            "AND octet_length(coalesce(input_data, '')) + octet_length(coalesce(output_data, '')) >= :min_bytes "
+            "ORDER BY id LIMIT :limit"
+        ),
+        {"after_id": after_id, "min_bytes": min_bytes, "limit": limit},
+    )
+    return list(result.all())
+
+
+async def set_archive_refs(db: AsyncSession, refs: List[Tuple[int, datetime, str]]) -> None:
+    """Vacía input_data/output_data de cada (id, timestamp) y guarda su archive_ref."""
+    table = AiLog.__table__
+    stmt = (
+        table.update()
+        .where(table.c.id == bindparam("log_id"), table.c.timestamp == bindparam("log_timestamp"))
+        .values(input_data=None, output_data=None, archive_ref=bindparam("ref"))
+    )
+    await db.execute(stmt, [{"log_id": i, "log_timestamp": ts, "ref": ref} for i, ts, ref in refs])
@@ -0,0 +1,41 @@
+# app/crud/aio/ai_suggestion_cache.py
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.ai_suggestion_cache import AiSuggestionCache
+
+async def get_entry(db: AsyncSession, *, key_hash: bytes) -> Optional[AiSuggestionCache]:
+    """Entrada vigente para la clave, o None si no existe o ya expiró."""
+    query = select(AiSuggestionCache).where(
+        AiSuggestionCache.key_hash == key_hash,
+        AiSuggestionCache.expires_at > datetime.now(timezone.utc),
+    )
+    return (await db.scalars(query)).first()
+
+async def save_entry(
+    db: AsyncSession, *, key_hash: bytes, feature_area: str, suggestion: Any, explanation: Optional[str], ttl_seconds: float
+) -> None:
+    """Guarda (o reemplaza) la sugerencia para la clave."""
+    now = datetime.now(timezone.utc)
+    await db.merge(AiSuggestionCache(
+        key_hash=key_hash, feature_area=feature_area, suggestion=suggestion, explanation=explanation,
+        created_at=now, expires_at=now + timedelta(seconds=ttl_seconds),
+    ))
+    await db.commit()
+
+async def delete_expired(db: AsyncSession, *, limit: int) -> int:
+    """Borra hasta `limit` entradas expiradas. Devuelve cuántas se borraron."""
+    expired = (
+        select(AiSuggestionCache.key_hash)
+        .where(AiSuggestionCache.expires_at < datetime.now(timezone.utc))
+        .limit(limit)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        delete(AiSuggestionCache).where(AiSuggestionCache.key_hash.in_(expired)).execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount
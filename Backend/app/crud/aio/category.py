@@ -0,0 +1,43 @@
+# app/crud/aio/category.py
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, List
+
+from app.models.category import Category
+from app.schemas.category import CategoryCreate, CategoryUpdate
+
+async def get_category(db: AsyncSession, category_id: int) -> Optional[Category]:
+    return await db.get(Category, category_id)
+
+async def get_category_by_name(db: AsyncSession, name: str) -> Optional[Category]:
+    result = await db.execute(select(Category).where(Category.name == name))
+    return result.scalars().first()
+
+async def get_categories(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Category]:
+    result = await db.execute(select(Category).order_by(Category.id).offset(skip).limit(limit))
+    return list(result.scalars().all())
+
+async def create_category(db: AsyncSession, category_in: CategoryCreate) -> Category:
+    db_category = Category(**category_in.model_dump())
+    db.add(db_category)
+    await db.commit()
+    await db.refresh(db_category)
+    return db_category
+
+async def update_category(db: AsyncSession, *, db_category: Category, category_in: CategoryUpdate) -> Category:
+    update_data = category_in.model_dump(exclude_unset=True)
+    for field, value in update_data.items():
+        if hasattr(db_category, field):
+            setattr(db_category, field, value)
+    db.add(db_category)
+    await db.commit()
+    await db.refresh(db_category)
+    return db_category
+
+async def delete_category(db: AsyncSession, *, category_id: int) -> Optional[Category]:
+    db_category = await db.get(Category, category_id)
+    if db_category:
+        # Igual que en la versión síncrona, cascade="all, delete-orphan" borra sus productos.
+        await db.delete(db_category)
+        await db.commit()
+    return db_category
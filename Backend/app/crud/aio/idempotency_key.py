@@ -0,0 +1,90 @@
+# app/crud/aio/idempotency_key.py
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.idempotency_key import IdempotencyKey
+
+async def claim_key(
+    db: AsyncSession, *, key_hash: bytes, request_hash: bytes, ttl_seconds: float, lock_seconds: float
+) -> Tuple[IdempotencyKey, bool]:
+    """
+    Reserva una clave de idempotencia para procesar la petición.
+    Devuelve (fila, reservada). Si la clave ya existe se devuelve la fila existente
+    sin reservar, salvo que haya expirado o que su petición lleve más de
+    `lock_seconds` en curso (el proceso que la atendía murió): entonces se reutiliza.
+    """
+    now = datetime.now(timezone.utc)
+    expires_at = now + timedelta(seconds=ttl_seconds)
+    db_key = IdempotencyKey(key_hash=key_hash, request_hash=request_hash, created_at=now, expires_at=expires_at)
+    db.add(db_key)
+    try:
+        await db.commit()
+        return db_key, True
+    except IntegrityError:
+        # Otra petición con la misma clave llegó antes
+        await db.rollback()
+
+    stmt = (
+        update(IdempotencyKey)
+        .where(
+            IdempotencyKey.key_hash == key_hash,
+            or_(
+                IdempotencyKey.expires_at < now,
+                IdempotencyKey.status_code.is_(None) & (IdempotencyKey.created_at < now - timedelta(seconds=lock_seconds)),
+            ),
+        )
+        .values(
+            request_hash=request_hash, status_code=None, content_type=None, response_body=None,
+            created_at=now, expires_at=expires_at,
+        )
+        .returning(IdempotencyKey)
+        .execution_options(synchronize_session=False)
+    )
+    reclaimed = (await db.scalars(stmt)).first()
+    await db.commit()
+    if reclaimed is not None:
+        return reclaimed, True
+    existing = (await db.scalars(select(IdempotencyKey).where(IdempotencyKey.key_hash == key_hash))).first()
+    if existing is None:
+        # La limpieza la borró entre medias: se reintenta una vez
+        return await claim_key(db, key_hash=key_hash, request_hash=request_hash, ttl_seconds=ttl_seconds, lock_seconds=lock_seconds)
+    return existing, False
+
+async def save_response(
+    db: AsyncSession, *, key_id: int, status_code: int, content_type: Optional[str], body: bytes
+) -> None:
+    """Guarda la respuesta de la petición original para repetirla en los reintentos."""
+    await db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.id == key_id)
+        .values(status_code=status_code, content_type=content_type, response_body=body)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+
+async def release_key(db: AsyncSession, *, key_id: int) -> None:
+    """Libera una clave cuya petición falló (5xx), para que el reintento se procese de nuevo."""
+    await db.execute(
+        delete(IdempotencyKey)
+        .where(IdempotencyKey.id == key_id, IdempotencyKey.status_code.is_(None))
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+
+async def delete_expired(db: AsyncSession, *, limit: int) -> int:
+    """Borra hasta `limit` claves expiradas. Devuelve cuántas se borraron."""
+    expired_ids = (
+        select(IdempotencyKey.id)
+        .where(IdempotencyKey.expires_at < datetime.now(timezone.utc))
+        .limit(limit)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        delete(IdempotencyKey).where(IdempotencyKey.id.in_(expired_ids)).execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount
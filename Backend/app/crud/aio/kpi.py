@@ -0,0 +1,122 @@
+# app/crud/aio/kpi.py
+from sqlalchemy import Row, select, func, or_, Select
+from sqlalchemy.orm import joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import Optional, List
+
+from app.models.kpi import KPI, KpiTrendDB
+from app.models.kpi_history import KpiHistory
+from app.schemas.kpi import KpiCreate, KpiUpdate, KpiFilters
+
+def _apply_filters(query: Select, filters: Optional[KpiFilters]) -> Select:
+    """Aplica los filtros opcionales de KpiFilters a una consulta."""
+    if filters:
+        if filters.category:
+            query = query.where(KPI.category == filters.category)
+        if filters.trend:
+            query = query.where(KPI.trend == filters.trend)
+        if filters.owner_id:
+            query = query.where(KPI.owner_id == filters.owner_id)
+    return query
+
+async def get_kpi(db: AsyncSession, kpi_id: int) -> Optional[KPI]:
+    """Obtiene un KPI por su ID."""
+    result = await db.execute(select(KPI).options(joinedload(KPI.owner)).where(KPI.id == kpi_id))
+    return result.scalars().first()
+
+async def get_kpis(
+    db: AsyncSession,
+    *,
+    filters: Optional[KpiFilters] = None,
+    skip: int = 0,
+    limit: int = 100
+) -> List[KPI]:
+    """Obtiene una lista de KPIs, aplicando filtros opcionales."""
+    query = _apply_filters(select(KPI).options(joinedload(KPI.owner)), filters)
+    result = await db.execute(query.order_by(KPI.id).offset(skip).limit(limit))
+    return list(result.scalars().all())
+
+async def get_kpis_count(db: AsyncSession, *, filters: Optional[KpiFilters] = None) -> int:
+    """Cuenta el número total de KPIs, aplicando filtros opcionales."""
+    query = _apply_filters(select(func.count(KPI.id)), filters)
+    return (await db.execute(query)).scalar_one()
+
+async def get_kpi_stats(db: AsyncSession, *, kpi_id: int, owner_id: int, since: datetime) -> Optional[Row]:
+    """
+    KPI con las estadísticas de su histórico desde `since` (muestras, mínimo, máximo, media,
+    desviación típica y primer valor del periodo) en una consulta. Solo si es de `owner_id`
+    o no tiene propietario (KPI global); si no, None.
+    """
+    in_window = (KpiHistory.kpi_id == KPI.id) & (KpiHistory.recorded_at >= since)
+    first_value = (
+        select(KpiHistory.value)
+        .where(KpiHistory.kpi_id == kpi_id, KpiHistory.recorded_at >= since)
+        .order_by(KpiHistory.recorded_at)
+        .limit(1)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        select(
+            KPI.id, KPI.name, KPI.value, KPI.target, KPI.unit, KPI.trend, KPI.category, KPI.last_updated,
+            func.count(KpiHistory.id).label("samples"),
+            func.min(KpiHistory.value).label("min_value"),
+            func.max(KpiHistory.value).label("max_value"),
+            func.avg(KpiHistory.value).label("mean_value"),
+            func.stddev_samp(KpiHistory.value).label("stddev_value"),
+            first_value.label("first_value"),
+        )
+        .outerjoin(KpiHistory, in_window)
+        .where(KPI.id == kpi_id, or_(KPI.owner_id == owner_id, KPI.owner_id.is_(None)))
+        .group_by(KPI.id)
+    )
+    return result.first()
+
+async def create_kpi(db: AsyncSession, *, kpi_in: KpiCreate, owner_id: Optional[int] = None) -> KPI:
+    """Crea un nuevo KPI."""
+    create_data = kpi_in.model_dump()
+    if owner_id and 'owner_id' not in create_data:
+        create_data['owner_id'] = owner_id
+
+    db_kpi = KPI(**create_data)
+    db.add(db_kpi)
+    await db.flush() # Necesitamos el id para la primera muestra del histórico
+    db.add(KpiHistory(kpi_id=db_kpi.id, value=db_kpi.value))
+    await db.commit()
+    await db.refresh(db_kpi)
+    return db_kpi
+
+async def update_kpi(db: AsyncSession, *, db_kpi: KPI, kpi_in: KpiUpdate) -> KPI:
+    """Actualiza un KPI existente (misma lógica de tendencia que la versión síncrona)."""
+    update_data = kpi_in.model_dump(exclude_unset=True)
+
+    if update_data.get('value') is not None and update_data['value'] != db_kpi.value:
+        db.add(KpiHistory(kpi_id=db_kpi.id, value=update_data['value']))
+
+    if 'value' in update_data and 'trend' not in update_data:
+        if db_kpi.value is not None:
+            if update_data['value'] > db_kpi.value:
+                db_kpi.trend = KpiTrendDB.up
+            elif update_data['value'] < db_kpi.value:
+                db_kpi.trend = KpiTrendDB.down
+            else:
+                db_kpi.trend = KpiTrendDB.stable
+        else:
+            db_kpi.trend = KpiTrendDB.stable
+
+    for field, value in update_data.items():
+        if hasattr(db_kpi, field):
+            setattr(db_kpi, field, value)
+
+    db.add(db_kpi)
+    await db.commit()
+    await db.refresh(db_kpi) # Recupera last_updated (onupdate en DB)
+    return db_kpi
+
+async def delete_kpi(db: AsyncSession, *, kpi_id: int) -> Optional[KPI]:
+    """Elimina un KPI."""
+    db_kpi = await db.get(KPI, kpi_id)
+    if db_kpi:
+        await db.delete(db_kpi)
+        await db.commit()
+    return db_kpi
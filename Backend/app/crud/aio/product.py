@@ -0,0 +1,137 @@
+# app/crud/aio/product.py
+from sqlalchemy import Row, select, func
+from sqlalchemy.orm import joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta
+from typing import Optional, List, Sequence
+
+from app.models.category import Category
+from app.models.product import Product
+from app.models.transaction import Transaction, TransactionType
+from app.schemas.product import ProductCreate, ProductUpdate
+
+async def _reload_with_category(db: AsyncSession, product_id: int) -> Product:
+    """Recarga un producto tras el commit con su categoría (ProductRead la serializa)."""
+    result = await db.execute(
+        select(Product)
+        .options(joinedload(Product.category))
+        .where(Product.id == product_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().one()
+
+async def get_product(db: AsyncSession, product_id: int, owner_id: int) -> Optional[Product]:
+    """
+    Obtiene un producto por su ID y el ID de su propietario.
+    Esto asegura que los usuarios solo puedan acceder a sus propios productos.
+    """
+    result = await db.execute(
+        select(Product).options(joinedload(Product.category)).where(
+            Product.id == product_id,
+            Product.owner_id == owner_id
+        )
+    )
+    return result.scalars().first()
+
+async def get_product_by_sku(db: AsyncSession, sku: str) -> Optional[Product]:
+    """Obtiene un producto por su SKU."""
+    result = await db.execute(select(Product).options(joinedload(Product.category)).where(Product.sku == sku))
+    return result.scalars().first()
+
+async def get_products(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    category_id: Optional[int] = None,
+    owner_id: Optional[int] = None
+) -> List[Product]:
+    """Obtiene una lista de productos, opcionalmente filtrados por categoría y/o propietario."""
+    query = select(Product).options(joinedload(Product.category))
+    if category_id:
+        query = query.where(Product.category_id == category_id)
+    if owner_id:
+        query = query.where(Product.owner_id == owner_id)
+    result = await db.execute(query.order_by(Product.id).offset(skip).limit(limit))
+    return list(result.scalars().all())
+
+async def get_stock_levels(db: AsyncSession, owner_id: int) -> Sequence[Row]:
+    """(id, stock) de todos los productos del propietario, sin cargar los objetos."""
+    result = await db.execute(
+        select(Product.id, Product.stock).where(Product.owner_id == owner_id).order_by(Product.id)
+    )
+    return result.all()
+
+async def get_product_activity(
+    db: AsyncSession, *, product_id: int, owner_id: int, now: datetime
+) -> Optional[Row]:
+    """
+    Producto con su categoría y los agregados de movimientos de los últimos 90 días
+    (salidas a 7/30/90 días, entradas a 30, número de salidas, última salida) en una consulta.
+    """
+    window = now - timedelta(days=90)
+    is_out = Transaction.type == TransactionType.OUT
+
+    def total(condition, days: int):
+        since = now - timedelta(days=days)
+        return func.coalesce(func.sum(Transaction.quantity).filter(condition, Transaction.timestamp >= since), 0)
+
+    result = await db.execute(
+        select(
+            Product.id, Product.name, Product.sku, Product.stock, Product.price,
+            Category.name.label("category"),
+            total(is_out, 7).label("out_7d"),
+            total(is_out, 30).label("out_30d"),
+            total(is_out, 90).label("out_90d"),
+            total(Transaction.type == TransactionType.IN, 30).label("in_30d"),
+            func.count(Transaction.id).filter(is_out).label("out_movements_90d"),
+            func.max(Transaction.timestamp).filter(is_out).label("last_out_at"),
+        )
+        .outerjoin(Category, Product.category_id == Category.id)
+        .outerjoin(Transaction, (Transaction.product_id == Product.id) & (Transaction.timestamp >= window))
+        .where(Product.id == product_id, Product.owner_id == owner_id)
+        .group_by(Product.id, Category.name)
+    )
+    return result.first()
+
+async def create_product(db: AsyncSession, *, product_in: ProductCreate) -> Product:
+    """
+    Crea un nuevo producto en la base de datos.
+    El product_in (ProductCreate schema) ya debe contener el owner_id.
+    """
+    db_product = Product(**product_in.model_dump(exclude_unset=True))
+    db.add(db_product)
+    await db.commit()
+    return await _reload_with_category(db, db_product.id)
+
+async def update_product(db: AsyncSession, *, db_product: Product, product_in: ProductUpdate, owner_id: Optional[int] = None) -> Product:
+    """
+    Actualiza un producto existente.
+    Si owner_id se proporciona, se actualiza el propietario del producto.
+    """
+    update_data = product_in.model_dump(exclude_unset=True)
+    for field, value in update_data.items():
+        if hasattr(db_product, field):
+            setattr(db_product, field, value)
+    if owner_id is not None:
+        db_product.owner_id = owner_id
+
+    db.add(db_product)
+    await db.commit()
+    # La categoría puede haber cambiado: recargar con la relación actualizada
+    return await _reload_with_category(db, db_product.id)
+
+async def delete_product(db: AsyncSession, *, product_id: int, owner_id: Optional[int] = None) -> Optional[Product]:
+    """
+    Elimina un producto por su ID.
+    Opcionalmente, puede filtrar por owner_id para asegurar permisos.
+    """
+    query = select(Product).options(joinedload(Product.category)).where(Product.id == product_id)
+    if owner_id:
+        query = query.where(Product.owner_id == owner_id)
+    db_product = (await db.execute(query)).scalars().first()
+
+    if db_product:
+        # Cascade borrará las transacciones asociadas (configurado en el modelo)
+        await db.delete(db_product)
+        await db.commit()
+    return db_product
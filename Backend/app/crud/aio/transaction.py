@@ -0,0 +1,129 @@
+# app/crud/aio/transaction.py
+from sqlalchemy import DateTime, Row, select, func, desc
+from sqlalchemy.orm import joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import AsyncIterator, Optional, List, Sequence
+
+from app.models.transaction import Transaction
+from app.models.product import Product
+from app.models.user import User
+from app.schemas.transaction import TransactionCreate, TransactionType
+
+def _read_options():
+    """TransactionRead incluye producto (con categoría) y usuario (con perfil)."""
+    return (
+        joinedload(Transaction.product).joinedload(Product.category),
+        joinedload(Transaction.user).joinedload(User.profile),
+    )
+
+async def get_transaction(db: AsyncSession, transaction_id: int) -> Optional[Transaction]:
+    result = await db.execute(
+        select(Transaction)
+        .options(*_read_options())
+        .where(Transaction.id == transaction_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
+
+async def get_transactions(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    product_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+) -> List[Transaction]:
+    query = select(Transaction).options(*_read_options())
+    if product_id:
+        query = query.where(Transaction.product_id == product_id)
+    if user_id:
+        query = query.where(Transaction.user_id == user_id)
+
+    result = await db.execute(query.order_by(desc(Transaction.timestamp)).offset(skip).limit(limit))
+    return list(result.scalars().all())
+
+async def stream_transactions(
+    db: AsyncSession,
+    *,
+    product_id: Optional[int] = None,
+    batch_size: int = 1000,
+) -> AsyncIterator[Sequence[Row]]:
+    """
+    Recorre las transacciones (más recientes primero) con un cursor de servidor, por lotes
+    de `batch_size` filas planas: pensado para exportaciones, sin cargar todo en memoria.
+    """
+    query = (
+        select(
+            Transaction.id, Transaction.timestamp, Transaction.product_id, Product.sku, Product.name,
+            Transaction.type, Transaction.quantity, Transaction.user_id, Transaction.reason,
+        )
+        .join(Product, Transaction.product_id == Product.id)
+        .order_by(desc(Transaction.timestamp))
+        .execution_options(yield_per=batch_size)
+    )
+    if product_id:
+        query = query.where(Transaction.product_id == product_id)
+
+    result = await db.stream(query)
+    async for rows in result.partitions():
+        yield rows
+
+async def get_daily_out_totals(
+    db: AsyncSession, *, owner_id: int, since: datetime, until: datetime
+) -> Sequence[Row]:
+    """
+    Salidas (OUT) por producto y día de todos los productos de un propietario entre `since`
+    (incluido) y `until` (excluido): filas (product_id, day, quantity), ya agregadas en la base.
+    """
+    day = func.date_trunc("day", Transaction.timestamp, type_=DateTime(timezone=True)).label("day")
+    result = await db.execute(
+        select(Transaction.product_id, day, func.sum(Transaction.quantity).label("quantity"))
+        .join(Product, Transaction.product_id == Product.id)
+        .where(
+            Product.owner_id == owner_id,
+            Transaction.type == TransactionType.OUT,
+            Transaction.timestamp >= since,
+            Transaction.timestamp < until,
+        )
+        .group_by(Transaction.product_id, day)
+    )
+    return result.all()
+
+async def create_transaction(db: AsyncSession, *, transaction_in: TransactionCreate, user_id: int) -> Transaction:
+    """
+    Crea una nueva transacción y actualiza el stock del producto asociado.
+    El producto se bloquea (SELECT ... FOR UPDATE) para que dos transacciones
+    concurrentes no pisen el stock.
+    """
+    # 1. Obtener (y bloquear) el producto
+    result = await db.execute(
+        select(Product).where(Product.id == transaction_in.product_id).with_for_update()
+    )
+    product = result.scalars().first()
+    if not product:
+        raise ValueError(f"Producto con id {transaction_in.product_id} no encontrado.")
+
+    # 2. Crear la transacción
+    db_transaction = Transaction(
+        **transaction_in.model_dump(),
+        user_id=user_id,
+        timestamp=func.now() # Asegura timestamp de DB
+    )
+
+    # 3. Actualizar el stock del producto (misma lógica que la versión síncrona)
+    if transaction_in.type == TransactionType.IN:
+        product.stock += transaction_in.quantity
+    elif transaction_in.type == TransactionType.OUT:
+        if product.stock < transaction_in.quantity:
+            error = f"Stock insuficiente para el producto {product.id} ({product.name}). Stock: {product.stock}, Requerido: {transaction_in.quantity}"
+            await db.rollback() # Libera el bloqueo del producto
+            raise ValueError(error)
+        product.stock -= transaction_in.quantity
+    elif transaction_in.type == TransactionType.ADJUSTMENT:
+        pass # Ajuste manual, no modifica stock aquí automáticamente
+
+    db.add(db_transaction)
+    db.add(product)
+    await db.commit()
+    # Recarga con producto/usuario para la respuesta (y el timestamp generado en DB)
+    return await get_transaction(db, transaction_id=db_transaction.id)
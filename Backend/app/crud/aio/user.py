@@ -0,0 +1,29 @@
+# app/crud/aio/user.py
+# Solo lectura: lo que necesitan la autenticación y los routers asíncronos.
+# Las escrituras de usuarios siguen en app/crud/user.py.
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, List
+
+from app.models.user import User
+
+async def get_user(db: AsyncSession, user_id: int) -> Optional[User]:
+    """Obtiene un usuario por su ID (con su perfil)."""
+    result = await db.execute(select(User).options(selectinload(User.profile)).where(User.id == user_id))
+    return result.scalars().first()
+
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+    """
+    Obtiene un usuario por su email. No carga el perfil: se usa en cada
+    petición autenticada y ahí solo importan id/is_active.
+    """
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
+
+async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[User]:
+    """Obtiene una lista de usuarios (con paginación)."""
+    result = await db.execute(
+        select(User).options(selectinload(User.profile)).order_by(User.id).offset(skip).limit(limit)
+    )
+    return list(result.scalars().all())
@@ -0,0 +1,113 @@
+# app/crud/email_outbox.py
+from sqlalchemy.orm import Session
+from sqlalchemy import select, update, func
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from app.models.email_outbox import EmailOutbox, EmailStatus
+
+def enqueue_email(
+    db: Session, *, recipient: str, subject: str, body: str, subtype: str = "html"
+) -> EmailOutbox:
+    """
+    Añade un email al outbox dentro de la transacción actual.
+    No hace commit: el email se envía solo si la transacción de la petición se confirma.
+    """
+    db_email = EmailOutbox(recipient=recipient, subject=subject, body=body, subtype=subtype)
+    db.add(db_email)
+    db.flush()
+    return db_email
+
+def fail_exhausted_emails(db: Session, *, max_attempts: int) -> int:
+    """
+    Marca como `failed` los emails pendientes que ya gastaron `max_attempts` intentos y
+    cuyo lease venció: el worker murió enviándolos (p. ej. un mensaje que lo tumba) y
+    no registró el resultado. No hace commit. Devuelve cuántos se marcaron.
+    """
+    result = db.execute(
+        update(EmailOutbox)
+        .where(
+            EmailOutbox.status == EmailStatus.pending,
+            EmailOutbox.attempts >= max_attempts,
+            EmailOutbox.next_attempt_at <= func.now(),
+        )
+        .values(
+            status=EmailStatus.failed,
+            last_error=func.coalesce(EmailOutbox.last_error, "Lease vencido sin resultado"),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+def claim_due_emails(db: Session, *, limit: int, lease_seconds: float, max_attempts: int) -> List[EmailOutbox]:
+    """
+    Reserva hasta `limit` emails pendientes cuyo próximo intento ya venció.
+    Usa FOR UPDATE SKIP LOCKED para que varios workers no tomen el mismo email,
+    y mueve `next_attempt_at` hacia adelante (lease) para que, si el worker muere
+    a mitad del envío, el email vuelva a estar disponible al expirar el lease.
+    Los que agotaron `max_attempts` no se reservan: pasan a `failed`.
+    """
+    fail_exhausted_emails(db, max_attempts=max_attempts)
+    due_ids = (
+        select(EmailOutbox.id)
+        .where(
+            EmailOutbox.status == EmailStatus.pending,
+            EmailOutbox.attempts < max_attempts,
+            EmailOutbox.next_attempt_at <= func.now(),
+        )
+        .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    stmt = (
+        update(EmailOutbox)
+        .where(EmailOutbox.id.in_(due_ids))
+        .values(
+            attempts=EmailOutbox.attempts + 1,
+            next_attempt_at=func.now() + timedelta(seconds=lease_seconds),
+        )
+        .returning(EmailOutbox)
+        .execution_options(synchronize_session=False)
+    )
+    emails = list(db.scalars(stmt).all())
+    # Desvincular antes del commit para que los objetos conserven sus datos
+    # (el commit expiraría los atributos y el worker los usa fuera de la sesión)
+    for email in emails:
+        db.expunge(email)
+    db.commit()
+    return emails
+
+def mark_sent(db: Session, *, email_ids: List[int]) -> None:
+    """Marca como enviados los emails indicados."""
+    if not email_ids:
+        return
+    db.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.id.in_(email_ids))
+        .values(status=EmailStatus.sent, sent_at=func.now(), last_error=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+def mark_failed(db: Session, *, email_id: int, error: str, retry_at: Optional[datetime]) -> None:
+    """
+    Registra un intento fallido. Si `retry_at` es None se agotaron los reintentos
+    y el email queda en estado `failed`.
+    """
+    values = {"last_error": error[:2000]}
+    if retry_at is None:
+        values["status"] = EmailStatus.failed
+    else:
+        values["next_attempt_at"] = retry_at
+    db.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.id == email_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+def count_pending(db: Session) -> int:
+    """Número de emails pendientes de envío (útil para monitoreo)."""
+    return db.query(func.count(EmailOutbox.id)).filter(EmailOutbox.status == EmailStatus.pending).scalar() or 0
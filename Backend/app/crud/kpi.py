@@ -4,6 +4,7 @@ from typing import Optional, List
 from decimal import Decimal
 
 from app.models.kpi import KPI, KpiCategoryDB, KpiTrendDB
+from app.models.kpi_history import KpiHistory
 from app.schemas.kpi import KpiCreate, KpiUpdate, KpiFilters
 
 def get_kpi(db: Session, kpi_id: int) -> Optional[KPI]:
@@ -59,6 +60,8 @@ def create_kpi(db: Session, *, kpi_in: KpiCreate, owner_id: Optional[int] = None
 
     db_kpi = KPI(**create_data)
     db.add(db_kpi)
+    db.flush() # Necesitamos el id para la primera muestra del histórico
+    db.add(KpiHistory(kpi_id=db_kpi.id, value=db_kpi.value))
     db.commit()
     db.refresh(db_kpi)
     return db_kpi
@@ -67,6 +70,10 @@ def update_kpi(db: Session, *, db_kpi: KPI, kpi_in: KpiUpdate) -> KPI:
     """Actualiza un KPI existente."""
     update_data = kpi_in.model_dump(exclude_unset=True)
 
+    # Guardar una muestra en el histórico solo si el valor cambia realmente
+    if update_data.get('value') is not None and update_data['value'] != db_kpi.value:
+        db.add(KpiHistory(kpi_id=db_kpi.id, value=update_data['value']))
+
     # Aquí se podría recalcular la tendencia si el valor cambia
     if 'value' in update_data and 'trend' not in update_data:
         # Lógica simple de ejemplo para recalcular tendencia:
@@ -1,5 +1,5 @@
 # app/crud/user.py
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from typing import Optional, Any
 
 from app.models.user import User
@@ -19,7 +19,8 @@ def get_user_by_email(db: Session, email: str) -> Optional[User]:
 
 def get_users(db: Session, skip: int = 0, limit: int = 100) -> list[User]:
     """Obtiene una lista de usuarios (con paginación)."""
-    return db.query(User).offset(skip).limit(limit).all()
+    # UserRead serializa el perfil: cargarlo en una sola consulta extra evita un N+1
+    return db.query(User).options(selectinload(User.profile)).order_by(User.id).offset(skip).limit(limit).all()
 
 def create_user(db: Session, *, user_in: UserCreate) -> User:
     """
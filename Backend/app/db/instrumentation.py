@@ -0,0 +1,82 @@
+# app/db/instrumentation.py
+# Contabiliza el tiempo de base de datos y el número de consultas de cada petición
+# mediante los eventos before/after_cursor_execute de SQLAlchemy.
+#
+# El middleware de métricas crea un RequestQueryStats por petición y lo deja en un
+# ContextVar; los endpoints síncronos corren en el threadpool con una copia del
+# contexto, así que acumulan sobre el mismo objeto.
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class RequestQueryStats:
+    __slots__ = ("query_count", "db_time", "inspection")
+
+    def __init__(self):
+        self.query_count = 0
+        self.db_time = 0.0 # segundos
+        # Detalle por consulta; solo lo rellena el inspector (app/db/query_inspector.py)
+        self.inspection = None
+
+
+_current_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def start_request_stats() -> RequestQueryStats:
+    """
+    Empieza a contabilizar consultas para la petición (contexto) actual.
+    Lo llama el middleware más externo; los internos usan `current_request_stats()`.
+    """
+    stats = RequestQueryStats()
+    _current_stats.set(stats)
+    return stats
+
+
+def current_request_stats() -> Optional[RequestQueryStats]:
+    return _current_stats.get()
+
+
+def _skip(conn) -> bool:
+    # Sin petición en curso, o el EXPLAIN del inspector de consultas (no es de la aplicación)
+    return _current_stats.get() is None or conn.info.get("query_inspector_explaining", False)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _skip(conn):
+        return
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _skip(conn):
+        return
+    stats = _current_stats.get()
+    start_times = conn.info.get("query_start_time")
+    if not start_times:
+        return
+    elapsed = time.perf_counter() - start_times.pop()
+    stats.query_count += 1
+    stats.db_time += elapsed
+    if stats.inspection is not None:
+        stats.inspection.record(conn, statement, parameters, elapsed)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    # La sentencia falló: after_cursor_execute no llega, se saca aquí su inicio para que
+    # no quede en la pila (descuadraría el tiempo de las siguientes consultas de la conexión)
+    conn = context.connection
+    if conn is None or _skip(conn):
+        return
+    stats = _current_stats.get()
+    start_times = conn.info.get("query_start_time")
+    if not start_times:
+        return
+    stats.query_count += 1
+    stats.db_time += time.perf_counter() - start_times.pop()
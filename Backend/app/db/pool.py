@@ -0,0 +1,245 @@
+# app/db/pool.py
+# Configuración e instrumentación del pool de conexiones de SQLAlchemy.
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+from uuid import uuid4
+
+from prometheus_client import Counter, Histogram
+from prometheus_client.core import GaugeMetricFamily, REGISTRY
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Tiempo esperando una conexión del pool (incluye abrir conexiones nuevas)",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+POOL_CHECKOUT_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts que agotaron DB_POOL_TIMEOUT sin obtener conexión",
+    ["engine"],
+)
+POOL_PING_FAILURES = Counter(
+    "db_pool_ping_failures_total",
+    "Conexiones descartadas por fallar el pre-ping",
+    ["engine"],
+)
+
+
+class _InstrumentedPoolMixin:
+    """Mide el tiempo de cada checkout del pool."""
+    metrics_name = "default"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            POOL_CHECKOUT_TIMEOUTS.labels(self.metrics_name).inc()
+            raise
+        finally:
+            POOL_CHECKOUT_WAIT.labels(self.metrics_name).observe(time.perf_counter() - start)
+
+    def recreate(self):
+        # engine.dispose() recrea el pool: conservar la etiqueta de métricas
+        new_pool = super().recreate()
+        new_pool.metrics_name = self.metrics_name
+        return new_pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(*, is_async: bool) -> Dict[str, Any]:
+    """Argumentos de create_engine/create_async_engine según la configuración."""
+    options: Dict[str, Any] = {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING == "always",
+    }
+    if is_async and settings.DB_PGBOUNCER:
+        # PgBouncer en modo transaction reparte las transacciones entre conexiones de
+        # servidor distintas: las sentencias preparadas con nombre fijo chocarían.
+        # Se desactivan las cachés y cada sentencia recibe un nombre único.
+        options["connect_args"] = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    return options
+
+
+# Motores registrados para el colector de métricas: nombre -> Engine (síncrono)
+_engines: Dict[str, Engine] = {}
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """
+    Etiqueta el pool del motor para las métricas y, si la estrategia es "idle",
+    instala el pre-ping solo para conexiones que estuvieron ociosas.
+    Para motores asíncronos se pasa `async_engine.sync_engine`.
+    """
+    engine.pool.metrics_name = name
+    _engines[name] = engine
+
+    if settings.DB_POOL_PRE_PING != "idle":
+        return
+
+    @event.listens_for(engine, "checkin")
+    def _record_checkin(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _ping_if_idle(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < settings.DB_POOL_PRE_PING_IDLE_SECONDS:
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("SELECT 1")
+        except Exception as e:
+            POOL_PING_FAILURES.labels(name).inc()
+            logger.warning(f"Pre-ping fallido en el pool '{name}', se descarta la conexión: {e}")
+            # El pool invalida la conexión y reintenta el checkout con otra nueva
+            raise exc.DisconnectionError() from e
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+
+
+class LazyEngines:
+    """
+    Motores síncrono y asíncrono de una misma base de datos, creados en el primer uso.
+
+    - Importar la aplicación no carga los drivers (psycopg2/asyncpg) ni crea pools.
+    - Con gunicorn --preload, `reset()` en cada worker tras el fork descarta los motores
+      del proceso maestro y cada worker crea los suyos: nunca se comparten conexiones.
+
+    Las fábricas de sesiones resuelven el motor en cada sesión (get_bind), así que se
+    pueden importar y guardar en cualquier módulo sin forzar la creación del motor.
+    """
+
+    def __init__(self, name: str, url: str, async_url: str):
+        self.name = name
+        self.url = url
+        self.async_url = async_url
+        self._sync_engine: Optional[Engine] = None
+        self._async_engine: Optional[AsyncEngine] = None
+        self._lock = threading.Lock()
+        engines = self
+
+        class _SyncSession(Session):
+            def get_bind(self, mapper=None, clause=None, **kw):
+                return engines.sync_engine
+
+        class _AsyncBackedSession(Session):
+            def get_bind(self, mapper=None, clause=None, **kw):
+                return engines.async_engine.sync_engine
+
+        self.SessionLocal = sessionmaker(class_=_SyncSession, autocommit=False, autoflush=False)
+        # expire_on_commit=False: los objetos siguen siendo legibles tras el commit sin
+        # disparar cargas implícitas (que en modo async lanzan MissingGreenlet)
+        self.AsyncSessionLocal = async_sessionmaker(
+            sync_session_class=_AsyncBackedSession, autoflush=False, expire_on_commit=False
+        )
+
+    @property
+    def created(self) -> bool:
+        return self._sync_engine is not None or self._async_engine is not None
+
+    @property
+    def sync_engine(self) -> Engine:
+        if self._sync_engine is None:
+            with self._lock:
+                if self._sync_engine is None:
+                    engine = create_engine(self.url, **engine_options(is_async=False))
+                    instrument_engine(engine, self.name)
+                    self._sync_engine = engine
+        return self._sync_engine
+
+    @property
+    def async_engine(self) -> AsyncEngine:
+        if self._async_engine is None:
+            with self._lock:
+                if self._async_engine is None:
+                    engine = create_async_engine(self.async_url, **engine_options(is_async=True))
+                    instrument_engine(engine.sync_engine, f"{self.name}_async")
+                    self._async_engine = engine
+        return self._async_engine
+
+    def reset(self) -> None:
+        """
+        Olvida los motores sin cerrar sus conexiones (close=False): es lo correcto en un
+        proceso hijo tras el fork, donde los sockets pertenecen al proceso padre.
+        """
+        if self._sync_engine is not None:
+            self._sync_engine.dispose(close=False)
+            _engines.pop(self.name, None)
+            self._sync_engine = None
+        if self._async_engine is not None:
+            self._async_engine.sync_engine.dispose(close=False)
+            _engines.pop(f"{self.name}_async", None)
+            self._async_engine = None
+
+    async def dispose(self) -> None:
+        """Cierra las conexiones de ambos pools (apagado ordenado)."""
+        if self._sync_engine is not None:
+            self._sync_engine.dispose()
+        if self._async_engine is not None:
+            await self._async_engine.dispose()
+
+
+def pool_status() -> Dict[str, Dict[str, int]]:
+    """Estado actual de cada pool registrado (también lo usan los health checks)."""
+    status = {}
+    for name, engine in _engines.items():
+        pool = engine.pool
+        if not isinstance(pool, QueuePool):
+            continue
+        status[name] = {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            # overflow() es negativo mientras el pool no se ha llenado
+            "overflow": max(pool.overflow(), 0),
+        }
+    return status
+
+
+class PoolCollector:
+    """Colector Prometheus que lee el estado de los pools en cada scrape."""
+
+    def collect(self):
+        families = {
+            "size": GaugeMetricFamily("db_pool_size", "Tamaño configurado del pool", labels=["engine"]),
+            "checked_out": GaugeMetricFamily("db_pool_checked_out", "Conexiones en uso", labels=["engine"]),
+            "idle": GaugeMetricFamily("db_pool_idle", "Conexiones libres en el pool", labels=["engine"]),
+            "overflow": GaugeMetricFamily("db_pool_overflow", "Conexiones abiertas por encima de pool_size", labels=["engine"]),
+        }
+        for name, values in pool_status().items():
+            for key, family in families.items():
+                family.add_metric([name], values[key])
+        yield from families.values()
+
+
+REGISTRY.register(PoolCollector())
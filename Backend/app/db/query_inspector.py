@@ -0,0 +1,212 @@
+# app/db/query_inspector.py
+# Inspector de consultas para desarrollo e instancias canary (QUERY_INSPECTOR_ENABLED).
+#
+# Por petición agrupa las consultas por "forma" (fingerprint: la sentencia sin valores),
+# señala los patrones N+1 (la misma forma repetida N_PLUS_ONE_THRESHOLD veces o más,
+# típico de una relación cargada de forma perezosa fila a fila) y las consultas más
+# lentas que SLOW_QUERY_MS, y registra su plan de ejecución (EXPLAIN).
+#
+# También incluye `assert_max_queries`, un helper para pruebas que falla si un bloque
+# (p. ej. una llamada con TestClient) ejecuta más consultas de las esperadas.
+import logging
+import re
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set
+
+from prometheus_client import Counter
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.db.instrumentation import current_request_stats, start_request_stats
+
+logger = logging.getLogger(__name__)
+
+N_PLUS_ONE_DETECTIONS = Counter(
+    "db_n_plus_one_detections_total", "Patrones N+1 detectados por el inspector", ["route"]
+)
+SLOW_QUERIES = Counter(
+    "db_slow_queries_total", "Consultas más lentas que SLOW_QUERY_MS", ["route"]
+)
+
+_PARAM_RE = re.compile(r"%\(\w+\)s|%s|\$\d+|:\w+|\?")
+_NUMBER_RE = re.compile(r"\b\d+(\.\d+)?\b")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_IN_LIST_RE = re.compile(r"\(\s*\?(\s*,\s*\?)*\s*\)")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """
+    Forma normalizada de una sentencia: sin parámetros ni literales y con las
+    listas IN (...) colapsadas, para que `WHERE id = 1` y `WHERE id = 2`
+    (o IN con distinto número de elementos) cuenten como la misma consulta.
+    """
+    normalized = _STRING_RE.sub("?", statement)
+    normalized = _PARAM_RE.sub("?", normalized)
+    normalized = _NUMBER_RE.sub("?", normalized)
+    normalized = _IN_LIST_RE.sub("(...)", normalized)
+    return _SPACES_RE.sub(" ", normalized).strip()
+
+
+class _QueryShape:
+    __slots__ = ("count", "total_time", "statement", "plan")
+
+    def __init__(self, statement):
+        self.count = 0
+        self.total_time = 0.0
+        self.statement = statement
+        self.plan: Optional[str] = None
+
+
+class QueryInspection:
+    """Consultas de una petición agrupadas por fingerprint."""
+
+    def __init__(self):
+        self.shapes: Dict[str, _QueryShape] = {}
+        self.slow: List[tuple] = [] # (elapsed, statement, plan)
+
+    def record(self, conn, statement: str, parameters, elapsed: float) -> None:
+        if conn.info.get("query_inspector_explaining"):
+            return # Es nuestro propio EXPLAIN
+        key = fingerprint(statement)
+        shape = self.shapes.get(key)
+        if shape is None:
+            shape = self.shapes[key] = _QueryShape(statement)
+        shape.count += 1
+        shape.total_time += elapsed
+        if shape.count == settings.N_PLUS_ONE_THRESHOLD:
+            # El plan se obtiene ahora, mientras la conexión sigue disponible
+            shape.plan = explain(conn, key, statement, parameters)
+        if elapsed * 1000 >= settings.SLOW_QUERY_MS:
+            self.slow.append((elapsed, statement, explain(conn, key, statement, parameters)))
+
+    def n_plus_one(self) -> List[_QueryShape]:
+        return [shape for shape in self.shapes.values() if shape.count >= settings.N_PLUS_ONE_THRESHOLD]
+
+
+# Fingerprints ya explicados en este proceso: un EXPLAIN por forma es suficiente
+_explained: Set[str] = set()
+
+
+def explain(conn, key: str, statement: str, parameters) -> Optional[str]:
+    """
+    Obtiene el plan de una consulta SELECT en la misma conexión (sin ANALYZE, no
+    la vuelve a ejecutar). Solo se hace una vez por fingerprint y por proceso.
+    """
+    if not settings.QUERY_INSPECTOR_EXPLAIN or key in _explained:
+        return None
+    if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+    _explained.add(key)
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    # Marca la conexión: ni el inspector ni las métricas de la petición cuentan el EXPLAIN
+    conn.info["query_inspector_explaining"] = True
+    try:
+        # En un SAVEPOINT: en PostgreSQL un EXPLAIN fallido abortaría la transacción de la petición
+        savepoint = conn.begin_nested() if conn.in_transaction() else None
+        try:
+            rows = conn.exec_driver_sql(prefix + statement, parameters).fetchall()
+        except Exception as e:
+            if savepoint is not None:
+                savepoint.rollback()
+            return f"(EXPLAIN falló: {e})"
+        if savepoint is not None:
+            savepoint.commit()
+        return "\n".join(" ".join(str(col) for col in row) for row in rows)
+    finally:
+        conn.info["query_inspector_explaining"] = False
+
+
+def report(inspection: QueryInspection, method: str, route: str) -> None:
+    """Registra en el log los N+1 y las consultas lentas de una petición."""
+    for shape in inspection.n_plus_one():
+        N_PLUS_ONE_DETECTIONS.labels(route).inc()
+        plan = shape.plan
+        logger.warning(
+            f"[Query Inspector] Posible N+1 en {method} {route}: {shape.count} consultas con la misma forma "
+            f"({shape.total_time * 1000:.1f} ms en total). ¿Falta un joinedload/selectinload?\n"
+            f"  SQL: {shape.statement}" + (f"\n  Plan:\n{plan}" if plan else "")
+        )
+    for elapsed, statement, plan in inspection.slow:
+        SLOW_QUERIES.labels(route).inc()
+        logger.warning(
+            f"[Query Inspector] Consulta lenta en {method} {route}: {elapsed * 1000:.1f} ms "
+            f"(umbral {settings.SLOW_QUERY_MS:.0f} ms)\n  SQL: {statement}"
+            + (f"\n  Plan:\n{plan}" if plan else "")
+        )
+
+
+class QueryInspectorMiddleware:
+    """
+    Middleware ASGI que activa la inspección durante cada petición y emite el
+    informe al terminar. Reutiliza las estadísticas del MetricsMiddleware si este
+    lo envuelve.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = current_request_stats() or start_request_stats()
+        stats.inspection = inspection = QueryInspection()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            stats.inspection = None
+            route = getattr(scope.get("route"), "path", None) or scope.get("path", "")
+            report(inspection, scope["method"], route)
+
+
+# --- Helper para pruebas ---
+
+class QueryCounter:
+    """Cuenta (y guarda) las sentencias ejecutadas mientras está activo."""
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryCounter]:
+    """
+    Cuenta las consultas de todos los motores durante el bloque, incluidas las
+    que se ejecutan en otros hilos (TestClient, threadpool de endpoints síncronos).
+    """
+    counter = QueryCounter()
+    event.listen(Engine, "after_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        event.remove(Engine, "after_cursor_execute", counter)
+
+
+@contextmanager
+def assert_max_queries(max_queries: int) -> Iterator[QueryCounter]:
+    """
+    Falla con AssertionError si el bloque ejecuta más de `max_queries` consultas.
+
+        with assert_max_queries(3):
+            client.get("/api/v1/inventory/products/", headers=auth_headers)
+    """
+    with count_queries() as counter:
+        yield counter
+    if counter.count > max_queries:
+        shapes: Dict[str, int] = {}
+        for statement in counter.statements:
+            key = fingerprint(statement)
+            shapes[key] = shapes.get(key, 0) + 1
+        detail = "\n".join(f"  {n}x {key}" for key, n in sorted(shapes.items(), key=lambda item: -item[1]))
+        raise AssertionError(f"Se ejecutaron {counter.count} consultas (máximo {max_queries}):\n{detail}")
@@ -0,0 +1,113 @@
+# app/db/replicas.py
+# Enrutado de lecturas a réplicas de PostgreSQL (streaming replication).
+#
+# Las réplicas se configuran con DATABASE_REPLICA_URLS. Una tarea de fondo comprueba
+# periódicamente cada réplica (conectividad y retraso de replicación); las sesiones de
+# solo lectura se reparten en round-robin entre las réplicas sanas y, si no hay
+# ninguna, se usa el primario. Para probarlo en local basta con dos instancias de
+# PostgreSQL (primario + standby creado con pg_basebackup -R) en puertos distintos.
+import asyncio
+import itertools
+import logging
+from typing import List, Optional
+
+from sqlalchemy import text
+
+from app.core.config import settings, to_async_database_url
+from app.core.tasks import PeriodicTask, register_background_task
+from app.db.pool import LazyEngines
+
+logger = logging.getLogger(__name__)
+
+# Retraso de replicación en segundos y si la réplica está recibiendo WAL del primario.
+# Si la réplica ya reprodujo todo lo recibido el retraso es 0 aunque el primario lleve rato
+# sin escribir (si no, now() - último replay crecería indefinidamente en un primario ocioso),
+# pero solo mientras el WAL receiver esté en streaming: desconectada, lo recibido y lo
+# reproducido también coinciden y la réplica se quedaría atrás sin que el retraso lo muestre.
+# Sin pg_read_all_stats, pg_stat_wal_receiver muestra el proceso pero no su estado: en ese
+# caso basta con que exista.
+REPLICA_LAG_QUERY = text("""
+    SELECT
+        CASE
+            WHEN NOT pg_is_in_recovery() THEN 0
+            WHEN w.streaming AND pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+        END AS lag,
+        NOT pg_is_in_recovery() OR coalesce(w.streaming, false) AS streaming
+    FROM (
+        SELECT bool_or(coalesce(status, 'streaming') = 'streaming') AS streaming FROM pg_stat_wal_receiver
+    ) w
+""")
+
+
+class Replica:
+    """Una réplica con sus motores (síncrono y asíncrono) y su último estado conocido."""
+
+    def __init__(self, index: int, url: str):
+        self.name = f"replica_{index}"
+        self.engines = LazyEngines(self.name, url, to_async_database_url(url))
+        self.SessionLocal = self.engines.SessionLocal
+        self.AsyncSessionLocal = self.engines.AsyncSessionLocal
+        # Hasta el primer chequeo no se considera sana: las lecturas van al primario
+        self.healthy = False
+        self.lag_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    async def check(self) -> None:
+        try:
+            async with asyncio.timeout(settings.REPLICA_HEALTH_CHECK_SECONDS):
+                async with self.engines.async_engine.connect() as conn:
+                    lag, streaming = (await conn.execute(REPLICA_LAG_QUERY)).one()
+        except Exception as e:
+            self._set_state(False, None, str(e))
+            return
+        if not streaming:
+            # WAL receiver parado o reconectando: no recibe cambios del primario
+            self._set_state(False, None if lag is None else float(lag), "WAL receiver not streaming")
+        elif lag is None:
+            # Nunca ha reproducido una transacción: estado desconocido
+            self._set_state(False, None, "replication lag unknown")
+        elif float(lag) > settings.REPLICA_MAX_LAG_SECONDS:
+            self._set_state(False, float(lag), f"lag {float(lag):.1f}s > {settings.REPLICA_MAX_LAG_SECONDS}s")
+        else:
+            self._set_state(True, float(lag), None)
+
+    def _set_state(self, healthy: bool, lag: Optional[float], error: Optional[str]) -> None:
+        if healthy != self.healthy:
+            if healthy:
+                logger.info(f"Réplica '{self.name}' disponible para lecturas (lag {lag:.2f}s).")
+            else:
+                logger.warning(f"Réplica '{self.name}' fuera de rotación: {error}")
+        self.healthy = healthy
+        self.lag_seconds = lag
+        self.last_error = error
+
+
+class ReplicaRouter:
+    """Reparte las sesiones de solo lectura entre las réplicas sanas (round-robin)."""
+
+    def __init__(self, urls: List[str]):
+        self.replicas = [Replica(i, url) for i, url in enumerate(urls)]
+        self._counter = itertools.count()
+
+    def pick(self) -> Optional[Replica]:
+        """Siguiente réplica sana, o None si hay que leer del primario."""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._counter) % len(healthy)]
+
+    async def check_health(self) -> None:
+        await asyncio.gather(*(replica.check() for replica in self.replicas))
+
+
+replica_router = ReplicaRouter(
+    [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+)
+
+if replica_router.replicas:
+    register_background_task(PeriodicTask(
+        name="replica-health",
+        func=replica_router.check_health,
+        interval=settings.REPLICA_HEALTH_CHECK_SECONDS,
+    ))
@@ -1,13 +1,39 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from fastapi import Depends
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 from app.core.config import settings
-from typing import Generator
+from app.db.pool import LazyEngines
+from app.db.replicas import replica_router
+from typing import Generator, AsyncGenerator
 
-# Crea el motor SQLAlchemy usando la URL de la base de datos desde la configuración
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+# Motores del primario: síncrono (psycopg2) para los routers `def` y asíncrono (asyncpg)
+# para los `async def`, que no bloquean el event loop ni dependen del threadpool.
+# Se crean en el primer uso (ver LazyEngines); tamaño del pool, timeouts y pre-ping
+# se configuran en Settings: DB_POOL_*
+primary = LazyEngines("primary", settings.DATABASE_URL, settings.ASYNC_DATABASE_URL)
 
-# Crea una fábrica de sesiones locales
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Fábricas de sesiones locales
+SessionLocal = primary.SessionLocal
+AsyncSessionLocal = primary.AsyncSessionLocal
+
+def get_engine() -> Engine:
+    return primary.sync_engine
+
+def get_async_engine() -> AsyncEngine:
+    return primary.async_engine
+
+def reset_engines() -> None:
+    """Descarta los motores heredados tras un fork (ver gunicorn.conf.py)."""
+    primary.reset()
+    for replica in replica_router.replicas:
+        replica.engines.reset()
+
+async def dispose_engines() -> None:
+    """Cierra todas las conexiones abiertas (apagado de la aplicación)."""
+    await primary.dispose()
+    for replica in replica_router.replicas:
+        await replica.engines.dispose()
 
 # Dependencia para obtener una sesión de base de datos en las rutas
 def get_db() -> Generator:
@@ -19,4 +45,47 @@ def get_db() -> Generator:
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Variante asíncrona de `get_db`: una AsyncSession por petición,
+    cerrada al terminar.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# --- Sesiones de solo lectura (réplicas) ---
+# Si no hay réplica sana se reutiliza la sesión del primario de la petición,
+# así no se abre una segunda conexión al primario para la misma petición.
+# Ojo: una réplica puede ir hasta REPLICA_MAX_LAG_SECONDS por detrás del primario.
+
+def get_read_db(db: Session = Depends(get_db)) -> Generator:
+    """Sesión síncrona de solo lectura: una réplica sana o, si no hay, el primario."""
+    replica = replica_router.pick()
+    if replica is None:
+        yield db
+        return
+    read_db = replica.SessionLocal()
+    try:
+        yield read_db
+    finally:
+        read_db.close()
+
+def open_async_read_session() -> AsyncSession:
+    """
+    Sesión asíncrona de solo lectura para usar fuera de las dependencias: las respuestas
+    en streaming siguen enviando datos después de que se cierren las sesiones de la petición.
+    Quien la abre debe cerrarla (`async with open_async_read_session() as db:`).
+    """
+    replica = replica_router.pick()
+    return (replica.AsyncSessionLocal if replica else AsyncSessionLocal)()
+
+async def get_async_read_db(db: AsyncSession = Depends(get_async_db)) -> AsyncGenerator[AsyncSession, None]:
+    """Variante asíncrona de `get_read_db`."""
+    replica = replica_router.pick()
+    if replica is None:
+        yield db
+        return
+    async with replica.AsyncSessionLocal() as read_db:
+        yield read_db
@@ -1,18 +1,46 @@
+import time
+_IMPORT_STARTED = time.perf_counter() # Para medir el arranque del worker (ver lifespan)
+
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
 
 from app.api.v1.api import api_router
+from app.api import health, metrics
 from app.core.config import settings
+from app.core.compression import CompressionMiddleware
+from app.core.idempotency import IdempotencyMiddleware
+from app.core.metrics import MetricsMiddleware
+from app.db.query_inspector import QueryInspectorMiddleware
+from app.core.tasks import start_background_tasks, stop_background_tasks
+from app.db.session import dispose_engines
+from app.services import email_outbox # Registra el worker del outbox de emails
+from app.services import ai_log_retention # Registra el mantenimiento de ai_logs (particiones, retención)
+from app.services.ai_client import close_http_client, open_http_client
+from app.services.ai_log_writer import ai_log_writer
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Arranca y detiene las tareas de fondo (outbox de emails, etc.) y los clientes compartidos."""
+    await open_http_client()
+    await start_background_tasks()
+    logger.info(f"Aplicación lista en {(time.perf_counter() - _IMPORT_STARTED) * 1000:.0f} ms desde la importación.")
+    yield
+    await stop_background_tasks()
+    await ai_log_writer.close() # Inserta los logs de IA que quedaran en cola
+    await close_http_client()
+    await dispose_engines()
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     description="API para el proyecto de tesis sobre trazabilidad de KPIs en la industria petrolera.",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # --- Configuración de CORS ---
@@ -44,17 +72,40 @@ if not allowed_origins:
 else:
     logger.info(f"Orígenes CORS permitidos: {allowed_origins}")
 
+# --- Idempotency-Key en las altas (reintentos de la app móvil) ---
+# Antes que CORS (queda dentro): las respuestas repetidas y los 409/422/400 que genera el
+# propio middleware también llevan las cabeceras CORS. Dentro de la compresión: guarda y
+# repite el cuerpo sin comprimir
+if settings.IDEMPOTENCY_ENABLED:
+    app.add_middleware(IdempotencyMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["Content-Disposition"]  # Importante para downloads
+    expose_headers=["Content-Disposition", "Idempotent-Replayed"]  # Importante para downloads
 )
 
+# --- Compresión de respuestas (gzip / brotli / zstd según Accept-Encoding) ---
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# --- Inspector de consultas (N+1 / consultas lentas), solo desarrollo o canary ---
+if settings.QUERY_INSPECTOR_ENABLED:
+    app.add_middleware(QueryInspectorMiddleware)
+
+# --- Métricas por ruta (latencia, errores, tiempo de DB) ---
+# Se añade al final para que envuelva a CORS y mida la petición completa
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # --- Incluir routers ---
 app.include_router(api_router, prefix=settings.API_V1_STR)
+app.include_router(health.router, tags=["Health"])
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router, tags=["Metrics"])
 
 @app.get("/", tags=["Root"], summary="Endpoint raíz de bienvenida")
 def read_root():
@@ -64,6 +115,8 @@ def read_root():
     """
     return {"message": f"Bienvenido a {settings.PROJECT_NAME} API"}
 
-# Comando para ejecutar:
+# Comando para ejecutar (desarrollo):
 # uvicorn app.main:app --reload --host 0.0.0.0 --port 8000
-# --host 0.0.0.0 permite conexiones desde otras máquinas en tu red local (útil para Expo Go)
\ No newline at end of file
+# --host 0.0.0.0 permite conexiones desde otras máquinas en tu red local (útil para Expo Go)
+# Producción (varios workers, precarga y reciclado; ver gunicorn.conf.py):
+# gunicorn -c gunicorn.conf.py app.main:app
\ No newline at end of file
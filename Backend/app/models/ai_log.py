@@ -1,5 +1,5 @@
 # app/models/ai_log.py
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, JSON
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Index, JSON, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import JSONB # Específico de PostgreSQL
 from sqlalchemy.sql import func
@@ -7,25 +7,49 @@ from app.db.base import Base
 import datetime
 
 class AiLog(Base):
+    # En PostgreSQL la tabla está particionada por mes (timestamp) y cada mes por feature_area
+    # (migración a4e8d2f6c9b1, ver app/services/ai_log_retention.py). Por eso allí la clave
+    # primaria es (id, timestamp, feature_area), las dos columnas de partición incluidas; para
+    # el ORM basta con id, que sigue saliendo de la secuencia.
     __tablename__ = "ai_logs"
 
     id = Column(Integer, primary_key=True, index=True)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    timestamp = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
     # Quién inició la interacción con la IA (puede ser nulo si es un proceso del sistema)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     # Área funcional donde se usó la IA
-    feature_area = Column(String, index=True, nullable=False, comment="Ej: InventoryRestock, KpiAnalysis, UserProfiling")
-    # Datos/Contexto proporcionado a la IA
+    feature_area = Column(String, nullable=False, comment="Ej: InventoryRestock, KpiAnalysis, UserProfiling")
+    # Datos/Contexto proporcionado a la IA (comprimido con lz4 en PostgreSQL 14+)
     input_data = Column(Text, nullable=True)
-    # Respuesta/Sugerencia generada por la IA
+    # Respuesta/Sugerencia generada por la IA (comprimido con lz4 en PostgreSQL 14+)
     output_data = Column(Text, nullable=True)
     # Razón o explicación de la decisión/sugerencia (si la IA la proporciona)
     decision_reason = Column(Text, nullable=True)
-    # Métricas de rendimiento de la IA para esta interacción (ej: confianza, tiempo)
+    # Métricas de rendimiento de la IA para esta interacción. Claves que rellena
+    # external_ai_service: latency_ms, prompt_tokens, completion_tokens, provider, cached,
+    # coalesced, streamed, error, error_type, rejected (ver /ai/logs/stats)
     metrics = Column(JSONB, nullable=True) # Usar JSONB en PostgreSQL
+    # Si input_data/output_data se movieron a un fichero de archivo: "ruta:línea" dentro de
+    # AI_LOG_ARCHIVE_DIR (ver ai_log_retention.load_archived_payload)
+    archive_ref = Column(String, nullable=True)
 
     # Relación con el usuario (opcional)
     user = relationship("User") # , back_populates="ai_logs" <- Añadir a User si se necesita
 
+    __table_args__ = (
+        # get_logs: WHERE user_id = ? / feature_area = ? ORDER BY timestamp DESC
+        Index("ix_ai_logs_user_id_timestamp", "user_id", "timestamp"),
+        Index("ix_ai_logs_feature_area_timestamp", "feature_area", "timestamp"),
+        # Filtros por contenido de metrics: metrics @> '{"error": true}', '{"provider": "openai"}'...
+        Index("ix_ai_logs_metrics", "metrics", postgresql_using="gin", postgresql_ops={"metrics": "jsonb_path_ops"}),
+        # Llamadas lentas: WHERE (metrics->>'latency_ms')::float >= ? (mismo CAST que en las consultas)
+        Index("ix_ai_logs_latency_ms", text("CAST(metrics ->> 'latency_ms' AS FLOAT)")),
+        # Errores recientes por área (índice parcial: solo las filas con error)
+        Index(
+            "ix_ai_logs_errors_feature_area_timestamp", "feature_area", "timestamp",
+            postgresql_where=text("metrics @> '{\"error\": true}'"),
+        ),
+    )
+
     def __repr__(self):
         return f"<AiLog(id={self.id}, feature_area='{self.feature_area}', timestamp='{self.timestamp}')>"
\ No newline at end of file
@@ -0,0 +1,27 @@
+# app/models/ai_suggestion_cache.py
+from sqlalchemy import Column, String, Text, LargeBinary, DateTime, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+class AiSuggestionCache(Base):
+    """
+    Sugerencias de IA ya calculadas, compartidas entre workers y reinicios
+    (persistencia opcional de la caché de app/services/ai_cache.py).
+    """
+    __tablename__ = "ai_suggestion_cache"
+
+    # sha256 de proveedor + modelo + feature + contexto normalizado + prompt
+    key_hash = Column(LargeBinary(32), primary_key=True)
+    feature_area = Column(String, nullable=False)
+    suggestion = Column(JSONB, nullable=True)
+    explanation = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_ai_suggestion_cache_expires_at", "expires_at"),
+    )
+
+    def __repr__(self):
+        return f"<AiSuggestionCache(feature_area='{self.feature_area}', expires_at='{self.expires_at}')>"
@@ -0,0 +1,39 @@
+# app/models/email_outbox.py
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index, Enum as DBEnum
+from sqlalchemy.sql import func
+from app.db.base import Base
+import enum
+
+class EmailStatus(str, enum.Enum):
+    pending = "pending"
+    sent = "sent"
+    failed = "failed" # Se agotaron los reintentos
+
+class EmailOutbox(Base):
+    """
+    Outbox transaccional de emails. Los endpoints solo insertan filas aquí
+    (en la misma transacción de la petición) y un worker en segundo plano
+    se encarga del envío SMTP con reintentos.
+    """
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    recipient = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    body = Column(Text, nullable=False)
+    subtype = Column(String, nullable=False, default="html") # "html" o "plain"
+    status = Column(DBEnum(EmailStatus, name="email_status_enum"), nullable=False, default=EmailStatus.pending)
+    attempts = Column(Integer, nullable=False, default=0)
+    # Momento a partir del cual el worker puede (re)intentar el envío
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # El worker busca siempre por estado pendiente y fecha de próximo intento
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    def __repr__(self):
+        return f"<EmailOutbox(id={self.id}, recipient='{self.recipient}', status='{self.status}')>"
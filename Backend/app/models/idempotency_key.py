@@ -0,0 +1,32 @@
+# app/models/idempotency_key.py
+from sqlalchemy import Column, Integer, SmallInteger, String, LargeBinary, DateTime, Index
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+class IdempotencyKey(Base):
+    """
+    Respuesta guardada para una cabecera Idempotency-Key (ver app/core/idempotency.py).
+    Se guardan hashes en lugar de la clave, el usuario y la petición para que la fila
+    ocupe poco y tenga tamaño fijo.
+    """
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True)
+    # sha256(usuario + clave): una misma clave de dos usuarios no colisiona
+    key_hash = Column(LargeBinary(32), nullable=False, unique=True)
+    # sha256(método + ruta + cuerpo): detecta una clave reutilizada con otra petición
+    request_hash = Column(LargeBinary(32), nullable=False)
+    # NULL mientras la petición original se está procesando
+    status_code = Column(SmallInteger, nullable=True)
+    content_type = Column(String, nullable=True)
+    response_body = Column(LargeBinary, nullable=True) # Comprimido con zlib
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        # La limpieza periódica borra por fecha de expiración
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
+
+    def __repr__(self):
+        return f"<IdempotencyKey(id={self.id}, status_code={self.status_code})>"
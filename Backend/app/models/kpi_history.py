@@ -0,0 +1,27 @@
+# app/models/kpi_history.py
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, Numeric
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class KpiHistory(Base):
+    """Muestra histórica del valor de un KPI (una fila por cada cambio de valor)."""
+    __tablename__ = "kpi_history"
+
+    id = Column(Integer, primary_key=True)
+    # ON DELETE CASCADE en la base: borrar un KPI no necesita cargar su histórico
+    kpi_id = Column(Integer, ForeignKey("kpis.id", ondelete="CASCADE"), nullable=False)
+    value = Column(Numeric(15, 5), nullable=False)
+    recorded_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    kpi = relationship("KPI")
+
+    __table_args__ = (
+        # Consultas típicas: serie de un KPI en un rango de fechas. Cubre `value`
+        # para que la serie salga con un index-only scan
+        Index("ix_kpi_history_kpi_id_recorded_at", "kpi_id", "recorded_at", postgresql_include=["value"]),
+    )
+
+    def __repr__(self):
+        return f"<KpiHistory(kpi_id={self.kpi_id}, value={self.value}, recorded_at='{self.recorded_at}')>"
@@ -1,5 +1,5 @@
 # app/models/product.py
-from sqlalchemy import Column, Integer, String, Text, Numeric, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Text, Numeric, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -19,7 +19,7 @@ class Product(Base):
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=True, index=True)
 
     # Clave foránea a Users (propietario del producto)
-    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False) # Indexado junto al id (ver __table_args__)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -33,5 +33,11 @@ class Product(Base):
     # Relación uno-a-muchos con Transactions
     transactions = relationship("Transaction", back_populates="product", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Listados del usuario: WHERE owner_id = ? [AND category_id = ?] ORDER BY id
+        Index("ix_products_owner_id_id", "owner_id", "id"),
+        Index("ix_products_owner_id_category_id_id", "owner_id", "category_id", "id"),
+    )
+
     def __repr__(self):
         return f"<Product(id={self.id}, name='{self.name}', stock={self.stock})>"
\ No newline at end of file
@@ -1,5 +1,5 @@
 # app/models/transaction.py
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Enum as DBEnum
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Index, Enum as DBEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -22,14 +22,21 @@ class Transaction(Base):
     timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
 
     # Clave foránea a Products
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False) # Indexado junto al timestamp
     # Clave foránea a Users (quién realizó la transacción)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True) # Nullable si puede ser automática
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True) # Nullable si puede ser automática
 
     # Relación inversa con Product
     product = relationship("Product", back_populates="transactions")
     # Relación inversa con User (opcional si no necesitas navegar desde User a Transactions)
     user = relationship("User") # , back_populates="transactions" <- Añadir a User model si se necesita
 
+    __table_args__ = (
+        # Historial de un producto/usuario: WHERE product_id = ? ORDER BY timestamp DESC
+        # (el índice se recorre hacia atrás, no hace falta declararlo DESC)
+        Index("ix_transactions_product_id_timestamp", "product_id", "timestamp"),
+        Index("ix_transactions_user_id_timestamp", "user_id", "timestamp"),
+    )
+
     def __repr__(self):
         return f"<Transaction(id={self.id}, type='{self.type}', product_id={self.product_id}, quantity={self.quantity})>"
\ No newline at end of file
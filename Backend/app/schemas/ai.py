@@ -19,6 +19,23 @@ class AiLogCreate(AiLogBase):
 class AiLogRead(AiLogBase):
     id: int
     timestamp: datetime.datetime
+    archive_ref: Optional[str] = None # input_data/output_data archivados fuera de la tabla
+
+    class Config:
+        from_attributes = True
+
+class AiLogStats(BaseModel):
+    """Uso de la IA de un área en un intervalo (ver GET /ai/logs/stats)."""
+    feature_area: str
+    bucket: datetime.datetime = Field(..., description="Inicio del intervalo.")
+    requests: int
+    errors: int
+    error_rate: float = Field(..., description="errors / requests (0-1).")
+    cached: int = Field(..., description="Respuestas servidas desde la caché.")
+    p50_latency_ms: Optional[float] = None
+    p95_latency_ms: Optional[float] = None
+    prompt_tokens: int
+    completion_tokens: int
 
     class Config:
         from_attributes = True
@@ -30,6 +47,10 @@ class AIContextInput(BaseModel):
     context: Dict[str, Any] = Field(..., example={"product_id": 1, "current_stock": 5, "sales_last_30d": 50})
     user_prompt: Optional[str] = Field(None, example="Sugiere cantidad óptima de reorden.")
 
+class AIEntityInput(BaseModel):
+    """Petición de IA sobre una entidad: el contexto lo construye el servidor."""
+    user_prompt: Optional[str] = Field(None, example="¿Cuánto debería reponer este mes?")
+
 class AISuggestion(BaseModel):
     """Schema genérico para la respuesta de una sugerencia de IA."""
     suggestion: Any = Field(..., example={"restock_quantity": 25, "confidence": 0.85})
@@ -6,11 +6,12 @@ from typing import Any, Union, Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from pydantic import ValidationError, EmailStr
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
-from fastapi import HTTPException # Importar HTTPException para errores de API
+from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.schemas.token import TokenData
+from app.crud import email_outbox as crud_email_outbox
+from app.models.email_outbox import EmailOutbox
 
 # Contexto para hashing de contraseñas usando bcrypt
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -20,31 +21,6 @@ SECRET_KEY = settings.SECRET_KEY
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 PASSWORD_RESET_TOKEN_EXPIRE_HOURS = 1
 
-# --- Configuración de Email para Brevo ---
-# Se inicializa fuera de una función para que sea accesible globalmente una vez
-fm: Optional[FastMail] = None
-
-# Solo inicializa FastMail si EMAILS_ENABLED es True
-if settings.EMAILS_ENABLED:
-    try:
-        email_conf = ConnectionConfig(
-            MAIL_USERNAME = settings.MAIL_USERNAME,
-            MAIL_PASSWORD = settings.MAIL_PASSWORD,
-            MAIL_FROM = settings.MAIL_FROM, # settings.MAIL_FROM ya es un EmailStr
-            MAIL_PORT = settings.MAIL_PORT,
-            MAIL_SERVER = settings.MAIL_SERVER,
-            MAIL_STARTTLS = settings.MAIL_STARTTLS,
-            MAIL_SSL_TLS = settings.MAIL_SSL_TLS,
-            USE_CREDENTIALS = settings.USE_CREDENTIALS,
-            VALIDATE_CERTS = settings.VALIDATE_CERTS
-        )
-        fm = FastMail(email_conf)
-        print("[Security Core] FastMail configurado exitosamente para Brevo.")
-    except Exception as e:
-        print(f"[Security Core] ERROR al configurar FastMail con Brevo: {e}. El envío de emails estará deshabilitado.")
-        fm = None # Asegúrate de que fm sea None si la configuración falla
-
-
 def create_access_token(
     subject: Union[str, Any], expires_delta: Optional[timedelta] = None
 ) -> str:
@@ -130,9 +106,12 @@ def decode_access_token(token: str) -> TokenData | None:
         print(f"[Security Core] Error decoding access token: {e}") # Log para depuración
         return None
 
-async def send_password_reset_email(email: str):
+def queue_password_reset_email(db: Session, email: str) -> EmailOutbox:
     """
-    Genera un token de reseteo y envía un email al usuario.
+    Genera un token de reseteo y deja el email en el outbox de la transacción actual.
+    El envío real (Brevo/SMTP) lo hace el worker de app/services/email_outbox.py,
+    así la latencia de la petición no depende del servidor SMTP.
+    El llamador debe hacer commit de la sesión.
     """
     password_reset_token = create_password_reset_token(email)
     # Construye la URL de reseteo que apuntará a tu frontend de React Native
@@ -153,28 +132,4 @@ async def send_password_reset_email(email: str):
     <p>El equipo de {settings.PROJECT_NAME}</p>
     """
 
-    # Lógica de Envío de Email con FastMail (Brevo)
-    if settings.EMAILS_ENABLED and fm: # Asegúrate de que fm se inicializó correctamente
-        message = MessageSchema(
-            subject=subject,
-            recipients=[email],
-            body=body,
-            subtype="html"
-        )
-        try:
-            await fm.send_message(message)
-            print(f"[Security Core] Email de reseteo enviado a {email} usando Brevo.")
-        except Exception as e:
-            print(f"[Security Core] ERROR al enviar email de reseteo a {email} con Brevo: {e}")
-            # Considera si quieres lanzar una excepción HTTP aquí o solo loggear el error
-            raise HTTPException(status_code=500, detail="No se pudo enviar el email de reseteo. Inténtalo de nuevo más tarde.")
-    else:
-        # Esto se ejecutará si EMAILS_ENABLED es False o si FastMail no se pudo inicializar
-        print("-" * 80)
-        print(f"[Security Core] SIMULANDO envío de email de reseteo a: {email}")
-        print(f"Asunto: {subject}")
-        print(f"URL de Reseteo (copiar y pegar en navegador): {reset_url}")
-        print(f"Token: {password_reset_token}")
-        print("NOTA: El envío de emails está deshabilitado o la configuración de FastMail falló.")
-        print("-" * 80)
-
+    return crud_email_outbox.enqueue_email(db, recipient=email, subject=subject, body=body, subtype="html")
@@ -0,0 +1,123 @@
+# app/services/ai_cache.py
+# Caché de sugerencias de IA delante de get_ai_suggestion. La clave es un hash canónico de
+# proveedor + modelo + feature + contexto normalizado + prompt: el mismo contexto enviado
+# con otro orden de claves, espacios o 5 vs 5.0 produce la misma clave.
+#
+# Dos niveles: LRU en memoria por worker (TTL) y, opcionalmente (AI_CACHE_PERSISTENT),
+# la tabla ai_suggestion_cache para compartir entre workers y sobrevivir reinicios.
+# Solo se guardan respuestas correctas; los errores del proveedor nunca se cachean.
+import decimal
+import hashlib
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, NamedTuple, Optional
+
+from prometheus_client import Counter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.tasks import PeriodicTask, register_background_task
+from app.crud.aio import ai_suggestion_cache as crud_ai_cache
+from app.db import session as db_session
+from app.services.ai_providers import get_provider
+
+logger = logging.getLogger(__name__)
+
+CLEANUP_BATCH_SIZE = 1000
+
+AI_CACHE_REQUESTS = Counter(
+    "ai_cache_requests_total", "Consultas a la caché de sugerencias de IA", ["result"] # hit_memory, hit_db, miss
+)
+
+
+class CachedSuggestion(NamedTuple):
+    suggestion: Any
+    explanation: Optional[str]
+    source: str # "memory" o "db"
+
+
+_memory = TTLCache(settings.AI_CACHE_MAX_ENTRIES, settings.AI_CACHE_TTL_SECONDS)
+
+
+def normalize(value: Any) -> Any:
+    """Forma canónica de un valor JSON para calcular la clave."""
+    if isinstance(value, dict):
+        return {str(k): normalize(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [normalize(v) for v in value]
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, bool) or value is None or isinstance(value, int):
+        return value
+    if isinstance(value, decimal.Decimal):
+        value = float(value)
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else value
+    return str(value)
+
+
+def cache_key(feature: str, context: Dict[str, Any], user_prompt: Optional[str]) -> bytes:
+    provider = get_provider()
+    payload = {
+        "provider": provider.name,
+        "model": provider.model,
+        "feature": feature.strip(),
+        "context": normalize(context),
+        "prompt": normalize(user_prompt) or None,
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).digest()
+
+
+async def lookup(db: AsyncSession, key: bytes) -> Optional[CachedSuggestion]:
+    cached = _memory.get(key)
+    if cached is not None:
+        AI_CACHE_REQUESTS.labels("hit_memory").inc()
+        return cached
+    if settings.AI_CACHE_PERSISTENT:
+        entry = await crud_ai_cache.get_entry(db, key_hash=key)
+        if entry is not None:
+            AI_CACHE_REQUESTS.labels("hit_db").inc()
+            expires_at = entry.expires_at if entry.expires_at.tzinfo else entry.expires_at.replace(tzinfo=timezone.utc)
+            remaining = (expires_at - datetime.now(timezone.utc)).total_seconds()
+            _memory.put(key, CachedSuggestion(entry.suggestion, entry.explanation, "memory"), ttl=remaining)
+            return CachedSuggestion(entry.suggestion, entry.explanation, "db")
+    AI_CACHE_REQUESTS.labels("miss").inc()
+    return None
+
+
+async def store(db: AsyncSession, key: bytes, feature: str, suggestion: Any, explanation: Optional[str]) -> None:
+    _memory.put(key, CachedSuggestion(suggestion, explanation, "memory"))
+    if not settings.AI_CACHE_PERSISTENT:
+        return
+    try:
+        await crud_ai_cache.save_entry(
+            db, key_hash=key, feature_area=feature, suggestion=suggestion, explanation=explanation,
+            ttl_seconds=settings.AI_CACHE_TTL_SECONDS,
+        )
+    except Exception as e:
+        # Un fallo de la caché no debe romper la sugerencia ya obtenida
+        await db.rollback()
+        logger.warning(f"No se pudo guardar la sugerencia de IA en caché: {e}")
+
+
+async def delete_expired_entries() -> None:
+    """Borra por lotes las entradas expiradas de la tabla (tarea periódica)."""
+    while True:
+        async with db_session.AsyncSessionLocal() as db:
+            deleted = await crud_ai_cache.delete_expired(db, limit=CLEANUP_BATCH_SIZE)
+        if deleted < CLEANUP_BATCH_SIZE:
+            break
+
+
+ai_cache_cleanup = PeriodicTask(
+    name="ai-cache-cleanup",
+    func=delete_expired_entries,
+    interval=max(settings.AI_CACHE_TTL_SECONDS, 60.0),
+    jitter=10.0,
+)
+
+if settings.AI_CACHE_ENABLED and settings.AI_CACHE_PERSISTENT:
+    register_background_task(ai_cache_cleanup)
@@ -0,0 +1,64 @@
+# app/services/ai_client.py
+# Cliente HTTP compartido para el proveedor de IA. Un único httpx.AsyncClient por
+# worker mantiene las conexiones abiertas (keep-alive, HTTP/2 si está disponible):
+# cada llamada reutiliza una conexión ya establecida y no paga DNS + TCP + TLS.
+#
+# Lo abre y lo cierra el lifespan de la app (app/main.py); fuera de la app (scripts,
+# benchmarks) se crea en el primer uso.
+import logging
+from typing import Optional
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _http2_available() -> bool:
+    try:
+        import h2 # noqa: F401 - lo usa httpx si está instalado
+    except ImportError:
+        return False
+    return True
+
+
+def default_timeout() -> httpx.Timeout:
+    return httpx.Timeout(settings.AI_TIMEOUT_SECONDS, connect=settings.AI_CONNECT_TIMEOUT_SECONDS)
+
+
+def create_http_client() -> httpx.AsyncClient:
+    http2 = settings.AI_HTTP2 and _http2_available()
+    if settings.AI_HTTP2 and not http2:
+        logger.warning("AI_HTTP2 activo pero el paquete 'h2' no está instalado: se usa HTTP/1.1.")
+    return httpx.AsyncClient(
+        http2=http2,
+        timeout=default_timeout(),
+        limits=httpx.Limits(
+            max_connections=settings.AI_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.AI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.AI_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Cliente compartido del worker actual."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_http_client()
+    return _client
+
+
+async def open_http_client() -> None:
+    get_http_client()
+
+
+async def close_http_client() -> None:
+    """Cierra las conexiones abiertas (apagado de la aplicación)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,117 @@
+# app/services/ai_context.py
+# Construcción del contexto de IA en el servidor. En lugar de que la app pida stock,
+# movimientos e histórico por separado y arme `context` ella misma, envía solo el área
+# (feature) y el id de la entidad; aquí se reúne todo con consultas agregadas (una por
+# entidad) y se guarda unos segundos por si se repite la pregunta.
+#
+# Cada área registra su constructor con @context_builder("Area"). Un constructor recibe
+# (db, entity_id, user_id) y devuelve el contexto, o None si la entidad no existe o no
+# es del usuario.
+import decimal
+import enum
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.crud.aio import kpi as crud_kpi
+from app.crud.aio import product as crud_product
+
+ContextBuilder = Callable[[AsyncSession, int, int], Awaitable[Optional[Dict[str, Any]]]]
+
+_builders: Dict[str, ContextBuilder] = {}
+_contexts = TTLCache(maxsize=4096, ttl=settings.AI_CONTEXT_CACHE_SECONDS)
+
+
+def context_builder(feature: str):
+    """Registra el constructor de contexto de un área funcional."""
+    def decorator(func: ContextBuilder) -> ContextBuilder:
+        _builders[feature] = func
+        return func
+    return decorator
+
+
+def available_features() -> List[str]:
+    return sorted(_builders)
+
+
+async def build_context(db: AsyncSession, feature: str, entity_id: int, user_id: int) -> Optional[Dict[str, Any]]:
+    """Contexto de `feature` para la entidad (KeyError si el área no tiene constructor)."""
+    builder = _builders[feature]
+    key = (feature, entity_id, user_id)
+    context = _contexts.get(key)
+    if context is None:
+        context = await builder(db, entity_id, user_id)
+        if context is not None:
+            _contexts.put(key, context, ttl=settings.AI_CONTEXT_CACHE_SECONDS)
+    return context
+
+
+def _plain(value: Any) -> Any:
+    # El contexto va al prompt y a la clave de caché: solo tipos JSON
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+@context_builder("InventoryRestock")
+async def product_context(db: AsyncSession, product_id: int, user_id: int) -> Optional[Dict[str, Any]]:
+    now = datetime.now(timezone.utc)
+    row = await crud_product.get_product_activity(db, product_id=product_id, owner_id=user_id, now=now)
+    if row is None:
+        return None
+    daily_out = row.out_30d / 30
+    return {
+        "product_id": row.id,
+        "name": row.name,
+        "sku": row.sku,
+        "category": row.category,
+        "current_stock": row.stock,
+        "price": _plain(row.price),
+        "sales_last_7d": _plain(row.out_7d),
+        "sales_last_30d": _plain(row.out_30d),
+        "sales_last_90d": _plain(row.out_90d),
+        "received_last_30d": _plain(row.in_30d),
+        "out_movements_last_90d": row.out_movements_90d,
+        "last_sale_at": _plain(row.last_out_at),
+        # Días que dura el stock actual al ritmo de salidas de los últimos 30 días
+        "days_of_cover": round(row.stock / daily_out, 1) if daily_out else None,
+    }
+
+
+@context_builder("KpiAnalysis")
+async def kpi_context(db: AsyncSession, kpi_id: int, user_id: int) -> Optional[Dict[str, Any]]:
+    days = settings.AI_CONTEXT_HISTORY_DAYS
+    row = await crud_kpi.get_kpi_stats(
+        db, kpi_id=kpi_id, owner_id=user_id, since=datetime.now(timezone.utc) - timedelta(days=days)
+    )
+    if row is None:
+        return None
+    value, target, first = _plain(row.value), _plain(row.target), _plain(row.first_value)
+    return {
+        "kpi_id": row.id,
+        "name": row.name,
+        "category": _plain(row.category),
+        "unit": row.unit,
+        "trend": _plain(row.trend),
+        "current_value": value,
+        "target": target,
+        "gap_to_target": round(target - value, 5) if target is not None else None,
+        "pct_of_target": round(value / target * 100, 2) if target else None,
+        "last_updated": _plain(row.last_updated),
+        "history": {
+            "days": days,
+            "samples": row.samples,
+            "min": _plain(row.min_value),
+            "max": _plain(row.max_value),
+            "mean": round(_plain(row.mean_value), 5) if row.mean_value is not None else None,
+            "stddev": round(_plain(row.stddev_value), 5) if row.stddev_value is not None else None,
+            "change_pct": round((value - first) / abs(first) * 100, 2) if first else None,
+        },
+    }
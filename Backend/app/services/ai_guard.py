@@ -0,0 +1,197 @@
+# app/services/ai_guard.py
+# Protección de la app frente a un proveedor de IA lento o caído. Por proveedor y worker:
+#
+# - Bulkhead: como mucho AI_MAX_CONCURRENCY llamadas a la vez y AI_MAX_QUEUE esperando
+#   turno; con la cola llena se rechaza al momento en lugar de acumular peticiones.
+# - Deadline: AI_DEADLINE_SECONDS para toda la llamada (espera en cola + proveedor).
+# - Circuit breaker: tras AI_BREAKER_FAILURE_THRESHOLD fallos seguidos se deja de llamar
+#   al proveedor durante AI_BREAKER_RESET_SECONDS (503 inmediato). Pasado ese tiempo se
+#   deja pasar una llamada de prueba (half-open): si va bien se cierra, si falla se reabre.
+#
+# Los rechazos se lanzan como AIUnavailableError; el endpoint responde 503 con Retry-After.
+import asyncio
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+import httpx
+from prometheus_client import Counter, Gauge
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+AI_GUARD_REJECTIONS = Counter(
+    "ai_guard_rejections_total", "Llamadas de IA respondidas con 503 por el guard",
+    ["provider", "reason"], # circuit_open, queue_full, deadline
+)
+AI_BREAKER_STATE = Gauge(
+    "ai_circuit_breaker_state", "Estado del circuit breaker (0 cerrado, 1 half-open, 2 abierto)",
+    ["provider"], multiprocess_mode="max",
+)
+
+
+class AIUnavailableError(Exception):
+    """El proveedor no está disponible ahora; reintentar pasados `retry_after` segundos."""
+
+    def __init__(self, reason: str, detail: str, retry_after: float = 1.0):
+        super().__init__(detail)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def is_failure(error: BaseException) -> bool:
+    """Errores que cuentan para abrir el circuito: red, timeouts, 5xx, 429 y respuestas ilegibles."""
+    if isinstance(error, httpx.HTTPStatusError):
+        status_code = error.response.status_code
+        return status_code >= 500 or status_code == 429
+    return not isinstance(error, (AIUnavailableError, asyncio.CancelledError))
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0 # time.monotonic()
+        self._probing = False
+
+    def _set_state(self, state: str) -> None:
+        if state != self.state:
+            logger.warning(f"Circuit breaker de IA '{self.name}': {self.state} -> {state}")
+            self.state = state
+            AI_BREAKER_STATE.labels(self.name).set(STATE_VALUES[state])
+
+    def check(self) -> None:
+        """Lanza AIUnavailableError si ahora no se dejaría pasar una llamada (sin reservar la de prueba)."""
+        if self.state == OPEN:
+            remaining = self.opened_at + self.reset_seconds - time.monotonic()
+            if remaining > 0:
+                raise AIUnavailableError("circuit_open", f"Proveedor de IA '{self.name}' no disponible.", remaining)
+        elif self.state == HALF_OPEN and self._probing:
+            # Ya hay una llamada de prueba en curso: el resto sigue recibiendo 503
+            raise AIUnavailableError("circuit_open", f"Proveedor de IA '{self.name}' en prueba.", 1.0)
+
+    def before_call(self) -> None:
+        """Como check(), y en half-open reserva la llamada de prueba."""
+        self.check()
+        if self.state == OPEN:
+            self._set_state(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            self._probing = True
+
+    def record_success(self) -> None:
+        self._probing = False
+        self.failures = 0
+        self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        self._probing = False
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self._set_state(OPEN)
+
+    def record_ignored(self) -> None:
+        # La llamada de prueba terminó sin dar información (cancelada, error del cliente)
+        self._probing = False
+
+
+class ProviderGuard:
+    def __init__(self, name: str):
+        self.name = name
+        self.breaker = CircuitBreaker(name, settings.AI_BREAKER_FAILURE_THRESHOLD, settings.AI_BREAKER_RESET_SECONDS)
+        self.max_concurrency = settings.AI_MAX_CONCURRENCY
+        self.max_queue = settings.AI_MAX_QUEUE
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.waiting = 0
+
+    def _reject(self, reason: str, detail: str, retry_after: float = 1.0) -> AIUnavailableError:
+        AI_GUARD_REJECTIONS.labels(self.name, reason).inc()
+        return AIUnavailableError(reason, detail, retry_after)
+
+    def check(self) -> None:
+        """Rechazo anticipado (p. ej. antes de abrir un stream) si el circuito está abierto."""
+        try:
+            self.breaker.check()
+        except AIUnavailableError as e:
+            AI_GUARD_REJECTIONS.labels(self.name, e.reason).inc()
+            raise
+
+    @asynccontextmanager
+    async def slot(self, deadline: Optional[float] = None) -> AsyncIterator[float]:
+        """
+        Turno para una llamada al proveedor: breaker y bulkhead. Devuelve los segundos que
+        quedan del deadline tras la espera en cola; el resultado del bloque (éxito, fallo,
+        timeout) actualiza el breaker.
+        """
+        deadline = settings.AI_DEADLINE_SECONDS if deadline is None else deadline
+        expires = time.monotonic() + deadline
+        try:
+            self.breaker.before_call()
+        except AIUnavailableError as e:
+            AI_GUARD_REJECTIONS.labels(self.name, e.reason).inc()
+            raise
+
+        try:
+            if self._semaphore.locked() and self.waiting >= self.max_queue:
+                raise self._reject("queue_full", "Demasiadas peticiones de IA en espera.")
+            self.waiting += 1
+            try:
+                async with asyncio.timeout(deadline):
+                    await self._semaphore.acquire()
+            except TimeoutError:
+                raise self._reject("deadline", "Tiempo de espera agotado en la cola de IA.") from None
+            finally:
+                self.waiting -= 1
+        except BaseException:
+            self.breaker.record_ignored()
+            raise
+
+        try:
+            yield expires - time.monotonic()
+        except (TimeoutError, httpx.TimeoutException):
+            # Proveedor demasiado lento: cuenta como fallo y se responde como rechazo
+            self.breaker.record_failure()
+            raise self._reject("deadline", "El proveedor de IA no respondió a tiempo.") from None
+        except BaseException as e:
+            if is_failure(e):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_ignored()
+            raise
+        else:
+            self.breaker.record_success()
+        finally:
+            self._semaphore.release()
+
+    async def call(self, func: Callable[[float], Awaitable[Any]], deadline: Optional[float] = None) -> Any:
+        """
+        Ejecuta `func(segundos_restantes)` dentro de un turno y con el deadline completo.
+        `func` recibe el tiempo que queda para usarlo como timeout de la petición HTTP.
+        """
+        async with self.slot(deadline) as remaining:
+            async with asyncio.timeout(remaining):
+                return await func(remaining)
+
+
+_guards: Dict[str, ProviderGuard] = {}
+
+
+def get_guard(provider_name: str) -> ProviderGuard:
+    guard = _guards.get(provider_name)
+    if guard is None:
+        guard = _guards[provider_name] = ProviderGuard(provider_name)
+        AI_BREAKER_STATE.labels(provider_name).set(STATE_VALUES[CLOSED])
+    return guard
+
+
+def retry_after_header(error: AIUnavailableError) -> Dict[str, str]:
+    return {"Retry-After": str(max(1, math.ceil(error.retry_after)))}
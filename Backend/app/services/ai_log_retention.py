@@ -0,0 +1,240 @@
+# app/services/ai_log_retention.py
+# Mantenimiento de ai_logs, la tabla que más crece (un registro con el contexto y la
+# respuesta completos por cada llamada a la IA). Solo PostgreSQL; tarea periódica que:
+#
+# - Crea por adelantado las particiones de los próximos AI_LOG_PARTITIONS_AHEAD meses, con
+#   una subpartición por cada área de AI_LOG_RETENTION_BY_FEATURE y otra para el resto.
+# - Vacía ai_logs_default: las filas de meses sin partición (p. ej. logs antiguos repuestos
+#   desde el fichero de respaldo, o la tarea estuvo parada) se pasan a su mes, que se crea;
+#   así también les llegan la retención y el archivo. Lo que no se pueda mover queda en el
+#   gauge ai_log_default_rows.
+# - Retención: borra (DROP TABLE) las subparticiones cuyo mes terminó hace más días que la
+#   retención de su área, y el mes cuando se queda vacío. Sin DELETE: no deja filas muertas
+#   ni hace falta VACUUM. La subpartición DEFAULT se guarda lo que pida el área más exigente
+#   de las que contiene (las áreas añadidas a la configuración después de crear el mes).
+# - Archivo: en los meses terminados hace más de AI_LOG_ARCHIVE_AFTER_DAYS, los input_data /
+#   output_data de AI_LOG_ARCHIVE_MIN_BYTES o más se escriben en ficheros JSONL comprimidos
+#   (gzip) en AI_LOG_ARCHIVE_DIR y la fila guarda solo archive_ref. Cada subpartición se
+#   procesa una vez y queda marcada; sus ficheros se borran con ella al vencer la retención.
+#
+# Con varios workers, un bloqueo consultivo hace que solo uno trabaje en cada momento.
+import asyncio
+import gzip
+import json
+import logging
+import os
+import shutil
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from prometheus_client import Counter, Gauge
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.tasks import PeriodicTask, register_background_task
+from app.crud.aio import ai_log_partitions as crud_partitions
+from app.crud.aio.ai_log_partitions import LeafPartition, next_month
+from app.db import session as db_session
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_BATCH_SIZE = 1000
+
+AI_LOG_MAINTENANCE = Counter(
+    "ai_log_maintenance_total", "Operaciones del mantenimiento de ai_logs",
+    ["action"], # partition_created, partition_dropped, payload_archived, default_rows_moved
+)
+AI_LOG_DEFAULT_ROWS = Gauge(
+    "ai_log_default_rows", "Filas de ai_logs_default que el mantenimiento no pudo pasar a su mes"
+)
+
+
+def feature_retention() -> Dict[str, int]:
+    """AI_LOG_RETENTION_BY_FEATURE como {área: días}."""
+    retention = {}
+    for item in settings.AI_LOG_RETENTION_BY_FEATURE.split(","):
+        feature, _, days = item.partition("=")
+        if feature.strip() and days.strip():
+            retention[feature.strip()] = int(days)
+    return retention
+
+
+def _longest(days: Iterable[int]) -> Optional[int]:
+    # None = sin límite (algún 0)
+    days = list(days)
+    return None if 0 in days else max(days)
+
+
+def leaf_retention_days(
+    leaf: LeafPartition, month_leaves: List[LeafPartition], default_days: int, by_feature: Dict[str, int]
+) -> Optional[int]:
+    """Días que se conserva una subpartición tras el fin de su mes (None = siempre)."""
+    if leaf.features is not None:
+        return _longest(by_feature.get(feature, default_days) for feature in leaf.features)
+    # DEFAULT: contiene también las áreas configuradas que no tienen subpartición en este mes
+    own = {feature for other in month_leaves if other.features for feature in other.features}
+    return _longest([default_days] + [days for feature, days in by_feature.items() if feature not in own])
+
+
+def expired_partitions(
+    partitions: Dict[date, List[LeafPartition]], now: datetime, default_days: int, by_feature: Dict[str, int]
+) -> Tuple[List[str], List[str]]:
+    """(subparticiones a borrar, meses que se quedan vacíos y también se borran)."""
+    leaves, months = [], []
+    for month, month_leaves in partitions.items():
+        end = datetime(next_month(month).year, next_month(month).month, 1, tzinfo=timezone.utc)
+        expired = [
+            leaf for leaf in month_leaves
+            if (days := leaf_retention_days(leaf, month_leaves, default_days, by_feature)) is not None
+            and end + timedelta(days=days) <= now
+        ]
+        leaves.extend(leaf.name for leaf in expired)
+        if end <= now and len(expired) == len(month_leaves):
+            months.append(crud_partitions.month_partition_name(month))
+    return leaves, months
+
+
+# --- Ficheros de archivo ---
+
+def _archive_path(ref_path: str) -> str:
+    return os.path.join(settings.AI_LOG_ARCHIVE_DIR, ref_path)
+
+
+def write_archive(partition: str, rows: List[Any]) -> List[Tuple[int, datetime, str]]:
+    """Escribe `rows` en un fichero gzip JSONL (atómico, con fsync) y devuelve (id, timestamp, archive_ref)."""
+    ref_path = f"{partition}/{rows[0].id}-{rows[-1].id}.jsonl.gz"
+    path = _archive_path(ref_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb") as f:
+            for row in rows:
+                line = {"id": row.id, "input_data": row.input_data, "output_data": row.output_data}
+                f.write((json.dumps(line, ensure_ascii=False) + "\n").encode("utf-8"))
+        raw.flush()
+        os.fsync(raw.fileno())
+    # Mismo nombre para el mismo lote: un reintento tras un fallo lo sobrescribe
+    os.replace(path + ".tmp", path)
+    return [(row.id, row.timestamp, f"{ref_path}:{line_no}") for line_no, row in enumerate(rows, start=1)]
+
+
+def load_archived_payload(archive_ref: str) -> Dict[str, Optional[str]]:
+    """{"input_data", "output_data"} de un log archivado (archive_ref = "ruta:línea")."""
+    ref_path, _, line_no = archive_ref.rpartition(":")
+    with gzip.open(_archive_path(ref_path), "rt", encoding="utf-8") as f:
+        for current, line in enumerate(f, start=1):
+            if current == int(line_no):
+                payload = json.loads(line)
+                return {"input_data": payload["input_data"], "output_data": payload["output_data"]}
+    raise KeyError(archive_ref)
+
+
+# --- Tarea de mantenimiento ---
+
+async def ensure_partitions(db: AsyncSession, partitions: Dict[date, List[LeafPartition]], today: date) -> None:
+    month = today.replace(day=1)
+    features = list(feature_retention())
+    for _ in range(settings.AI_LOG_PARTITIONS_AHEAD + 1):
+        if month not in partitions:
+            name = crud_partitions.month_partition_name(month)
+            try:
+                async with db.begin_nested():
+                    await crud_partitions.create_month_partition(db, month, features)
+                AI_LOG_MAINTENANCE.labels("partition_created").inc()
+                logger.info(f"Partición de ai_logs creada: {name}")
+            except Exception as e:
+                logger.error(f"No se pudo crear la partición de ai_logs {name}: {e}")
+        month = next_month(month)
+
+
+async def empty_default(db: AsyncSession) -> None:
+    """Pasa las filas de ai_logs_default a su mes, que se crea."""
+    features = list(feature_retention())
+    left = 0
+    for month, rows in sorted((await crud_partitions.get_default_months(db)).items()):
+        name = crud_partitions.month_partition_name(month)
+        try:
+            async with db.begin_nested():
+                moved = await crud_partitions.move_default_rows(db, month, features)
+        except Exception as e:
+            left += rows
+            logger.error(f"No se pudieron pasar {rows} fila(s) de ai_logs_default a {name}: {e}")
+            continue
+        AI_LOG_MAINTENANCE.labels("partition_created").inc()
+        AI_LOG_MAINTENANCE.labels("default_rows_moved").inc(moved)
+        logger.warning(f"{moved} fila(s) de ai_logs_default pasadas a la nueva partición {name}")
+    AI_LOG_DEFAULT_ROWS.set(left)
+
+
+async def drop_expired(db: AsyncSession, partitions: Dict[date, List[LeafPartition]], now: datetime) -> List[str]:
+    if settings.AI_LOG_RETENTION_DAYS == 0 and not feature_retention():
+        return []
+    leaves, months = expired_partitions(partitions, now, settings.AI_LOG_RETENTION_DAYS, feature_retention())
+    for name in leaves + months:
+        await crud_partitions.drop_partition(db, name)
+        AI_LOG_MAINTENANCE.labels("partition_dropped").inc()
+        logger.info(f"Partición de ai_logs borrada por retención: {name}")
+    return leaves
+
+
+async def archive_partition(leaf: str) -> bool:
+    """Archiva los payloads de una subpartición por lotes. False si otro worker tiene el bloqueo."""
+    after_id = 0
+    while True:
+        async with db_session.AsyncSessionLocal() as db:
+            if not await crud_partitions.try_maintenance_lock(db):
+                return False
+            rows = await crud_partitions.get_archivable_logs(
+                db, partition=leaf, min_bytes=settings.AI_LOG_ARCHIVE_MIN_BYTES, after_id=after_id,
+                limit=ARCHIVE_BATCH_SIZE,
+            )
+            if rows:
+                # Primero el fichero, después la fila: un fallo entre medias deja el payload en la tabla
+                refs = await asyncio.to_thread(write_archive, leaf, rows)
+                await crud_partitions.set_archive_refs(db, refs)
+                after_id = rows[-1].id
+            if len(rows) < ARCHIVE_BATCH_SIZE:
+                await crud_partitions.mark_archived(db, leaf)
+            await db.commit()
+        if rows:
+            AI_LOG_MAINTENANCE.labels("payload_archived").inc(len(rows))
+        if len(rows) < ARCHIVE_BATCH_SIZE:
+            return True
+
+
+async def run_maintenance() -> None:
+    now = datetime.now(timezone.utc)
+    async with db_session.AsyncSessionLocal() as db:
+        if db.bind.dialect.name != "postgresql" or not await crud_partitions.is_partitioned(db):
+            return
+        if not await crud_partitions.try_maintenance_lock(db):
+            return # Otro worker está en ello
+        await empty_default(db) # Antes de listar: puede crear meses
+        partitions = await crud_partitions.list_partitions(db)
+        await ensure_partitions(db, partitions, now.date())
+        dropped = await drop_expired(db, partitions, now)
+        await db.commit()
+    for leaf in dropped:
+        await asyncio.to_thread(shutil.rmtree, _archive_path(leaf), ignore_errors=True)
+
+    if settings.AI_LOG_ARCHIVE_AFTER_DAYS <= 0:
+        return
+    cutoff = now - timedelta(days=settings.AI_LOG_ARCHIVE_AFTER_DAYS)
+    for month, leaves in sorted(partitions.items()):
+        end = next_month(month)
+        if datetime(end.year, end.month, 1, tzinfo=timezone.utc) > cutoff:
+            break
+        for leaf in leaves:
+            if not leaf.archived and leaf.name not in dropped:
+                if not await archive_partition(leaf.name):
+                    return
+
+
+ai_log_maintenance = PeriodicTask(
+    name="ai-log-maintenance",
+    func=run_maintenance,
+    interval=settings.AI_LOG_MAINTENANCE_SECONDS,
+    jitter=60.0,
+)
+
+if settings.AI_LOG_MAINTENANCE_ENABLED:
+    register_background_task(ai_log_maintenance)
@@ -0,0 +1,204 @@
+# app/services/ai_log_writer.py
+# Escritura de ai_logs fuera del camino de la petición. La petición solo encola el log
+# (y obtiene su ID, reservado de antemano de la secuencia); una tarea de fondo lo inserta
+# junto con los demás en una sentencia multi-fila cada AI_LOG_BATCH_SIZE registros o cada
+# AI_LOG_FLUSH_INTERVAL_MS, lo que ocurra antes.
+#
+# - Cola acotada: si se llena, la petición espera como mucho AI_LOG_ENQUEUE_TIMEOUT_SECONDS
+#   (backpressure) y después el log se escribe en el fichero de respaldo. Nunca se descarta.
+# - Base caída: el lote fallido va al fichero de respaldo (JSONL, con fsync) y se reinserta
+#   en cuanto la base vuelve; los IDs reservados evitan duplicados en el reintento.
+# - Apagado: el lifespan vacía la cola antes de cerrar los pools.
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional
+
+from prometheus_client import Counter
+from sqlalchemy import exc
+
+from app.core.config import settings
+from app.core.tasks import PeriodicTask, register_background_task
+from app.crud.aio import ai_log as crud_ai_log
+from app.db import session as db_session
+from app.schemas.ai import AiLogCreate
+
+logger = logging.getLogger(__name__)
+
+# Tras un fallo al reservar IDs no se reintenta hasta pasado este tiempo
+ID_RETRY_SECONDS = 5.0
+
+AI_LOG_RECORDS = Counter(
+    "ai_log_records_total", "Logs de IA por destino", ["outcome"] # queued, inserted, fallback, replayed
+)
+
+
+def _is_data_error(e: Exception) -> bool:
+    """True si la base rechaza las filas (no un fallo de conexión que se resuelva reintentando)."""
+    if isinstance(e, (exc.IntegrityError, exc.DataError)):
+        return True
+    return isinstance(e, exc.StatementError) and not isinstance(e, exc.DBAPIError)
+
+
+class LogIdAllocator:
+    """Reserva IDs de ai_logs por bloques para devolver log_id sin esperar al INSERT."""
+
+    def __init__(self, block_size: int):
+        self.block_size = block_size
+        self._ids: Deque[int] = deque()
+        self._lock = asyncio.Lock()
+        self._retry_at = 0.0
+
+    async def next_id(self) -> Optional[int]:
+        if not self._ids and time.monotonic() >= self._retry_at:
+            async with self._lock:
+                if not self._ids:
+                    await self._refill()
+        return self._ids.popleft() if self._ids else None
+
+    async def _refill(self) -> None:
+        try:
+            async with db_session.AsyncSessionLocal() as db:
+                self._ids.extend(await crud_ai_log.allocate_log_ids(db, count=self.block_size))
+        except Exception as e:
+            # Sin IDs reservados el log se inserta igual y la base asigna el ID
+            self._retry_at = time.monotonic() + ID_RETRY_SECONDS
+            logger.warning(f"No se pudieron reservar IDs de ai_logs: {e}")
+
+
+class AiLogWriter:
+    def __init__(self):
+        self._queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=settings.AI_LOG_QUEUE_SIZE)
+        self._ids = LogIdAllocator(settings.AI_LOG_ID_BLOCK_SIZE)
+        self._file_lock = threading.Lock()
+        self.fallback_path = settings.AI_LOG_FALLBACK_PATH
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    async def submit(self, log_in: AiLogCreate) -> Optional[int]:
+        """Encola un log y devuelve su ID (None si no se pudo reservar)."""
+        row = log_in.model_dump()
+        row["timestamp"] = datetime.now(timezone.utc) # Momento de la interacción, no del INSERT
+        log_id = await self._ids.next_id()
+        if log_id is not None:
+            row["id"] = log_id
+        try:
+            await asyncio.wait_for(self._queue.put(row), timeout=settings.AI_LOG_ENQUEUE_TIMEOUT_SECONDS)
+            AI_LOG_RECORDS.labels("queued").inc()
+        except asyncio.TimeoutError:
+            logger.warning("Cola de ai_logs llena: el log se guarda en el fichero de respaldo.")
+            await self._write_fallback([row])
+        if self._queue.qsize() >= settings.AI_LOG_BATCH_SIZE:
+            ai_log_flusher.wake()
+        return log_id
+
+    async def flush(self) -> None:
+        """Inserta todo lo encolado por lotes (tarea periódica y apagado)."""
+        await self._replay_fallback()
+        while not self._queue.empty():
+            batch = [self._queue.get_nowait() for _ in range(min(settings.AI_LOG_BATCH_SIZE, self._queue.qsize()))]
+            try:
+                async with db_session.AsyncSessionLocal() as db:
+                    await crud_ai_log.create_logs(db, rows=batch)
+            except Exception as e:
+                # La base no responde: este lote y lo que quede en cola van al fichero
+                while not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                logger.error(f"No se pudieron insertar {len(batch)} log(s) de IA, se guardan en {self.fallback_path}: {e}")
+                await self._write_fallback(batch)
+                return
+            AI_LOG_RECORDS.labels("inserted").inc(len(batch))
+
+    async def close(self) -> None:
+        await self.flush()
+
+    # --- Fichero de respaldo ---
+
+    async def _write_fallback(self, rows: List[Dict[str, Any]]) -> None:
+        await asyncio.to_thread(self._append_lines, rows)
+        AI_LOG_RECORDS.labels("fallback").inc(len(rows))
+
+    def _append_lines(self, rows: List[Dict[str, Any]]) -> None:
+        with self._file_lock, open(self.fallback_path, "a", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row, default=str, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def _replay_fallback(self) -> None:
+        replaying = self.fallback_path + ".replaying"
+        if not os.path.exists(replaying):
+            if not os.path.exists(self.fallback_path):
+                return
+            # Se aparta el fichero: lo que falle mientras tanto se escribe en uno nuevo
+            with self._file_lock:
+                os.replace(self.fallback_path, replaying)
+        rows = await asyncio.to_thread(self._read_lines, replaying)
+        done = 0
+        try:
+            async with db_session.AsyncSessionLocal() as db:
+                for start in range(0, len(rows), settings.AI_LOG_BATCH_SIZE):
+                    await crud_ai_log.create_logs(
+                        db, rows=rows[start:start + settings.AI_LOG_BATCH_SIZE], ignore_conflicts=True
+                    )
+                    done = start + settings.AI_LOG_BATCH_SIZE
+        except Exception as e:
+            if _is_data_error(e):
+                # Reintentar no lo arregla: se aparta el fichero para no bloquear los siguientes
+                rejected = f"{replaying}.rejected-{int(time.time())}"
+                logger.error(f"Logs de IA de respaldo rechazados por la base, se dejan en {rejected}: {e}")
+                os.replace(replaying, rejected)
+            else:
+                logger.warning(f"La base sigue sin aceptar los logs de IA de respaldo: {e}")
+                if done:
+                    # Los lotes ya confirmados no se repiten (los logs sin ID reservado se duplicarían)
+                    await asyncio.to_thread(self._rewrite_lines, replaying, rows[done:])
+            return
+        os.remove(replaying)
+        AI_LOG_RECORDS.labels("replayed").inc(len(rows))
+        logger.info(f"{len(rows)} log(s) de IA recuperados del fichero de respaldo.")
+
+    @staticmethod
+    def _rewrite_lines(path: str, rows: List[Dict[str, Any]]) -> None:
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row, default=str, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+
+    @staticmethod
+    def _read_lines(path: str) -> List[Dict[str, Any]]:
+        rows = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    # Línea truncada por una caída a mitad de escritura
+                    logger.warning(f"Línea inválida en {path}, se ignora: {line[:200]!r}")
+                    continue
+                row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+                rows.append(row)
+        return rows
+
+
+ai_log_writer = AiLogWriter()
+
+ai_log_flusher = PeriodicTask(
+    name="ai-log-writer",
+    func=ai_log_writer.flush,
+    interval=settings.AI_LOG_FLUSH_INTERVAL_MS / 1000,
+)
+
+if settings.AI_LOG_BUFFERED:
+    register_background_task(ai_log_flusher)
@@ -0,0 +1,236 @@
+# app/services/ai_providers.py
+# Adaptadores de proveedores de IA. Cada adaptador sabe construir la petición HTTP de
+# su API y extraer la sugerencia de la respuesta; el resto de la app solo usa
+# `get_provider().suggest(...)`. Todos comparten el cliente HTTP de app/services/ai_client.py.
+#
+# Se pide al modelo que responda con un JSON {"suggestion": {...}, "explanation": "..."}.
+# `stream(...)` devuelve ese mismo texto por fragmentos a medida que el modelo lo genera
+# (Server-Sent Events del proveedor); quien lo consume lo une y lo interpreta al final.
+import asyncio
+import json
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.services.ai_client import default_timeout, get_http_client
+
+SYSTEM_PROMPT = (
+    "Eres un asistente de gestión de inventario y KPIs para la industria petrolera. "
+    "Responde solo con un objeto JSON con las claves \"suggestion\" (objeto con la recomendación) "
+    "y \"explanation\" (texto breve que justifique la recomendación)."
+)
+
+
+class AIProviderError(Exception):
+    """El proveedor respondió, pero con algo que no se puede interpretar."""
+
+
+@dataclass
+class ProviderResult:
+    suggestion: Any
+    explanation: Optional[str]
+    # Tokens consumidos según el proveedor (prompt_tokens, completion_tokens)
+    usage: Dict[str, int] = field(default_factory=dict)
+
+
+def build_prompt(feature: str, context: Dict[str, Any], user_prompt: Optional[str]) -> str:
+    prompt = f"Área: {feature}\nContexto: {json.dumps(context, ensure_ascii=False, sort_keys=True, default=str)}"
+    if user_prompt:
+        prompt += f"\nPetición del usuario: {user_prompt}"
+    return prompt
+
+
+def parse_content(content: str) -> Tuple[Any, Optional[str]]:
+    """Extrae (suggestion, explanation) del texto JSON devuelto por el modelo."""
+    try:
+        data = json.loads(content)
+    except (TypeError, ValueError):
+        # El modelo no respetó el formato: se devuelve el texto tal cual
+        return {"text": content}, None
+    if not isinstance(data, dict):
+        return data, None
+    return data.get("suggestion", data), data.get("explanation")
+
+
+class AIProvider:
+    name = "base"
+    default_base_url = ""
+
+    def __init__(self, base_url: str = "", api_key: str = "", model: str = ""):
+        self.base_url = (base_url or self.default_base_url).rstrip("/")
+        self.api_key = api_key
+        self.model = model
+
+    def build_request(self, prompt: str) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+        """(url, cabeceras, cuerpo JSON) de la llamada."""
+        raise NotImplementedError
+
+    def parse_response(self, data: Dict[str, Any]) -> ProviderResult:
+        raise NotImplementedError
+
+    def build_stream_request(self, prompt: str) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+        """Como build_request, pero pidiendo la respuesta en streaming (SSE)."""
+        raise NotImplementedError
+
+    def parse_stream_event(self, data: Dict[str, Any]) -> Tuple[str, Dict[str, int]]:
+        """(texto nuevo, uso de tokens si el evento lo trae) de un evento del stream."""
+        raise NotImplementedError
+
+    async def suggest(
+        self, feature: str, context: Dict[str, Any], user_prompt: Optional[str] = None, timeout: Optional[float] = None
+    ) -> ProviderResult:
+        url, headers, body = self.build_request(build_prompt(feature, context, user_prompt))
+        response = await get_http_client().post(
+            url, headers=headers, json=body,
+            timeout=default_timeout() if timeout is None else timeout,
+        )
+        response.raise_for_status()
+        try:
+            return self.parse_response(response.json())
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            raise AIProviderError(f"Respuesta inesperada de {self.name}: {e}") from e
+
+    async def stream(
+        self, feature: str, context: Dict[str, Any], user_prompt: Optional[str] = None,
+        timeout: Optional[float] = None, usage: Optional[Dict[str, int]] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Fragmentos de texto de la respuesta según llegan. `timeout` limita cada lectura;
+        si se pasa `usage`, se rellena con los tokens que informe el proveedor al final.
+        Al cerrar el generador antes de terminar se cierra la conexión con el proveedor.
+        """
+        url, headers, body = self.build_stream_request(build_prompt(feature, context, user_prompt))
+        async with get_http_client().stream(
+            "POST", url, headers=headers, json=body,
+            timeout=default_timeout() if timeout is None else timeout,
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                payload = line[len("data:"):].strip()
+                if payload == "[DONE]":
+                    break
+                try:
+                    text, event_usage = self.parse_stream_event(json.loads(payload))
+                except (KeyError, IndexError, TypeError, ValueError) as e:
+                    raise AIProviderError(f"Evento de stream inesperado de {self.name}: {e}") from e
+                if event_usage and usage is not None:
+                    usage.update(event_usage)
+                if text:
+                    yield text
+
+
+class OpenAIProvider(AIProvider):
+    """API de chat completions de OpenAI (o cualquier servidor compatible)."""
+    name = "openai"
+    default_base_url = "https://api.openai.com/v1"
+
+    def build_request(self, prompt):
+        # Sin clave (servidores locales compatibles) no se envía la cabecera
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        body = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ],
+            "response_format": {"type": "json_object"},
+        }
+        return f"{self.base_url}/chat/completions", headers, body
+
+    def parse_response(self, data):
+        suggestion, explanation = parse_content(data["choices"][0]["message"]["content"])
+        return ProviderResult(suggestion, explanation, self._usage(data))
+
+    def build_stream_request(self, prompt):
+        url, headers, body = self.build_request(prompt)
+        body["stream"] = True
+        body["stream_options"] = {"include_usage": True} # El último evento trae los tokens
+        return url, headers, body
+
+    def parse_stream_event(self, data):
+        # El evento final (include_usage) trae "usage" y una lista de choices vacía
+        choices = data.get("choices") or [{}]
+        text = (choices[0].get("delta") or {}).get("content") or ""
+        return text, (self._usage(data) if data.get("usage") else {})
+
+    @staticmethod
+    def _usage(data):
+        usage = data.get("usage") or {}
+        return {
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+        }
+
+
+class GeminiProvider(AIProvider):
+    """API generateContent de Google Gemini."""
+    name = "gemini"
+    default_base_url = "https://generativelanguage.googleapis.com/v1beta"
+
+    def build_request(self, prompt):
+        headers = {"x-goog-api-key": self.api_key} if self.api_key else {}
+        body = {
+            "systemInstruction": {"parts": [{"text": SYSTEM_PROMPT}]},
+            "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+            "generationConfig": {"responseMimeType": "application/json"},
+        }
+        return f"{self.base_url}/models/{self.model}:generateContent", headers, body
+
+    def parse_response(self, data):
+        suggestion, explanation = parse_content(data["candidates"][0]["content"]["parts"][0]["text"])
+        return ProviderResult(suggestion, explanation, self._usage(data))
+
+    def build_stream_request(self, prompt):
+        url, headers, body = self.build_request(prompt)
+        return url.replace(":generateContent", ":streamGenerateContent?alt=sse"), headers, body
+
+    def parse_stream_event(self, data):
+        candidates = data.get("candidates") or [{}]
+        parts = (candidates[0].get("content") or {}).get("parts") or []
+        text = "".join(part.get("text", "") for part in parts)
+        return text, (self._usage(data) if data.get("usageMetadata") else {})
+
+    @staticmethod
+    def _usage(data):
+        usage = data.get("usageMetadata") or {}
+        return {
+            "prompt_tokens": usage.get("promptTokenCount", 0),
+            "completion_tokens": usage.get("candidatesTokenCount", 0),
+        }
+
+
+class SimulatedProvider(AIProvider):
+    """Respuesta fija sin red, para desarrollo y pruebas sin credenciales."""
+    name = "simulated"
+
+    async def suggest(self, feature, context, user_prompt=None, timeout=None):
+        await asyncio.sleep(0.5) # Simular latencia de red
+        return ProviderResult(
+            {"restock_quantity": 25, "confidence": 0.85},
+            f"Sugerencia simulada para {feature} basada en {list(context.keys())}.",
+        )
+
+    async def stream(self, feature, context, user_prompt=None, timeout=None, usage=None):
+        result = await self.suggest(feature, context, user_prompt, timeout)
+        content = json.dumps({"suggestion": result.suggestion, "explanation": result.explanation}, ensure_ascii=False)
+        for start in range(0, len(content), 16):
+            await asyncio.sleep(0.02) # Simular la generación token a token
+            yield content[start:start + 16]
+
+
+PROVIDERS = {provider.name: provider for provider in (OpenAIProvider, GeminiProvider, SimulatedProvider)}
+
+
+@lru_cache(maxsize=None)
+def _build_provider(name: str, base_url: str, api_key: str, model: str) -> AIProvider:
+    if name not in PROVIDERS:
+        raise ValueError(f"AI_PROVIDER desconocido: '{name}' (opciones: {', '.join(PROVIDERS)})")
+    return PROVIDERS[name](base_url, api_key, model)
+
+
+def get_provider() -> AIProvider:
+    """Adaptador configurado (AI_PROVIDER), con URL, clave y modelo de Settings."""
+    return _build_provider(settings.AI_PROVIDER, settings.AI_BASE_URL, settings.AI_API_KEY, settings.AI_MODEL)
@@ -0,0 +1,186 @@
+# app/services/email_outbox.py
+# Worker en segundo plano que vacía el outbox de emails (tabla email_outbox).
+# Las peticiones solo insertan filas; este worker reserva lotes, los envía por
+# una única conexión SMTP reutilizada y reprograma los fallos con backoff exponencial.
+#
+# Para probar localmente sin Brevo se puede usar un servidor SMTP de prueba:
+#   python -m aiosmtpd -n -l localhost:1025
+# con MAIL_SERVER=localhost, MAIL_PORT=1025, MAIL_STARTTLS=False, USE_CREDENTIALS=False
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.tasks import PeriodicTask, register_background_task
+from app.crud import email_outbox as crud_email_outbox
+from app.db.session import SessionLocal
+from app.models.email_outbox import EmailOutbox
+
+if TYPE_CHECKING:
+    import aiosmtplib
+
+logger = logging.getLogger(__name__)
+
+
+def compute_backoff(attempts: int) -> float:
+    """Segundos a esperar antes del siguiente intento (exponencial con jitter)."""
+    delay = settings.EMAIL_OUTBOX_BACKOFF_SECONDS * (2 ** max(attempts - 1, 0))
+    delay = min(delay, settings.EMAIL_OUTBOX_MAX_BACKOFF_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def build_message(email: EmailOutbox) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = settings.MAIL_FROM
+    message["To"] = email.recipient
+    message["Subject"] = email.subject
+    if email.subtype == "html":
+        message.set_content(email.body, subtype="html")
+    else:
+        message.set_content(email.body)
+    return message
+
+
+class EmailOutboxSender:
+    """
+    Envía los emails del outbox manteniendo abierta una conexión SMTP mientras
+    haya trabajo; la conexión se cierra cuando el outbox queda vacío.
+    """
+
+    def __init__(self):
+        self._smtp: Optional["aiosmtplib.SMTP"] = None
+
+    async def _get_connection(self) -> "aiosmtplib.SMTP":
+        if self._smtp is not None and self._smtp.is_connected:
+            return self._smtp
+        # Import diferido: el cliente SMTP solo se carga si de verdad hay que enviar
+        import aiosmtplib
+        smtp = aiosmtplib.SMTP(
+            hostname=settings.MAIL_SERVER,
+            port=settings.MAIL_PORT,
+            use_tls=settings.MAIL_SSL_TLS,
+            start_tls=settings.MAIL_STARTTLS,
+            validate_certs=settings.VALIDATE_CERTS,
+            timeout=settings.MAIL_TIMEOUT,
+        )
+        await smtp.connect()
+        if settings.USE_CREDENTIALS:
+            await smtp.login(settings.MAIL_USERNAME, settings.MAIL_PASSWORD)
+        self._smtp = smtp
+        return smtp
+
+    async def close(self) -> None:
+        if self._smtp is not None and self._smtp.is_connected:
+            import aiosmtplib
+            try:
+                await self._smtp.quit()
+            except aiosmtplib.SMTPException:
+                self._smtp.close()
+        self._smtp = None
+
+    async def process_batch(self) -> int:
+        """
+        Procesa un lote del outbox. Devuelve cuántos emails se reservaron,
+        para que el bucle siga vaciando sin esperar mientras haya trabajo.
+        """
+        emails = await run_in_threadpool(self._claim)
+        if not emails:
+            await self.close()
+            return 0
+
+        sent_ids: List[int] = []
+        failures: List[Tuple[EmailOutbox, str]] = []
+
+        if not settings.EMAILS_ENABLED:
+            for email in emails:
+                self._simulate(email)
+                sent_ids.append(email.id)
+        else:
+            import aiosmtplib
+            for email in emails:
+                try:
+                    message = build_message(email)
+                except Exception as e:
+                    # Datos del email inválidos (p. ej. cabecera con salto de línea): cuenta
+                    # como intento fallido sin afectar al resto del lote
+                    logger.error(f"No se pudo construir el email {email.id} a {email.recipient}: {e}")
+                    failures.append((email, f"Mensaje inválido: {e}"))
+                    continue
+                try:
+                    smtp = await self._get_connection()
+                    await smtp.send_message(message)
+                    sent_ids.append(email.id)
+                except (aiosmtplib.SMTPException, OSError) as e:
+                    logger.warning(f"Fallo al enviar email {email.id} a {email.recipient}: {e}")
+                    failures.append((email, str(e)))
+                    # Fuerza reconexión en el siguiente email por si la conexión quedó rota
+                    if isinstance(e, (aiosmtplib.SMTPServerDisconnected, OSError)):
+                        await self.close()
+
+        await run_in_threadpool(self._record_results, sent_ids, failures)
+        if sent_ids:
+            logger.info(f"Outbox: {len(sent_ids)} email(s) enviados, {len(failures)} fallido(s).")
+        return len(emails)
+
+    async def drain(self) -> None:
+        """Vacía el outbox lote a lote (se llama en cada ciclo del worker)."""
+        while await self.process_batch() >= settings.EMAIL_OUTBOX_BATCH_SIZE:
+            pass
+
+    def _claim(self) -> List[EmailOutbox]:
+        # El lease cubre el peor caso: todos los emails del lote agotan el timeout SMTP
+        lease_seconds = settings.MAIL_TIMEOUT * settings.EMAIL_OUTBOX_BATCH_SIZE
+        db = SessionLocal()
+        try:
+            return crud_email_outbox.claim_due_emails(
+                db, limit=settings.EMAIL_OUTBOX_BATCH_SIZE, lease_seconds=lease_seconds,
+                max_attempts=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+            )
+        finally:
+            db.close()
+
+    def _record_results(self, sent_ids: List[int], failures: List[Tuple[EmailOutbox, str]]) -> None:
+        db = SessionLocal()
+        try:
+            crud_email_outbox.mark_sent(db, email_ids=sent_ids)
+            now = datetime.now(timezone.utc)
+            for email, error in failures:
+                if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+                    logger.error(f"Email {email.id} a {email.recipient} descartado tras {email.attempts} intentos: {error}")
+                    retry_at = None
+                else:
+                    retry_at = now + timedelta(seconds=compute_backoff(email.attempts))
+                crud_email_outbox.mark_failed(db, email_id=email.id, error=error, retry_at=retry_at)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _simulate(email: EmailOutbox) -> None:
+        # Se ejecuta si EMAILS_ENABLED es False (desarrollo)
+        logger.info(
+            f"SIMULANDO envío de email {email.id} a {email.recipient} (EMAILS_ENABLED=False). "
+            f"Asunto: {email.subject}\n{email.body}"
+        )
+
+
+email_sender = EmailOutboxSender()
+
+# Tarea periódica registrada en el lifespan de la app (ver app/main.py)
+email_outbox_worker = PeriodicTask(
+    name="email-outbox",
+    func=email_sender.drain,
+    interval=settings.EMAIL_OUTBOX_POLL_SECONDS,
+    jitter=1.0,
+)
+
+if settings.EMAIL_OUTBOX_WORKER_ENABLED:
+    register_background_task(email_outbox_worker)
+
+
+def notify_new_email() -> None:
+    """Despierta al worker para que envíe en cuanto se confirme la transacción."""
+    email_outbox_worker.wake()
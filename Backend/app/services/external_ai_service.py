@@ -1,28 +1,53 @@
-# amiwitos, este es un placeholder para la función de IA que interactúa con un servicio externo.
-# El objetivo es que esta función sea genérica y pueda adaptarse a diferentes servicios de IA (OpenAI, Gemini, etc.).
+# amiwitos, esta es la función de IA que interactúa con un servicio externo.
+# Es genérica: el proveedor concreto (OpenAI, Gemini, simulado...) lo resuelve un
+# adaptador de app/services/ai_providers.py según AI_PROVIDER.
 import asyncio
 import logging
-from typing import Dict, Any, Optional
-from sqlalchemy.orm import Session # Para pasar la sesión de DB si el servicio necesita interactuar
+import time
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
+from prometheus_client import Counter
+from sqlalchemy.ext.asyncio import AsyncSession # Sesión asíncrona: el log no bloquea el event loop
 
 from app.schemas.ai import AISuggestion, AiLogCreate # Importar schemas
-from app.crud import ai_log as crud_ai_log # Importar CRUD para logging
+from app.crud.aio import ai_log as crud_ai_log # Importar CRUD (async) para logging
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+from app.db import session as db_session
+from app.services import ai_cache, forecasting
+from app.services.ai_guard import AIUnavailableError, get_guard
+from app.services.ai_log_writer import ai_log_writer
+from app.services.ai_providers import get_provider, parse_content
 
 # Configura el logger
 logger = logging.getLogger(__name__)
 
+AI_PROVIDER_CALLS = Counter(
+    "ai_provider_calls_total", "Peticiones de IA no servidas desde caché, según si compartieron la llamada al proveedor",
+    ["mode"], # direct (llamada propia), coalesced (esperó la llamada idéntica en curso de otra petición)
+)
+
+# Llamadas al proveedor en curso, por clave normalizada de la petición
+in_flight = SingleFlight()
+
 async def get_ai_suggestion(
-    db: Session, # Pasar la sesión de DB para poder loggear
+    db: AsyncSession, # Pasar la sesión de DB para poder loggear
     feature: str, # Área funcional para logging
     context: Dict[str, Any], # Contexto para la IA
     user_prompt: Optional[str] = None, # Prompt adicional del usuario
-    user_id: Optional[int] = None # ID del usuario para logging
+    user_id: Optional[int] = None, # ID del usuario para logging
+    timeout: Optional[float] = None, # Segundos máximos para esta llamada (None = AI_TIMEOUT_SECONDS)
+    use_cache: bool = True # False fuerza una llamada nueva al proveedor
 ) -> AISuggestion:
     """
-    Función placeholder para obtener una sugerencia de una IA externa.
-    Debe formatear el input, llamar a la API externa, parsear la respuesta,
-    loggear la interacción y devolver la sugerencia estructurada.
+    Obtiene una sugerencia de la IA externa: formatea el input, llama a la API
+    del proveedor, parsea la respuesta, loggea la interacción y devuelve la
+    sugerencia estructurada.
+
+    En `metrics` del log queda la latencia total (latency_ms), de dónde salió la
+    respuesta (local_forecast, cached, coalesced), los tokens del proveedor y, si falló,
+    error/error_type/rejected (ver GET /ai/logs/stats).
     """
+    started = time.perf_counter()
     log_entry = AiLogCreate(
         feature_area=feature,
         user_id=user_id,
@@ -36,27 +61,49 @@ async def get_ai_suggestion(
     try:
         logger.info(f"Llamando a servicio de IA para '{feature}' con contexto: {context}")
 
-        # --- Aquí iría la lógica real de llamada a la API externa (OpenAI, Gemini, etc.) ---
-        # 1. Formatear el 'prompt' basado en 'feature' y 'context'.
-        # 2. Hacer la llamada HTTP a la API externa (usando httpx, aiohttp, etc.).
-        #    Ej: response = await http_client.post(AI_API_URL, json={"prompt": formatted_prompt}, headers={"Authorization": ...})
-        #    response.raise_for_status() # Verificar errores HTTP
-        #    ai_response_data = response.json()
+        local = await _local_suggestion(db, feature, context, user_id)
+        # Misma pregunta que una reciente: se responde desde la caché (ver app/services/ai_cache.py)
+        use_cache = use_cache and settings.AI_CACHE_ENABLED and local is None
+        cache_key = ai_cache.cache_key(feature, context, user_prompt) if use_cache else None
+        cached = await ai_cache.lookup(db, cache_key) if use_cache else None
 
-        # --- Simulación de respuesta ---
-        await asyncio.sleep(0.5) # Simular latencia de red
-        simulated_suggestion = {"restock_quantity": 25, "confidence": 0.85}
-        simulated_explanation = f"Sugerencia simulada para {feature} basada en {list(context.keys())}."
-        # -------------------------------
-
-        # 3. Parsear la respuesta de la IA
-        suggestion_content = simulated_suggestion # ai_response_data.get("choices")[0].get("message").get("content") # Ejemplo OpenAI
-        explanation_content = simulated_explanation # ai_response_data.get("explanation") # Si la IA lo da
+        if local is not None:
+            suggestion_content, explanation_content, log_entry.metrics = local
+        elif cached is not None:
+            suggestion_content = cached.suggestion
+            explanation_content = cached.explanation
+            log_entry.metrics = {"cached": True, "cache_source": cached.source}
+        else:
+            # El adaptador formatea el prompt, hace la llamada HTTP (cliente compartido,
+            # conexiones reutilizadas) y parsea la respuesta
+            provider = get_provider()
+            guard = get_guard(provider.name)
+            # Concurrencia, deadline y circuit breaker por proveedor (ver app/services/ai_guard.py)
+            call = lambda: guard.call(lambda remaining: provider.suggest(
+                feature, context, user_prompt, timeout=remaining if timeout is None else min(timeout, remaining)
+            ))
+            # La espera al proveedor puede durar segundos: se devuelve la conexión al pool
+            # en lugar de retenerla sin uso (la sesión vuelve a abrir una si se necesita después)
+            await db.close()
+            if settings.AI_COALESCE_ENABLED:
+                # Si otra petición idéntica ya está llamando al proveedor, se espera su
+                # resultado (p. ej. muchos usuarios abriendo el mismo dashboard a la vez)
+                flight_key = cache_key or ai_cache.cache_key(feature, context, user_prompt)
+                result, coalesced = await in_flight.do(flight_key, call)
+            else:
+                result, coalesced = await call(), False
+            AI_PROVIDER_CALLS.labels("coalesced" if coalesced else "direct").inc()
+            suggestion_content = result.suggestion
+            explanation_content = result.explanation
+            log_entry.metrics = {"cached": False, "coalesced": coalesced, "provider": provider.name}
+            if not coalesced: # Los tokens se cuentan una vez, en el log de quien hizo la llamada
+                log_entry.metrics.update(result.usage)
+            if use_cache and not coalesced: # La guarda quien hizo la llamada
+                await ai_cache.store(db, cache_key, feature, suggestion_content, explanation_content)
 
         # Actualizar log con la respuesta
         log_entry.output_data = str(suggestion_content)
         log_entry.decision_reason = explanation_content
-        # log_entry.metrics = {"confidence": suggestion_content.get("confidence")} # Ejemplo
 
         # 4. Devolver la respuesta estructurada
         ai_suggestion = AISuggestion(
@@ -67,11 +114,18 @@ async def get_ai_suggestion(
         logger.info(f"Sugerencia de IA recibida para '{feature}': {ai_suggestion}")
         return ai_suggestion
 
+    except AIUnavailableError as e:
+        # Rechazo rápido (circuito abierto, cola llena o deadline): el endpoint responde 503
+        logger.warning(f"Llamada de IA para '{feature}' rechazada ({e.reason}): {e}")
+        log_entry.output_data = f"Error: {str(e)}"
+        log_entry.metrics = {"error": True, "error_type": type(e).__name__, "rejected": e.reason}
+        raise
+
     except Exception as e:
         logger.error(f"Error al interactuar con el servicio de IA para '{feature}': {e}", exc_info=True)
         # Loggear el error en la DB también
         log_entry.output_data = f"Error: {str(e)}"
-        log_entry.metrics = {"error": True}
+        log_entry.metrics = {"error": True, "error_type": type(e).__name__}
         # Opcional: Lanzar una excepción HTTP aquí si el error debe detener el flujo
         # raise HTTPException(status_code=503, detail="Error communicating with AI service")
         # O devolver una respuesta indicando el fallo
@@ -79,13 +133,148 @@ async def get_ai_suggestion(
 
     finally:
         # 5. Guardar el log SIEMPRE (éxito o fallo)
-        try:
-            db_log = crud_ai_log.create_log(db=db, log_in=log_entry)
-            logger.info(f"Interacción IA loggeada con ID: {db_log.id}")
-            # Si quieres añadir el log_id a la respuesta, hazlo aquí si tienes el objeto AISuggestion
-            if 'ai_suggestion' in locals() and isinstance(ai_suggestion, AISuggestion):
-                 ai_suggestion.log_id = db_log.id
-
-        except Exception as log_e:
-            logger.error(f"¡¡Error Crítico!! No se pudo guardar el log de IA: {log_e}", exc_info=True)
-            # Este error es grave porque pierdes trazabilidad.
\ No newline at end of file
+        log_entry.metrics = _with_latency(log_entry.metrics, started)
+        log_id = await _save_log(db, log_entry)
+        # Si quieres añadir el log_id a la respuesta, hazlo aquí si tienes el objeto AISuggestion
+        if 'ai_suggestion' in locals() and isinstance(ai_suggestion, AISuggestion):
+             ai_suggestion.log_id = log_id
+
+
+async def _local_suggestion(
+    db: AsyncSession, feature: str, context: Dict[str, Any], user_id: Optional[int]
+) -> Optional[Tuple[Any, Optional[str], Dict[str, Any]]]:
+    """(suggestion, explanation, metrics) calculados sin el proveedor, o None si no aplica."""
+    # Reposición: pronóstico de demanda local (ver app/services/forecasting.py)
+    if feature == "InventoryRestock" and settings.FORECAST_LOCAL_ENABLED and user_id is not None:
+        return await forecasting.suggest_restock(db, user_id, context)
+    return None
+
+
+def _with_latency(metrics: Optional[Dict[str, Any]], started: float) -> Dict[str, Any]:
+    return {**(metrics or {}), "latency_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+
+async def _save_log(db: Optional[AsyncSession], log_entry: AiLogCreate) -> Optional[int]:
+    """Guarda el log de la interacción y devuelve su ID. Sin `db` se abre una sesión propia."""
+    try:
+        if settings.AI_LOG_BUFFERED:
+            # Se encola y se inserta por lotes en segundo plano (app/services/ai_log_writer.py)
+            log_id = await ai_log_writer.submit(log_entry)
+            logger.info(f"Interacción IA encolada para log con ID: {log_id}")
+        elif db is None:
+            async with db_session.AsyncSessionLocal() as own_db:
+                log_id = (await crud_ai_log.create_log(db=own_db, log_in=log_entry)).id
+            logger.info(f"Interacción IA loggeada con ID: {log_id}")
+        else:
+            db_log = await crud_ai_log.create_log(db=db, log_in=log_entry)
+            log_id = db_log.id
+            logger.info(f"Interacción IA loggeada con ID: {log_id}")
+        return log_id
+
+    except Exception as log_e:
+        logger.error(f"¡¡Error Crítico!! No se pudo guardar el log de IA: {log_e}", exc_info=True)
+        # Este error es grave porque pierdes trazabilidad.
+        return None
+
+
+async def stream_ai_suggestion(
+    db: AsyncSession, # Solo para la consulta de caché previa; el stream no usa la sesión de la petición
+    feature: str,
+    context: Dict[str, Any],
+    user_prompt: Optional[str] = None,
+    user_id: Optional[int] = None,
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Versión en streaming de get_ai_suggestion. Devuelve un iterador de eventos (tipo, datos):
+    ("delta", {"text": ...}) por cada fragmento del proveedor y al final ("done", {suggestion,
+    explanation, log_id}) o ("error", {detail, retry_after}).
+
+    Las comprobaciones previas (caché, circuito abierto) se hacen aquí, antes de empezar a
+    responder, para que el endpoint pueda contestar 503 directamente (AIUnavailableError).
+    """
+    local = await _local_suggestion(db, feature, context, user_id)
+    use_cache = settings.AI_CACHE_ENABLED and local is None
+    cache_key = ai_cache.cache_key(feature, context, user_prompt) if use_cache else None
+    cached = await ai_cache.lookup(db, cache_key) if use_cache else None
+    # El stream puede durar bastante: la conexión de la petición vuelve al pool ya
+    await db.close()
+    if local is None and cached is None:
+        get_guard(get_provider().name).check()
+    return _stream_events(feature, context, user_prompt, user_id, cache_key, cached, local)
+
+
+async def _stream_events(
+    feature: str,
+    context: Dict[str, Any],
+    user_prompt: Optional[str],
+    user_id: Optional[int],
+    cache_key: Optional[bytes],
+    cached: Optional[ai_cache.CachedSuggestion],
+    local: Optional[Tuple[Any, Optional[str], Dict[str, Any]]] = None,
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    started = time.perf_counter()
+    log_entry = AiLogCreate(
+        feature_area=feature,
+        user_id=user_id,
+        input_data=str(context) + (f"\nUser prompt: {user_prompt}" if user_prompt else ""),
+    )
+    first_delta_ms: Optional[float] = None # Tiempo hasta el primer fragmento
+    saved = False
+    parts: List[str] = []
+    try:
+        if local is not None:
+            suggestion_content, explanation_content, metrics = local
+            log_entry.metrics = {**metrics, "streamed": True}
+        elif cached is not None:
+            suggestion_content, explanation_content = cached.suggestion, cached.explanation
+            log_entry.metrics = {"cached": True, "cache_source": cached.source, "streamed": True}
+        else:
+            provider = get_provider()
+            usage: Dict[str, int] = {}
+            async with get_guard(provider.name).slot() as remaining:
+                # Cada fragmento se entrega antes de leer el siguiente: si el cliente lee despacio,
+                # el envío espera y con él la lectura del proveedor (backpressure)
+                async for text in provider.stream(feature, context, user_prompt, timeout=remaining, usage=usage):
+                    if first_delta_ms is None:
+                        first_delta_ms = round((time.perf_counter() - started) * 1000, 1)
+                    parts.append(text)
+                    yield "delta", {"text": text}
+            suggestion_content, explanation_content = parse_content("".join(parts))
+            log_entry.metrics = {
+                "cached": False, "streamed": True, "provider": provider.name,
+                "first_delta_ms": first_delta_ms, **usage,
+            }
+            if cache_key is not None:
+                async with db_session.AsyncSessionLocal() as db:
+                    await ai_cache.store(db, cache_key, feature, suggestion_content, explanation_content)
+
+        # Log con la salida completa, ensamblada al terminar el stream
+        log_entry.output_data = str(suggestion_content)
+        log_entry.decision_reason = explanation_content
+        saved = True
+        log_entry.metrics = _with_latency(log_entry.metrics, started)
+        log_id = await asyncio.shield(_save_log(None, log_entry))
+        yield "done", {"suggestion": suggestion_content, "explanation": explanation_content, "log_id": log_id}
+
+    except AIUnavailableError as e:
+        logger.warning(f"Stream de IA para '{feature}' rechazado ({e.reason}): {e}")
+        log_entry.output_data = f"Error: {str(e)}"
+        log_entry.metrics = {"error": True, "error_type": type(e).__name__, "rejected": e.reason, "streamed": True}
+        yield "error", {"detail": str(e), "retry_after": e.retry_after}
+
+    except Exception as e:
+        logger.error(f"Error en el stream de IA para '{feature}': {e}", exc_info=True)
+        log_entry.output_data = f"Error: {str(e)}"
+        log_entry.metrics = {"error": True, "error_type": type(e).__name__, "streamed": True}
+        yield "error", {"detail": "Fallo al obtener sugerencia de IA."}
+
+    finally:
+        if not saved:
+            if log_entry.metrics is None:
+                # El cliente se desconectó: al cerrar el generador se cerró también la llamada
+                # al proveedor. Se guarda lo recibido hasta ese momento.
+                log_entry.output_data = "".join(parts) or None
+                log_entry.metrics = {"cancelled": True, "streamed": True}
+            log_entry.metrics = _with_latency(log_entry.metrics, started)
+            # Protegido: tras una desconexión la tarea está cancelada y el await se interrumpiría
+            await asyncio.shield(_save_log(None, log_entry))
@@ -0,0 +1,237 @@
+# app/services/forecasting.py
+# Pronóstico de demanda local para las sugerencias de reposición (feature InventoryRestock).
+# Sustituye la llamada al proveedor de IA: responde en milisegundos y sin coste.
+#
+# Para cada producto se toman las salidas (OUT) diarias de los últimos FORECAST_HISTORY_DAYS
+# días y se estima la demanda diaria:
+#   - demanda regular      -> suavizado exponencial simple (SES)
+#   - demanda intermitente -> método de Croston con la corrección SBA (Syntetos-Boylan):
+#     suaviza por separado el tamaño de las salidas y los días entre salidas.
+# Se considera intermitente si el intervalo medio entre salidas (ADI) supera 1.32 días.
+#
+# La reposición cubre FORECAST_HORIZON_DAYS de demanda más un stock de seguridad
+# (FORECAST_SERVICE_LEVEL_Z desviaciones del error de pronóstico) menos el stock actual.
+#
+# Todos los productos de un propietario se calculan a la vez como una matriz
+# productos x días (NumPy): el bucle es sobre los días, cada paso opera sobre todos los
+# productos. El resultado se guarda por propietario FORECAST_CACHE_SECONDS.
+import math
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.crud.aio import product as crud_product
+from app.crud.aio import transaction as crud_transaction
+
+# Intervalo medio entre salidas a partir del cual la demanda se trata como intermitente
+ADI_INTERMITTENT = 1.32
+# Días iniciales que solo sirven para arrancar el suavizado (no cuentan en el error)
+WARMUP_DAYS = 7
+# Con menos días con salidas que esto la confianza se reduce proporcionalmente
+MIN_DEMAND_DAYS = 10
+# Error absoluto medio -> desviación típica (distribución normal)
+MAE_TO_SIGMA = 1.25
+# Productos devueltos cuando no se pide uno concreto
+MAX_LISTED = 50
+
+
+class DemandForecast(NamedTuple):
+    rate: np.ndarray # Demanda diaria estimada
+    mae: np.ndarray # Error absoluto medio del pronóstico a un día
+    croston: np.ndarray # True si se usó Croston (demanda intermitente)
+    demand_days: np.ndarray # Días con alguna salida
+
+
+class RestockForecast(NamedTuple):
+    product_id: int
+    restock_quantity: int
+    confidence: float
+    daily_demand: float
+    method: str # "ses" o "croston"
+    current_stock: int
+
+
+class ForecastBatch(NamedTuple):
+    """Pronóstico de todos los productos de un propietario."""
+    product_ids: np.ndarray
+    stock: np.ndarray
+    quantity: np.ndarray
+    confidence: np.ndarray
+    demand: DemandForecast
+    index: Dict[int, int] # product_id -> fila
+    elapsed_ms: float
+
+    def get(self, product_id: int) -> Optional[RestockForecast]:
+        row = self.index.get(product_id)
+        return None if row is None else self._forecast(row)
+
+    def needing_restock(self, limit: int = MAX_LISTED) -> List[RestockForecast]:
+        rows = np.flatnonzero(self.quantity > 0)
+        rows = rows[np.argsort(-self.quantity[rows], kind="stable")][:limit]
+        return [self._forecast(int(row)) for row in rows]
+
+    def _forecast(self, row: int) -> RestockForecast:
+        return RestockForecast(
+            product_id=int(self.product_ids[row]),
+            restock_quantity=int(self.quantity[row]),
+            confidence=round(float(self.confidence[row]), 2),
+            daily_demand=round(float(self.demand.rate[row]), 3),
+            method="croston" if self.demand.croston[row] else "ses",
+            current_stock=int(self.stock[row]),
+        )
+
+
+def forecast_demand(history: np.ndarray, alpha: float) -> DemandForecast:
+    """
+    Demanda diaria por producto a partir de `history` (productos x días, del más antiguo
+    al más reciente). SES y Croston se calculan a la vez y se elige por producto según el ADI.
+    """
+    history = np.asarray(history, dtype=np.float64)
+    products, days = history.shape
+    demand_days = np.count_nonzero(history, axis=1)
+    has_demand = demand_days > 0
+    safe_days = np.maximum(demand_days, 1)
+    adi = days / safe_days
+    mean_size = history.sum(axis=1) / safe_days
+
+    warmup = min(WARMUP_DAYS, days)
+    level = history[:, :warmup].mean(axis=1) if warmup else np.zeros(products) # SES
+    size = mean_size.copy() # Croston: tamaño de las salidas
+    interval = adi.copy() # Croston: días entre salidas
+    since_last = np.zeros(products) # Días desde la última salida
+    sba = 1 - alpha / 2
+
+    abs_error_ses = np.zeros(products)
+    abs_error_croston = np.zeros(products)
+    by_day = np.ascontiguousarray(history.T) # Cada día, contiguo en memoria
+    for day in range(days):
+        demand = by_day[day]
+        if day >= warmup:
+            abs_error_ses += np.abs(demand - level)
+            abs_error_croston += np.abs(demand - sba * size / interval)
+        level += alpha * (demand - level)
+        since_last += 1
+        # Croston solo actualiza los productos con salida ese día
+        step = alpha * (demand > 0)
+        size += step * (demand - size)
+        interval += step * (since_last - interval)
+        since_last *= demand == 0
+
+    scored_days = max(days - warmup, 1)
+    croston = has_demand & (adi > ADI_INTERMITTENT)
+    rate = np.where(croston, sba * size / interval, level)
+    mae = np.where(croston, abs_error_croston, abs_error_ses) / scored_days
+    return DemandForecast(
+        rate=np.where(has_demand, rate, 0.0),
+        mae=np.where(has_demand, mae, 0.0),
+        croston=croston,
+        demand_days=demand_days,
+    )
+
+
+def restock_plan(
+    demand: DemandForecast, stock: np.ndarray, horizon_days: int, service_level_z: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """(cantidad a reponer, confianza 0-1) por producto."""
+    sigma = MAE_TO_SIGMA * demand.mae * math.sqrt(horizon_days)
+    target = demand.rate * horizon_days + service_level_z * sigma
+    quantity = np.ceil(np.maximum(target - stock, 0.0)).astype(np.int64)
+
+    # Confianza: menor cuanto mayor es el error relativo y cuanto menos historial hay
+    relative_error = demand.mae / np.maximum(demand.rate, 1e-9)
+    coverage = np.minimum(demand.demand_days / MIN_DEMAND_DAYS, 1.0)
+    confidence = np.clip(coverage / (1.0 + relative_error), 0.05, 0.95)
+    confidence = np.where(demand.demand_days > 0, confidence, 0.05)
+    return quantity, confidence
+
+
+def _day(value: datetime) -> date:
+    # date_trunc devuelve timestamptz; sin zona (sqlite) se asume UTC
+    return (value.astimezone(timezone.utc) if value.tzinfo else value).date()
+
+
+_batches = TTLCache(maxsize=1024, ttl=settings.FORECAST_CACHE_SECONDS)
+
+
+async def forecast_owner(db: AsyncSession, owner_id: int) -> ForecastBatch:
+    """Pronóstico de reposición de todos los productos de `owner_id` (cacheado unos segundos)."""
+    batch = _batches.get(owner_id)
+    if batch is not None:
+        return batch
+
+    started = time.perf_counter()
+    days = settings.FORECAST_HISTORY_DAYS
+    # Solo días completos: hasta ayer (hoy, a medias, contaría como un día de poca demanda)
+    today = datetime.now(timezone.utc).date()
+    first_day = today - timedelta(days=days)
+    since = datetime(first_day.year, first_day.month, first_day.day, tzinfo=timezone.utc)
+    until = datetime(today.year, today.month, today.day, tzinfo=timezone.utc)
+    products = await crud_product.get_stock_levels(db, owner_id)
+    totals = await crud_transaction.get_daily_out_totals(db, owner_id=owner_id, since=since, until=until)
+
+    product_ids = np.fromiter((row.id for row in products), dtype=np.int64, count=len(products))
+    stock = np.fromiter((row.stock for row in products), dtype=np.float64, count=len(products))
+    index = {int(product_id): row for row, product_id in enumerate(product_ids)}
+    history = np.zeros((len(products), days))
+    rows = [(index[row.product_id], (_day(row.day) - first_day).days, row.quantity)
+            for row in totals if row.product_id in index]
+    if rows:
+        product_rows, day_columns, quantities = (np.array(column) for column in zip(*rows))
+        valid = (day_columns >= 0) & (day_columns < days)
+        np.add.at(history, (product_rows[valid], day_columns[valid]), quantities[valid])
+
+    demand = forecast_demand(history, settings.FORECAST_ALPHA)
+    quantity, confidence = restock_plan(
+        demand, stock, settings.FORECAST_HORIZON_DAYS, settings.FORECAST_SERVICE_LEVEL_Z
+    )
+    batch = ForecastBatch(
+        product_ids, stock, quantity, confidence, demand, index,
+        elapsed_ms=(time.perf_counter() - started) * 1000,
+    )
+    _batches.put(owner_id, batch, ttl=settings.FORECAST_CACHE_SECONDS)
+    return batch
+
+
+def _explain(forecast: RestockForecast) -> str:
+    method = "Croston (demanda intermitente)" if forecast.method == "croston" else "suavizado exponencial"
+    return (
+        f"Demanda estimada de {forecast.daily_demand:g} unidades/día ({method}) sobre las salidas de los "
+        f"últimos {settings.FORECAST_HISTORY_DAYS} días completos; cubre {settings.FORECAST_HORIZON_DAYS} días más "
+        f"stock de seguridad, descontando el stock actual ({forecast.current_stock})."
+    )
+
+
+async def suggest_restock(
+    db: AsyncSession, owner_id: int, context: Dict[str, Any]
+) -> Optional[Tuple[Any, str, Dict[str, Any]]]:
+    """
+    (suggestion, explanation, metrics) para InventoryRestock. Con `product_id` en el contexto
+    se devuelve ese producto; sin él, los productos del propietario que necesitan reposición.
+    None si el producto no es del propietario (se deja la pregunta al proveedor de IA).
+    """
+    batch = await forecast_owner(db, owner_id)
+    metrics = {"local_forecast": True, "forecast_ms": round(batch.elapsed_ms, 2), "products": len(batch.index)}
+    product_id = context.get("product_id")
+    if product_id is None:
+        pending = batch.needing_restock()
+        suggestion = {"products": [forecast._asdict() for forecast in pending]}
+        explanation = (
+            f"{len(pending)} producto(s) necesitan reposición para cubrir "
+            f"{settings.FORECAST_HORIZON_DAYS} días de demanda estimada."
+        )
+        return suggestion, explanation, metrics
+
+    try:
+        forecast = batch.get(int(product_id))
+    except (TypeError, ValueError):
+        return None
+    if forecast is None:
+        return None
+    suggestion = forecast._asdict()
+    del suggestion["product_id"]
+    return suggestion, _explain(forecast), metrics
@@ -0,0 +1,152 @@
+# app/services/health.py
+# Sonda de salud en segundo plano para /health/ready (ver app/api/health.py).
+# Una tarea periódica comprueba las dependencias y guarda el resultado; el endpoint
+# solo lee ese resultado, así que el sondeo del balanceador no añade carga a la base.
+#
+# Comprobaciones:
+#   database    -> SELECT al primario con timeout y pool no saturado
+#   migrations  -> la revisión de alembic_version es la cabeza de alembic/versions
+#   tasks       -> las tareas de fondo siguen vivas y se han ejecutado recientemente
+# Las réplicas se informan pero no afectan: sin réplicas sanas se lee del primario.
+import asyncio
+import logging
+import os
+import time
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.tasks import PeriodicTask, background_tasks, register_background_task
+from app.db.pool import pool_status
+from app.db.replicas import replica_router
+from app.db.session import get_async_engine
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@lru_cache(maxsize=1)
+def expected_heads() -> FrozenSet[str]:
+    """Cabezas de alembic/versions (se leen una vez por proceso)."""
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    return frozenset(ScriptDirectory.from_config(config).get_heads())
+
+
+class HealthState:
+    """Último resultado de la sonda."""
+
+    def __init__(self):
+        self.checks: Dict[str, Dict[str, Any]] = {}
+        self.checked_at: Optional[float] = None # time.monotonic()
+
+    @property
+    def age(self) -> Optional[float]:
+        return None if self.checked_at is None else time.monotonic() - self.checked_at
+
+    @property
+    def ready(self) -> bool:
+        if self.age is None or self.age > settings.HEALTH_PROBE_MAX_AGE_SECONDS:
+            return False
+        return all(check["ok"] for check in self.checks.values())
+
+    def report(self) -> Dict[str, Any]:
+        age = self.age
+        return {
+            "status": "ready" if self.ready else "not_ready",
+            "age_seconds": None if age is None else round(age, 2),
+            "checks": self.checks,
+        }
+
+
+health_state = HealthState()
+
+
+async def check_database() -> Tuple[Dict[str, Any], Optional[str]]:
+    """Estado del primario y revisión de alembic registrada en la base."""
+    try:
+        async with asyncio.timeout(settings.HEALTH_PROBE_TIMEOUT_SECONDS):
+            async with get_async_engine().connect() as conn:
+                version = (await conn.execute(text("SELECT version_num FROM alembic_version"))).scalar()
+    except Exception as e:
+        return {"ok": False, "error": str(e) or type(e).__name__}, None
+
+    capacity = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    pools = {name: values for name, values in pool_status().items() if name.startswith("primary")}
+    saturated = [name for name, values in pools.items() if values["checked_out"] >= capacity]
+    result = {"ok": not saturated, "pools": pools}
+    if saturated:
+        result["error"] = f"pool saturado: {', '.join(saturated)}"
+    return result, version
+
+
+def check_migrations(version: Optional[str]) -> Dict[str, Any]:
+    heads = expected_heads()
+    return {
+        "ok": version in heads,
+        "database": version,
+        "expected": sorted(heads),
+    }
+
+
+def check_tasks() -> Dict[str, Any]:
+    now = time.monotonic()
+    tasks = {}
+    for task in background_tasks:
+        if task is health_probe:
+            continue
+        # Una tarea que no se ejecuta en varios intervalos está colgada
+        stale = task.last_run is not None and now - task.last_run > max(task.interval * 3, 60.0)
+        tasks[task.name] = {
+            "running": task.running,
+            "stale": stale,
+            "last_error": task.last_error,
+        }
+    return {"ok": all(t["running"] and not t["stale"] for t in tasks.values()), "tasks": tasks}
+
+
+def check_replicas() -> Dict[str, Any]:
+    return {
+        "ok": True, # Informativo: sin réplicas sanas las lecturas van al primario
+        "replicas": {
+            replica.name: {"healthy": replica.healthy, "lag_seconds": replica.lag_seconds, "error": replica.last_error}
+            for replica in replica_router.replicas
+        },
+    }
+
+
+async def run_probe() -> None:
+    database, version = await check_database()
+    checks = {
+        "database": database,
+        "migrations": (
+            check_migrations(version) if version is not None
+            else {"ok": False, "error": "revisión de la base desconocida"}
+        ),
+        "tasks": check_tasks(),
+    }
+    if replica_router.replicas:
+        checks["replicas"] = check_replicas()
+    was_ready = health_state.ready
+    health_state.checks = checks
+    health_state.checked_at = time.monotonic()
+    if was_ready != health_state.ready:
+        failing = [name for name, check in checks.items() if not check["ok"]]
+        if failing:
+            logger.warning(f"La aplicación deja de estar lista: {', '.join(failing)}")
+        else:
+            logger.info("La aplicación está lista para recibir tráfico.")
+
+
+health_probe = PeriodicTask(
+    name="health-probe",
+    func=run_probe,
+    interval=settings.HEALTH_PROBE_SECONDS,
+)
+register_background_task(health_probe)
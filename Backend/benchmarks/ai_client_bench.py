@@ -0,0 +1,80 @@
+# benchmarks/ai_client_bench.py
+# Compara el coste por llamada al proveedor de IA creando un cliente HTTP nuevo en cada
+# llamada (conexión nueva: DNS + TCP + TLS) frente al cliente compartido con keep-alive
+# de app/services/ai_client.py. Se mide contra benchmarks/mock_ai_server.py, cuya
+# latencia es conocida: lo que exceda de ella es sobrecoste del cliente.
+#
+#   python -m benchmarks.mock_ai_server --latency-ms 50 &
+#   python -m benchmarks.ai_client_bench --base-url http://127.0.0.1:9100/v1 --calls 500 --concurrency 20
+#
+# Con --base-url https://... (el mock detrás de un proxy TLS, o el proveedor real con
+# AI_API_KEY) la diferencia incluye el handshake TLS, que es lo que más pesa en producción.
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, List
+
+import httpx
+
+from app.services.ai_client import close_http_client, default_timeout
+from app.services.ai_providers import OpenAIProvider, build_prompt
+from benchmarks.loadtest import percentile
+
+CONTEXT = {"product_id": 1, "current_stock": 5, "sales_last_30d": 50}
+
+
+async def measure(call: Callable[[], Awaitable[None]], calls: int, concurrency: int) -> List[float]:
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return sorted(latencies)
+
+
+def report(name: str, latencies: List[float], mock_latency_ms: float) -> None:
+    mean_ms = statistics.mean(latencies) * 1000
+    print(
+        f"{name:<22} media {mean_ms:8.2f} ms | p50 {percentile(latencies, 50) * 1000:8.2f} ms "
+        f"| p95 {percentile(latencies, 95) * 1000:8.2f} ms | sobrecoste ~{mean_ms - mock_latency_ms:7.2f} ms"
+    )
+
+
+async def main_async(args) -> None:
+    provider = OpenAIProvider(args.base_url, args.api_key, args.model)
+    url, headers, body = provider.build_request(build_prompt("InventoryRestock", CONTEXT, None))
+
+    async def new_client_per_call() -> None:
+        async with httpx.AsyncClient(timeout=default_timeout()) as client:
+            (await client.post(url, headers=headers, json=body)).raise_for_status()
+
+    async def shared_client() -> None:
+        await provider.suggest("InventoryRestock", CONTEXT)
+
+    await shared_client() # Calentamiento: abre la primera conexión
+    print(f"{args.calls} llamadas, concurrencia {args.concurrency}, latencia del mock {args.mock_latency_ms} ms")
+    report("cliente por llamada", await measure(new_client_per_call, args.calls, args.concurrency), args.mock_latency_ms)
+    report("cliente compartido", await measure(shared_client, args.calls, args.concurrency), args.mock_latency_ms)
+    await close_http_client()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sobrecoste por llamada del cliente HTTP de IA.")
+    parser.add_argument("--base-url", default="http://127.0.0.1:9100/v1")
+    parser.add_argument("--api-key", default="mock")
+    parser.add_argument("--model", default="mock")
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--mock-latency-ms", type=float, default=50.0, help="Latencia configurada en el mock")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# benchmarks/compare.py
+# Compara dos informes de benchmarks/loadtest.py y falla (exit 1) si hay regresiones.
+#
+#   python -m benchmarks.compare baseline.json candidate.json --threshold 10
+import argparse
+import json
+import sys
+
+
+def load(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def change_pct(old: float, new: float) -> float:
+    return (new - old) / old * 100 if old else 0.0
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> bool:
+    """Imprime la comparación escenario a escenario; devuelve True si hay regresión."""
+    regression = False
+    print(f"{'escenario':<20}{'métrica':<16}{'base':>12}{'nuevo':>12}{'cambio':>10}")
+    for name, new in candidate["scenarios"].items():
+        old = baseline["scenarios"].get(name)
+        if old is None:
+            print(f"{name:<20}(sin datos en la base)")
+            continue
+        rows = [(f"{p} ms", old["latency_ms"][p], new["latency_ms"][p], True) for p in ("p50", "p95", "p99")]
+        rows.append(("req/s", old["throughput_rps"], new["throughput_rps"], False))
+        for label, old_value, new_value, lower_is_better in rows:
+            delta = change_pct(old_value, new_value)
+            worse = delta > threshold if lower_is_better else delta < -threshold
+            flag = "  <-- REGRESIÓN" if worse else ""
+            regression = regression or worse
+            print(f"{name:<20}{label:<16}{old_value:>12}{new_value:>12}{delta:>+9.1f}%{flag}")
+        if new["errors"] > old["errors"]:
+            print(f"{name:<20}{'errores':<16}{old['errors']:>12}{new['errors']:>12}  <-- REGRESIÓN")
+            regression = True
+    return regression
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compara dos informes de carga.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Porcentaje de empeoramiento tolerado")
+    args = parser.parse_args()
+    if compare(load(args.baseline), load(args.candidate), args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+# benchmarks/datagen.py
+# Generador de datos sintéticos a gran escala para benchmarks y capacity planning.
+# Vuelca millones de filas con COPY desde varios procesos en paralelo. El resultado
+# es determinista: misma semilla + mismos argumentos (incluido --end-date) = mismos datos,
+# sin importar el número de workers.
+#
+#   python -m benchmarks.datagen --reset --transactions 10000000 --kpis 500 --ai-logs 1000000
+#
+# Distribuciones:
+#   - Productos "calientes": la popularidad sigue una ley de Zipf (pocos SKUs concentran la mayoría de movimientos).
+#   - Consumo estacional: más movimientos en verano, menos en fines de semana, y concentrados en horario laboral.
+#   - KPIs de sensores: deriva lenta + ciclo diario + ruido gaussiano + picos/caídas ocasionales.
+import argparse
+import io
+import json
+import math
+import multiprocessing
+import os
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+import psycopg2
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+from app.models.kpi import KpiCategoryDB
+from app.security.core import get_password_hash
+from benchmarks.seed import BENCH_EMAIL, BENCH_PASSWORD, TABLES_TO_RESET
+
+CHUNK_SIZE = 250_000
+ZIPF_EXPONENT = 1.1
+
+# Códigos para derivar semillas independientes por tabla y por bloque
+SEED_PRODUCTS, SEED_TRANSACTIONS, SEED_KPIS, SEED_KPI_HISTORY, SEED_AI_LOGS = range(5)
+
+KPI_UNITS = ["%", "bbl/día", "USD/bbl", "días", "m", "psi"]
+AI_FEATURES = ["InventoryRestock", "KpiAnalysis", "UserProfiling"]
+AI_FEATURE_WEIGHTS = [0.6, 0.3, 0.1]
+
+
+@dataclass(frozen=True)
+class Volumes:
+    users: int
+    categories: int
+    products: int
+    transactions: int
+    kpis: int
+    kpi_samples: int
+    ai_logs: int
+    days: int
+    end_epoch: int
+    bench_share: float
+    seed: int
+
+
+@dataclass(frozen=True)
+class Chunk:
+    table: str
+    index: int
+    first_id: int
+    count: int
+
+
+def to_dsn(url: str) -> str:
+    """Convierte la URL de SQLAlchemy (postgresql+psycopg2://...) en un DSN de libpq."""
+    return make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+def rng_for(volumes: Volumes, code: int, index: int = 0) -> np.random.Generator:
+    return np.random.default_rng([volumes.seed, code, index])
+
+
+def copy_rows(cursor, table: str, columns: List[str], lines: Iterator[str]) -> None:
+    """COPY ... FROM STDIN en formato texto (columnas separadas por tabulador, NULL = \\N)."""
+    buffer = io.StringIO()
+    buffer.writelines(lines)
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+
+
+def format_timestamps(epochs: np.ndarray) -> List[str]:
+    return [f"{ts}+00" for ts in epochs.astype("datetime64[s]").astype(str)]
+
+
+def product_popularity(volumes: Volumes) -> np.ndarray:
+    """Probabilidad de que un movimiento toque cada producto (Zipf sobre un orden aleatorio)."""
+    ranks = rng_for(volumes, SEED_PRODUCTS).permutation(volumes.products) + 1
+    weights = 1.0 / ranks ** ZIPF_EXPONENT
+    return weights / weights.sum()
+
+
+def day_weights(volumes: Volumes) -> np.ndarray:
+    """Peso relativo de cada día del periodo: estacionalidad anual y semanal."""
+    first_day = datetime.fromtimestamp(volumes.end_epoch, tz=timezone.utc).date() - timedelta(days=volumes.days)
+    days = [first_day + timedelta(days=i) for i in range(volumes.days)]
+    weights = np.array([
+        (1.0 + 0.3 * math.sin(2 * math.pi * (d.timetuple().tm_yday - 80) / 365.0)) * (0.5 if d.weekday() >= 5 else 1.0)
+        for d in days
+    ])
+    return weights / weights.sum()
+
+
+def business_hours_seconds(rng: np.random.Generator, size: int) -> np.ndarray:
+    return np.clip(rng.normal(13.5 * 3600, 3 * 3600, size), 0, 86_399).astype(np.int64)
+
+
+# --- Tablas pequeñas (proceso principal) ---
+
+def load_base_tables(cursor, volumes: Volumes) -> None:
+    rng = rng_for(volumes, SEED_KPIS)
+    # Hashear una sola vez: bcrypt es deliberadamente lento
+    bench_hash = get_password_hash(BENCH_PASSWORD)
+    other_hash = get_password_hash("SeedPassword123")
+
+    copy_rows(cursor, "users", ["id", "email", "hashed_password", "is_active"], (
+        f"{i}\t{BENCH_EMAIL if i == 1 else f'user{i}@seed.vectorkpi.com'}\t{bench_hash if i == 1 else other_hash}\tt\n"
+        for i in range(1, volumes.users + 1)
+    ))
+    copy_rows(cursor, "profiles", ["id", "user_id", "full_name"], (
+        f"{i}\t{i}\tUsuario {i}\n" for i in range(1, volumes.users + 1)
+    ))
+    copy_rows(cursor, "categories", ["id", "name", "description"], (
+        f"{i}\tCategoría {i}\tGenerada para benchmark\n" for i in range(1, volumes.categories + 1)
+    ))
+
+    product_rng = rng_for(volumes, SEED_PRODUCTS, 1)
+    n = volumes.products
+    prices = np.round(product_rng.lognormal(3.5, 1.0, n), 2)
+    stocks = product_rng.integers(0, 5_000, n)
+    categories = product_rng.integers(1, volumes.categories + 1, n)
+    owners = np.where(product_rng.random(n) < volumes.bench_share, 1, product_rng.integers(1, volumes.users + 1, n))
+    copy_rows(cursor, "products", ["id", "name", "price", "stock", "sku", "category_id", "owner_id"], (
+        f"{i + 1}\tProducto {i + 1}\t{prices[i]:.2f}\t{stocks[i]}\tSKU-{i + 1:08d}\t{categories[i]}\t{owners[i]}\n"
+        for i in range(n)
+    ))
+
+    kpi_categories = [c.name for c in KpiCategoryDB]
+    base_values = kpi_base_values(volumes)
+    copy_rows(cursor, "kpis", ["id", "name", "value", "target", "unit", "category", "trend", "owner_id"], (
+        f"{i + 1}\tKPI {i + 1}\t{base_values[i]:.5f}\t{base_values[i] * rng.uniform(0.9, 1.2):.5f}\t"
+        f"{KPI_UNITS[i % len(KPI_UNITS)]}\t{kpi_categories[i % len(kpi_categories)]}\tstable\t{rng.integers(1, volumes.users + 1)}\n"
+        for i in range(volumes.kpis)
+    ))
+
+
+def kpi_base_values(volumes: Volumes) -> np.ndarray:
+    return np.round(rng_for(volumes, SEED_KPIS, 1).lognormal(4.0, 1.2, volumes.kpis), 5)
+
+
+# --- Tablas grandes (workers en paralelo) ---
+
+def transaction_lines(volumes: Volumes, chunk: Chunk) -> Iterator[str]:
+    rng = rng_for(volumes, SEED_TRANSACTIONS, chunk.index)
+    n = chunk.count
+    product_ids = rng.choice(volumes.products, size=n, p=product_popularity(volumes)) + 1
+    user_ids = rng.integers(1, volumes.users + 1, n)
+    kinds = rng.choice(3, size=n, p=[0.35, 0.6, 0.05])
+    quantities = np.select(
+        [kinds == 0, kinds == 1],
+        [np.ceil(rng.lognormal(4.0, 0.6, n)), np.ceil(rng.lognormal(2.0, 0.8, n))],
+        default=rng.integers(1, 11, n),
+    ).astype(np.int64)
+    days = rng.choice(volumes.days, size=n, p=day_weights(volumes))
+    start = volumes.end_epoch - volumes.days * 86_400
+    timestamps = format_timestamps(start + days * 86_400 + business_hours_seconds(rng, n))
+    names = ("IN", "OUT", "ADJUSTMENT")
+    for i in range(n):
+        yield (
+            f"{chunk.first_id + i}\t{product_ids[i]}\t{user_ids[i]}\t{quantities[i]}\t"
+            f"{names[kinds[i]]}\t\\N\t{timestamps[i]}\n"
+        )
+
+
+def kpi_history_lines(volumes: Volumes, chunk: Chunk) -> Iterator[str]:
+    # Un bloque = un rango de KPIs completo; chunk.first_id es el primer id de fila del bloque
+    rng = rng_for(volumes, SEED_KPI_HISTORY, chunk.index)
+    base_values = kpi_base_values(volumes)
+    samples = volumes.kpi_samples
+    step = volumes.days * 86_400 // samples
+    epochs = volumes.end_epoch - volumes.days * 86_400 + np.arange(1, samples + 1) * step
+    timestamps = format_timestamps(epochs)
+    daily_cycle = np.sin(2 * np.pi * (epochs % 86_400) / 86_400)
+    first_kpi = chunk.index * kpis_per_chunk(volumes)
+    row_id = chunk.first_id
+    for kpi_index in range(first_kpi, min(first_kpi + kpis_per_chunk(volumes), volumes.kpis)):
+        base = base_values[kpi_index]
+        drift = np.cumsum(rng.normal(0, 0.002 * base, samples))
+        noise = rng.normal(0, 0.01 * base, samples)
+        values = base + drift + 0.03 * base * daily_cycle + noise
+        # Picos y caídas de sensor
+        glitches = rng.random(samples)
+        values = np.where(glitches < 0.001, values * rng.uniform(1.5, 3.0, samples), values)
+        values = np.where(glitches > 0.999, 0.0, values)
+        values = np.maximum(values, 0.0)
+        for i in range(samples):
+            yield f"{row_id}\t{kpi_index + 1}\t{values[i]:.5f}\t{timestamps[i]}\n"
+            row_id += 1
+
+
+def ai_log_lines(volumes: Volumes, chunk: Chunk) -> Iterator[str]:
+    rng = rng_for(volumes, SEED_AI_LOGS, chunk.index)
+    n = chunk.count
+    user_ids = rng.integers(1, volumes.users + 1, n)
+    features = rng.choice(len(AI_FEATURES), size=n, p=AI_FEATURE_WEIGHTS)
+    product_ids = rng.choice(volumes.products, size=n, p=product_popularity(volumes)) + 1
+    stocks = rng.integers(0, 200, n)
+    restock = np.ceil(rng.lognormal(3.0, 0.5, n)).astype(np.int64)
+    confidence = np.round(rng.beta(8, 2, n), 3)
+    latency = np.round(rng.lognormal(6.2, 0.4, n), 1) # ~500 ms, cola larga
+    days = rng.choice(volumes.days, size=n, p=day_weights(volumes))
+    start = volumes.end_epoch - volumes.days * 86_400
+    timestamps = format_timestamps(start + days * 86_400 + business_hours_seconds(rng, n))
+    for i in range(n):
+        input_data = json.dumps({"product_id": int(product_ids[i]), "current_stock": int(stocks[i])})
+        output_data = json.dumps({"restock_quantity": int(restock[i]), "confidence": float(confidence[i])})
+        metrics = json.dumps({"latency_ms": float(latency[i]), "confidence": float(confidence[i])})
+        yield (
+            f"{chunk.first_id + i}\t{timestamps[i]}\t{user_ids[i]}\t{AI_FEATURES[features[i]]}\t"
+            f"{input_data}\t{output_data}\tBasado en ventas históricas y stock actual.\t{metrics}\n"
+        )
+
+
+TABLE_WRITERS = {
+    "transactions": (["id", "product_id", "user_id", "quantity", "type", "reason", "timestamp"], transaction_lines),
+    "kpi_history": (["id", "kpi_id", "value", "recorded_at"], kpi_history_lines),
+    "ai_logs": (
+        ["id", "timestamp", "user_id", "feature_area", "input_data", "output_data", "decision_reason", "metrics"],
+        ai_log_lines,
+    ),
+}
+
+
+def kpis_per_chunk(volumes: Volumes) -> int:
+    return max(CHUNK_SIZE // max(volumes.kpi_samples, 1), 1)
+
+
+def plan_chunks(volumes: Volumes) -> List[Chunk]:
+    chunks = []
+    for table, total in (("transactions", volumes.transactions), ("ai_logs", volumes.ai_logs)):
+        for index, first in enumerate(range(0, total, CHUNK_SIZE)):
+            chunks.append(Chunk(table, index, first + 1, min(CHUNK_SIZE, total - first)))
+    per_chunk = kpis_per_chunk(volumes)
+    for index, first_kpi in enumerate(range(0, volumes.kpis, per_chunk)):
+        count = min(per_chunk, volumes.kpis - first_kpi) * volumes.kpi_samples
+        chunks.append(Chunk("kpi_history", index, first_kpi * volumes.kpi_samples + 1, count))
+    return chunks
+
+
+# Estado por proceso worker
+_worker_connection = None
+_worker_volumes: Optional[Volumes] = None
+
+
+def _init_worker(dsn: str, volumes: Volumes) -> None:
+    global _worker_connection, _worker_volumes
+    _worker_connection = psycopg2.connect(dsn)
+    _worker_volumes = volumes
+    with _worker_connection.cursor() as cursor:
+        # Carga masiva: no esperar al fsync del WAL en cada commit
+        cursor.execute("SET synchronous_commit = off")
+    _worker_connection.commit()
+
+
+def _load_chunk(chunk: Chunk) -> Tuple[str, int]:
+    columns, writer = TABLE_WRITERS[chunk.table]
+    with _worker_connection.cursor() as cursor:
+        copy_rows(cursor, chunk.table, columns, writer(_worker_volumes, chunk))
+    _worker_connection.commit()
+    return chunk.table, chunk.count
+
+
+def finalize(cursor) -> None:
+    """Ajusta secuencias (se insertaron ids explícitos) y deja cada KPI con su último valor."""
+    for table in ("users", "profiles", "categories", "products", "kpis", "transactions", "kpi_history", "ai_logs"):
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)"
+        )
+    cursor.execute(
+        """
+        UPDATE kpis SET value = h.value, last_updated = h.recorded_at
+        FROM (
+            SELECT DISTINCT ON (kpi_id) kpi_id, value, recorded_at
+            FROM kpi_history ORDER BY kpi_id, recorded_at DESC
+        ) AS h
+        WHERE kpis.id = h.kpi_id
+        """
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Genera datos sintéticos a gran escala con COPY en paralelo.")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--transactions", type=int, default=10_000_000)
+    parser.add_argument("--kpis", type=int, default=500)
+    parser.add_argument("--kpi-interval-minutes", type=int, default=60, help="Frecuencia de muestreo de los KPIs")
+    parser.add_argument("--ai-logs", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=365, help="Días de historia a generar")
+    parser.add_argument("--end-date", type=date.fromisoformat, default=date.today(), help="Último día (YYYY-MM-DD)")
+    parser.add_argument("--bench-share", type=float, default=0.05, help="Fracción de productos del usuario de benchmark")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="Vacía las tablas antes de cargar")
+    args = parser.parse_args()
+
+    end = datetime.combine(args.end_date, datetime.min.time(), tzinfo=timezone.utc)
+    volumes = Volumes(
+        users=args.users,
+        categories=args.categories,
+        products=args.products,
+        transactions=args.transactions,
+        kpis=args.kpis,
+        kpi_samples=args.days * 24 * 60 // args.kpi_interval_minutes,
+        ai_logs=args.ai_logs,
+        days=args.days,
+        end_epoch=int(end.timestamp()),
+        bench_share=args.bench_share,
+        seed=args.seed,
+    )
+    dsn = to_dsn(args.database_url)
+    start = time.perf_counter()
+
+    connection = psycopg2.connect(dsn)
+    with connection.cursor() as cursor:
+        if args.reset:
+            cursor.execute(f"TRUNCATE {', '.join(TABLES_TO_RESET)} RESTART IDENTITY CASCADE")
+        else:
+            cursor.execute("SELECT EXISTS (SELECT 1 FROM users)")
+            if cursor.fetchone()[0]:
+                parser.error("La base ya tiene datos: los ids se generan de forma explícita, usa --reset.")
+        load_base_tables(cursor, volumes)
+    connection.commit()
+    print(f"Tablas base cargadas en {time.perf_counter() - start:.1f}s")
+
+    chunks = plan_chunks(volumes)
+    totals = {table: 0 for table in TABLE_WRITERS}
+    # "spawn" evita heredar la conexión abierta del proceso principal
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(args.workers, initializer=_init_worker, initargs=(dsn, volumes)) as pool:
+        for table, rows in pool.imap_unordered(_load_chunk, chunks):
+            totals[table] += rows
+            loaded = sum(totals.values())
+            print(f"  {loaded:,} filas ({loaded / (time.perf_counter() - start):,.0f} filas/s)", end="\r")
+    print(" " * 60, end="\r")
+
+    with connection.cursor() as cursor:
+        finalize(cursor)
+    connection.commit()
+    # Estadísticas frescas para el planificador
+    connection.autocommit = True
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    connection.close()
+
+    for table, rows in totals.items():
+        print(f"  {table}: {rows:,}")
+    print(f"Datos generados en {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+# benchmarks/explain_check.py
+# Comprueba el plan de ejecución de las consultas CRUD calientes contra lo esperado
+# (qué índice deben usar y que no aparezcan Seq Scan ni Sort sobre tablas grandes).
+# Ejecuta las funciones CRUD asíncronas (app/crud/aio, las que usan los endpoints), captura
+# el SQL que generan y lo pasa por EXPLAIN.
+#
+#   python -m benchmarks.explain_check            # exit 1 si algún plan no cumple
+#   python -m benchmarks.explain_check --analyze  # además mide el tiempo real de cada consulta
+#   python -m benchmarks.explain_check --analyze --output benchmarks/results/planes.json
+#
+# En tablas particionadas (ai_logs) el plan nombra los índices y tablas de cada partición;
+# se comparan por su raíz (pg_partition_root), es decir, por el índice/tabla de ai_logs.
+#
+# Pensado para una base poblada con benchmarks/seed.py o benchmarks/datagen.py: con
+# tablas casi vacías PostgreSQL prefiere Seq Scan y los checks no son representativos.
+import argparse
+import asyncio
+import json
+import sys
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings, to_async_database_url
+from app.crud.aio import ai_log as crud_ai_log
+from app.crud.aio import kpi as crud_kpi
+from app.crud.aio import product as crud_product
+from app.crud.aio import transaction as crud_transaction
+from app.models import user, profile, category, kpi, kpi_history # Registra los mappers relacionados
+from app.schemas.kpi import KpiFilters
+
+
+@dataclass
+class Samples:
+    """Valores reales de la base para parametrizar las consultas."""
+    owner_id: int
+    category_id: int
+    product_id: int
+    user_id: int
+    feature_area: str
+    kpi_id: int
+    kpi_category: Optional[kpi.KpiCategoryDB]
+
+
+@dataclass
+class Check:
+    name: str
+    run: Callable[[AsyncSession, Samples], Awaitable[object]]
+    # Índice que debe aparecer en el plan de la consulta principal
+    expected_index: Optional[str] = None
+    # Tablas grandes que no deben recorrerse enteras
+    no_seq_scan: Tuple[str, ...] = ()
+    # El orden debe salir del índice, sin nodo Sort
+    no_sort: bool = True
+
+
+@dataclass
+class PlanSummary:
+    nodes: List[dict] = field(default_factory=list)
+    execution_ms: Optional[float] = None
+    # Partición (índice o tabla) -> raíz de su árbol de particiones
+    roots: Dict[str, str] = field(default_factory=dict)
+
+    def _root(self, name: str) -> str:
+        return self.roots.get(name, name)
+
+    def indexes(self) -> List[str]:
+        return list(dict.fromkeys(self._root(n["Index Name"]) for n in self.nodes if "Index Name" in n))
+
+    def seq_scans(self) -> List[str]:
+        return [self._root(n.get("Relation Name", "?")) for n in self.nodes if n["Node Type"] == "Seq Scan"]
+
+    def has_sort(self) -> bool:
+        return any(n["Node Type"] in ("Sort", "Incremental Sort") for n in self.nodes)
+
+
+CHECKS = [
+    Check(
+        "productos del usuario",
+        lambda db, s: crud_product.get_products(db, owner_id=s.owner_id, limit=100),
+        expected_index="ix_products_owner_id_id",
+        no_seq_scan=("products",),
+    ),
+    Check(
+        "productos del usuario por categoría",
+        lambda db, s: crud_product.get_products(db, owner_id=s.owner_id, category_id=s.category_id, limit=100),
+        expected_index="ix_products_owner_id_category_id_id",
+        no_seq_scan=("products",),
+    ),
+    Check(
+        "transacciones recientes",
+        lambda db, s: crud_transaction.get_transactions(db, limit=100),
+        expected_index="ix_transactions_timestamp",
+        no_seq_scan=("transactions",),
+    ),
+    Check(
+        "transacciones de un producto",
+        lambda db, s: crud_transaction.get_transactions(db, product_id=s.product_id, limit=100),
+        expected_index="ix_transactions_product_id_timestamp",
+        no_seq_scan=("transactions",),
+    ),
+    Check(
+        "transacciones de un usuario",
+        lambda db, s: crud_transaction.get_transactions(db, user_id=s.user_id, limit=100),
+        expected_index="ix_transactions_user_id_timestamp",
+        no_seq_scan=("transactions",),
+    ),
+    Check(
+        "logs de IA de un usuario",
+        lambda db, s: crud_ai_log.get_logs(db, user_id=s.user_id, limit=100),
+        expected_index="ix_ai_logs_user_id_timestamp",
+        no_seq_scan=("ai_logs",),
+    ),
+    Check(
+        "logs de IA por funcionalidad",
+        lambda db, s: crud_ai_log.get_logs(db, feature_area=s.feature_area, limit=100),
+        expected_index="ix_ai_logs_feature_area_timestamp",
+        no_seq_scan=("ai_logs",),
+    ),
+    Check(
+        "listado de KPIs",
+        lambda db, s: crud_kpi.get_kpis(db, limit=100),
+        expected_index="kpis_pkey",
+        no_seq_scan=("kpis",),
+    ),
+    Check(
+        "KPIs de un usuario",
+        lambda db, s: crud_kpi.get_kpis(db, filters=KpiFilters(owner_id=s.user_id), limit=100),
+        expected_index="ix_kpis_owner_id",
+        no_seq_scan=("kpis",),
+        no_sort=False, # Pocas filas por usuario: se ordenan por id tras el filtro
+    ),
+    Check(
+        "KPIs por categoría",
+        lambda db, s: crud_kpi.get_kpis(db, filters=KpiFilters(category=s.kpi_category), limit=100),
+        expected_index="ix_kpis_category",
+        no_seq_scan=("kpis",),
+        no_sort=False,
+    ),
+    Check(
+        "estadísticas del histórico de un KPI",
+        lambda db, s: crud_kpi.get_kpi_stats(
+            db, kpi_id=s.kpi_id, owner_id=s.user_id, since=datetime.now(timezone.utc) - timedelta(days=settings.AI_CONTEXT_HISTORY_DAYS)
+        ),
+        expected_index="ix_kpi_history_kpi_id_recorded_at",
+        no_seq_scan=("kpi_history",),
+        no_sort=False, # GROUP BY de una sola fila
+    ),
+]
+
+
+@contextmanager
+def capture_statements(engine) -> Iterator[List[Tuple[str, object]]]:
+    captured: List[Tuple[str, object]] = []
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        yield captured
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+
+def walk(node: dict) -> Iterator[dict]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from walk(child)
+
+
+async def explain(engine: AsyncEngine, statement: str, parameters, analyze: bool) -> PlanSummary:
+    options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+    async with engine.connect() as conn:
+        # El SQL capturado ya está en el formato del driver (asyncpg, $1...)
+        raw = (await conn.exec_driver_sql(f"EXPLAIN ({options}) {statement}", parameters)).scalar()
+        plan = (raw if isinstance(raw, list) else json.loads(raw))[0]
+        summary = PlanSummary(nodes=list(walk(plan["Plan"])), execution_ms=plan.get("Execution Time"))
+        names = {n[key] for n in summary.nodes for key in ("Index Name", "Relation Name") if key in n}
+        if names:
+            result = await conn.execute(
+                text(
+                    "SELECT name, pg_partition_root(to_regclass(name))::regclass::text AS root "
+                    "FROM unnest(CAST(:names AS text[])) AS name"
+                ),
+                {"names": sorted(names)},
+            )
+            summary.roots = {row.name: row.root for row in result if row.root}
+        await conn.rollback()
+    return summary
+
+
+async def load_samples(engine: AsyncEngine) -> Samples:
+    async with engine.connect() as conn:
+        owner_id, category_id = (await conn.execute(text(
+            "SELECT owner_id, category_id FROM products WHERE category_id IS NOT NULL "
+            "GROUP BY owner_id, category_id ORDER BY count(*) DESC LIMIT 1"
+        ))).one()
+        product_id = (await conn.execute(text(
+            "SELECT product_id FROM transactions GROUP BY product_id ORDER BY count(*) DESC LIMIT 1"
+        ))).scalar()
+        user_id = (await conn.execute(text("SELECT id FROM users ORDER BY id LIMIT 1"))).scalar()
+        feature_area = (await conn.execute(text("SELECT feature_area FROM ai_logs LIMIT 1"))).scalar() or "InventoryRestock"
+        kpi_id = (await conn.execute(text(
+            "SELECT kpi_id FROM kpi_history GROUP BY kpi_id ORDER BY count(*) DESC LIMIT 1"
+        ))).scalar()
+        kpi_category = (await conn.execute(select(kpi.KPI.category).limit(1))).scalar() # KpiCategoryDB
+    return Samples(owner_id, category_id, product_id or 1, user_id, feature_area, kpi_id or 1, kpi_category)
+
+
+async def run_check(
+    engine: AsyncEngine, db: AsyncSession, check: Check, samples: Samples, analyze: bool
+) -> Dict[str, Any]:
+    with capture_statements(engine.sync_engine) as captured:
+        await check.run(db, samples)
+    await db.rollback()
+    # La primera SELECT es la consulta principal; las siguientes son cargas de relaciones
+    statement, parameters = next((s, p) for s, p in captured if s.lstrip().upper().startswith("SELECT"))
+    plan = await explain(engine, statement, parameters, analyze)
+
+    problems = []
+    if check.expected_index and check.expected_index not in plan.indexes():
+        problems.append(f"no usa {check.expected_index} (usa: {', '.join(plan.indexes()) or 'ninguno'})")
+    for table in plan.seq_scans():
+        if table in check.no_seq_scan:
+            problems.append(f"Seq Scan sobre {table}")
+    if check.no_sort and plan.has_sort():
+        problems.append("ordena en memoria (nodo Sort)")
+
+    timing = f" [{plan.execution_ms:.2f} ms]" if plan.execution_ms is not None else ""
+    status = "OK  " if not problems else "FAIL"
+    print(f"{status} {check.name}{timing}")
+    print(f"     índices: {', '.join(plan.indexes()) or '-'}")
+    for problem in problems:
+        print(f"     -> {problem}")
+    return {
+        "name": check.name, "ok": not problems, "problems": problems,
+        "indexes": plan.indexes(), "execution_ms": plan.execution_ms,
+    }
+
+
+async def run_checks(database_url: str, analyze: bool) -> List[Dict[str, Any]]:
+    engine = create_async_engine(to_async_database_url(database_url))
+    try:
+        samples = await load_samples(engine)
+        async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+            return [await run_check(engine, db, check, samples, analyze) for check in CHECKS]
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Verifica los planes de las consultas CRUD.")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--analyze", action="store_true", help="Usa EXPLAIN ANALYZE (ejecuta las consultas)")
+    parser.add_argument("--output", help="Guarda el resultado (índices y tiempos por consulta) en este JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_checks(args.database_url, args.analyze))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"analyze": args.analyze, "checks": results}, f, indent=2, ensure_ascii=False)
+    failed = sum(not result["ok"] for result in results)
+    print(f"\n{len(results) - failed}/{len(results)} planes cumplen lo esperado.")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# benchmarks/forecast_bench.py
+# Mide el pronóstico de reposición local (app/services/forecasting.py) sin base de datos:
+# genera el historial diario de salidas de N productos (mitad con demanda regular, mitad
+# intermitente) y cronometra el cálculo de todos a la vez. Informa también del error
+# de la demanda estimada frente a la real con la que se generó el historial.
+#
+#   python -m benchmarks.forecast_bench --products 100 1000 5000 --days 180
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.forecasting import forecast_demand, restock_plan
+
+
+def synthetic_history(products: int, days: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    rate = rng.uniform(0.5, 20.0, products) # Demanda diaria real
+    intermittent = np.arange(products) % 2 == 1
+    # Intermitentes: salidas con probabilidad p y tamaño rate/p (misma demanda media)
+    probability = np.where(intermittent, rng.uniform(0.05, 0.4, products), 1.0)
+    occurs = rng.random((products, days)) < probability[:, None]
+    sizes = rng.poisson((rate / probability)[:, None], (products, days))
+    return occurs * sizes, rate, intermittent
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark del pronóstico de reposición local.")
+    parser.add_argument("--products", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--days", type=int, default=settings.FORECAST_HISTORY_DAYS)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"Historial de {args.days} días, mediana de {args.repeat} repeticiones")
+    for products in args.products:
+        history, real_rate, intermittent = synthetic_history(products, args.days)
+        stock = np.zeros(products)
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            demand = forecast_demand(history, settings.FORECAST_ALPHA)
+            restock_plan(demand, stock, settings.FORECAST_HORIZON_DAYS, settings.FORECAST_SERVICE_LEVEL_Z)
+            timings.append((time.perf_counter() - started) * 1000)
+        error = np.abs(demand.rate - real_rate) / real_rate
+        print(
+            f"  {products:>6} productos  {statistics.median(timings):8.2f} ms"
+            f"  error medio regular {np.mean(error[~intermittent]):6.1%}"
+            f"  intermitente {np.mean(error[intermittent]):6.1%}"
+            f"  (Croston en {np.mean(demand.croston[intermittent]):.0%} de los intermitentes)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+# benchmarks/loadtest.py
+# Generador de carga asíncrono para la API. Lanza N "usuarios virtuales" contra los
+# endpoints clave durante un tiempo fijo y guarda p50/p95/p99 y throughput en JSON.
+#
+#   python -m benchmarks.loadtest --base-url http://localhost:8000 --concurrency 50 --duration 60 \
+#       --output benchmarks/results/$(git rev-parse --short HEAD).json
+#
+# Requiere haber poblado la base con benchmarks/seed.py (usuario de benchmark).
+import argparse
+import asyncio
+import json
+import math
+import platform
+import subprocess
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.seed import BENCH_EMAIL, BENCH_PASSWORD
+
+API_PREFIX = "/api/v1"
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: str
+    # Construye kwargs extra para httpx (json, data...) en cada petición
+    payload: Optional[Callable[[], dict]] = None
+    authenticated: bool = True
+
+
+@dataclass
+class ScenarioResult:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    status_codes: Dict[int, int] = field(default_factory=dict)
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "auth_token": Scenario(
+        "auth_token", "POST", f"{API_PREFIX}/auth/token",
+        payload=lambda: {"data": {"username": BENCH_EMAIL, "password": BENCH_PASSWORD}},
+        authenticated=False,
+    ),
+    "kpis_list": Scenario("kpis_list", "GET", f"{API_PREFIX}/kpis/?limit=100"),
+    "products_list": Scenario("products_list", "GET", f"{API_PREFIX}/inventory/products/?limit=100"),
+    "products_by_category": Scenario("products_by_category", "GET", f"{API_PREFIX}/inventory/products/?category_id=1&limit=100"),
+    "transactions_list": Scenario("transactions_list", "GET", f"{API_PREFIX}/inventory/transactions/?limit=100"),
+    "transactions_by_product": Scenario(
+        "transactions_by_product", "GET", f"{API_PREFIX}/inventory/transactions/?product_id=1&limit=100"
+    ),
+    "ai_advice": Scenario(
+        "ai_advice", "POST", f"{API_PREFIX}/ai/advice",
+        payload=lambda: {"json": {"context": {"product_id": 1, "current_stock": 5, "sales_last_30d": 50}}},
+    ),
+}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Percentil por rango más cercano (los valores deben venir ordenados)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(result: ScenarioResult, elapsed: float) -> dict:
+    values = sorted(result.latencies)
+    count = len(values)
+    return {
+        "requests": count,
+        "errors": result.errors,
+        "status_codes": {str(code): n for code, n in sorted(result.status_codes.items())},
+        "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(values) / count * 1000, 2) if count else 0.0,
+            "p50": round(percentile(values, 50) * 1000, 2),
+            "p95": round(percentile(values, 95) * 1000, 2),
+            "p99": round(percentile(values, 99) * 1000, 2),
+            "max": round(values[-1] * 1000, 2) if count else 0.0,
+        },
+    }
+
+
+async def get_token(client: httpx.AsyncClient) -> str:
+    response = await client.post(
+        f"{API_PREFIX}/auth/token", data={"username": BENCH_EMAIL, "password": BENCH_PASSWORD}
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def collect_scenario(
+    client: httpx.AsyncClient, scenario: Scenario, token: str, concurrency: int, duration: float, warmup: float
+) -> ScenarioResult:
+    """Ejecuta el escenario y devuelve las medidas en bruto (para poder combinar varios procesos)."""
+    result = ScenarioResult()
+    headers = {"Authorization": f"Bearer {token}"} if scenario.authenticated else {}
+    deadline_warmup = time.perf_counter() + warmup
+    deadline = deadline_warmup + duration
+
+    async def virtual_user() -> None:
+        while True:
+            start = time.perf_counter()
+            if start >= deadline:
+                return
+            kwargs = scenario.payload() if scenario.payload else {}
+            try:
+                response = await client.request(scenario.method, scenario.path, headers=headers, **kwargs)
+                status = response.status_code
+            except httpx.HTTPError:
+                status = 0
+            end = time.perf_counter()
+            if start < deadline_warmup:
+                continue # Las peticiones de calentamiento no cuentan
+            result.status_codes[status] = result.status_codes.get(status, 0) + 1
+            if status == 0 or status >= 400:
+                result.errors += 1
+            else:
+                result.latencies.append(end - start)
+
+    await asyncio.gather(*(virtual_user() for _ in range(concurrency)))
+    return result
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, scenario: Scenario, token: str, concurrency: int, duration: float, warmup: float
+) -> dict:
+    result = await collect_scenario(client, scenario, token, concurrency, duration, warmup)
+    return summarize(result, duration)
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main_async(args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        token = await get_token(client)
+        results = {}
+        for name in args.scenarios:
+            print(f"> {name}: {args.concurrency} usuarios durante {args.duration}s...")
+            results[name] = await run_scenario(
+                client, SCENARIOS[name], token, args.concurrency, args.duration, args.warmup
+            )
+            latency = results[name]["latency_ms"]
+            print(
+                f"  {results[name]['throughput_rps']} req/s | p50 {latency['p50']}ms "
+                f"p95 {latency['p95']}ms p99 {latency['p99']}ms | errores {results[name]['errors']}"
+            )
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "base_url": args.base_url,
+            "concurrency": args.concurrency,
+            "duration_seconds": args.duration,
+            "warmup_seconds": args.warmup,
+            "python": platform.python_version(),
+        },
+        "scenarios": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Prueba de carga de la API de VectorKPI.")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30.0, help="Segundos medidos por escenario")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Segundos de calentamiento no medidos")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--output", help="Ruta del informe JSON (por defecto se imprime)")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+        print(f"Informe guardado en {args.output}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# benchmarks/mock_ai_server.py
+# Servidor de IA falso, compatible con la API de chat completions de OpenAI, para probar
+# el cliente y medir la app sin depender (ni pagar) al proveedor real.
+#
+#   python -m benchmarks.mock_ai_server --port 9100 --latency-ms 300 --jitter-ms 50 --error-rate 0.01
+#   AI_PROVIDER=openai AI_BASE_URL=http://127.0.0.1:9100/v1 uvicorn app.main:app
+#
+# GET /stats devuelve cuántas peticiones y conexiones TCP distintas ha recibido: con el
+# cliente compartido el número de conexiones se queda en el tamaño del pool.
+# Con "stream": true responde por SSE repartiendo la latencia entre los fragmentos;
+# "streams_cancelled" cuenta los streams que el cliente cortó antes de terminar.
+import argparse
+import asyncio
+import json
+import random
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+STATS = {"requests": 0, "errors": 0, "streams_cancelled": 0, "connections": set()}
+STREAM_CHUNKS = 10
+CONFIG = {"latency_ms": 300.0, "jitter_ms": 0.0, "error_rate": 0.0}
+
+
+async def chat_completions(request: Request):
+    STATS["requests"] += 1
+    STATS["connections"].add(request.client) # (host, puerto) identifica la conexión TCP
+    payload = await request.json()
+    delay = max(CONFIG["latency_ms"] + random.uniform(-CONFIG["jitter_ms"], CONFIG["jitter_ms"]), 0.0) / 1000
+    if payload.get("stream"):
+        await asyncio.sleep(delay / STREAM_CHUNKS) # Tiempo hasta el primer fragmento
+    else:
+        await asyncio.sleep(delay)
+    if random.random() < CONFIG["error_rate"]:
+        STATS["errors"] += 1
+        return JSONResponse({"error": {"message": "mock overloaded"}}, status_code=503)
+
+    prompt = payload["messages"][-1]["content"]
+    content = json.dumps({
+        "suggestion": {"restock_quantity": 10 + len(prompt) % 40, "confidence": 0.8},
+        "explanation": "Respuesta del servidor de IA de prueba.",
+    })
+    usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": 20, "total_tokens": len(prompt) // 4 + 20}
+    if payload.get("stream"):
+        return StreamingResponse(_stream(content, usage, delay), media_type="text/event-stream")
+    return JSONResponse({
+        "id": f"mock-{STATS['requests']}",
+        "object": "chat.completion",
+        "model": payload.get("model", "mock"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": usage,
+    })
+
+
+async def _stream(content: str, usage: dict, delay: float):
+    size = -(-len(content) // STREAM_CHUNKS)
+    finished = False
+    try:
+        for start in range(0, len(content), size):
+            if start:
+                await asyncio.sleep(delay / STREAM_CHUNKS)
+            chunk = {"choices": [{"index": 0, "delta": {"content": content[start:start + size]}}]}
+            yield f"data: {json.dumps(chunk)}\n\n"
+        yield f"data: {json.dumps({'choices': [], 'usage': usage})}\n\n"
+        yield "data: [DONE]\n\n"
+        finished = True
+    finally:
+        if not finished:
+            STATS["streams_cancelled"] += 1
+
+
+async def stats(request: Request) -> JSONResponse:
+    return JSONResponse({
+        "requests": STATS["requests"],
+        "errors": STATS["errors"],
+        "streams_cancelled": STATS["streams_cancelled"],
+        "connections": len(STATS["connections"]),
+    })
+
+
+app = Starlette(routes=[
+    Route("/v1/chat/completions", chat_completions, methods=["POST"]),
+    Route("/stats", stats),
+])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Servidor de IA de prueba (API tipo OpenAI).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    CONFIG.update(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# benchmarks/scaling.py
+# Mide cómo escala el throughput con el número de workers de gunicorn (gunicorn.conf.py).
+# Para cada valor de --workers arranca el servidor, lanza la carga desde varios procesos
+# cliente (un solo proceso de httpx se satura antes que varios workers) y lo detiene con
+# SIGTERM, como en un despliegue.
+#
+#   python -m benchmarks.scaling --workers 1 2 4 8 --duration 20 --output benchmarks/results/escalado.json
+#
+# Requiere la base poblada con benchmarks/seed.py. Para que el resultado mida el servidor y no
+# la máquina, conviene dejar CPUs libres para los clientes (o lanzarlos desde otra máquina
+# con benchmarks/loadtest.py).
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from multiprocessing import get_context
+from typing import List, Tuple
+
+import httpx
+
+from benchmarks.loadtest import (
+    API_PREFIX, SCENARIOS, ScenarioResult, collect_scenario, git_revision, summarize,
+)
+from benchmarks.seed import BENCH_EMAIL, BENCH_PASSWORD
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_server(workers: int, port: int) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update({
+        "WEB_CONCURRENCY": str(workers),
+        "GUNICORN_BIND": f"127.0.0.1:{port}",
+        "GUNICORN_MAX_REQUESTS": "0", # Sin reciclado durante la medida
+        "GUNICORN_ACCESS_LOG": "",
+    })
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app.main:app"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_until_ready(base_url: str, server: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"gunicorn terminó al arrancar (código {server.returncode})")
+        try:
+            if httpx.get(f"{base_url}/", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"El servidor no respondió en {timeout}s")
+
+
+def stop_server(server: subprocess.Popen) -> None:
+    server.send_signal(signal.SIGTERM)
+    try:
+        server.wait(timeout=60)
+    except subprocess.TimeoutExpired:
+        server.kill()
+
+
+def get_token(base_url: str) -> str:
+    response = httpx.post(
+        f"{base_url}{API_PREFIX}/auth/token", data={"username": BENCH_EMAIL, "password": BENCH_PASSWORD}
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def client_process(job: Tuple[str, str, str, int, float, float]) -> ScenarioResult:
+    """Un proceso cliente: `concurrency` usuarios virtuales sobre un escenario."""
+    base_url, scenario_name, token, concurrency, duration, warmup = job
+
+    async def run() -> ScenarioResult:
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+            return await collect_scenario(client, SCENARIOS[scenario_name], token, concurrency, duration, warmup)
+
+    return asyncio.run(run())
+
+
+def merge(results: List[ScenarioResult]) -> ScenarioResult:
+    merged = ScenarioResult()
+    for result in results:
+        merged.latencies.extend(result.latencies)
+        merged.errors += result.errors
+        for status, count in result.status_codes.items():
+            merged.status_codes[status] = merged.status_codes.get(status, 0) + count
+    return merged
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Escalado del throughput según el número de workers.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=["kpis_list", "transactions_list"])
+    parser.add_argument("--concurrency-per-worker", type=int, default=16, help="Usuarios virtuales por worker")
+    parser.add_argument("--client-processes", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--output", help="Ruta del informe JSON")
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    runs = {}
+    with get_context("spawn").Pool(args.client_processes) as pool:
+        for workers in args.workers:
+            print(f"> {workers} worker(s)")
+            server = start_server(workers, args.port)
+            try:
+                wait_until_ready(base_url, server)
+                token = get_token(base_url)
+                per_process = max(1, workers * args.concurrency_per_worker // args.client_processes)
+                runs[workers] = {}
+                for name in args.scenarios:
+                    job = (base_url, name, token, per_process, args.duration, args.warmup)
+                    summary = summarize(merge(pool.map(client_process, [job] * args.client_processes)), args.duration)
+                    runs[workers][name] = summary
+                    print(f"  {name}: {summary['throughput_rps']} req/s | p95 {summary['latency_ms']['p95']}ms "
+                          f"| errores {summary['errors']}")
+            finally:
+                stop_server(server)
+
+    # Speedup respecto a la primera configuración y eficiencia por worker
+    base_workers = args.workers[0]
+    print(f"\n{'escenario':<24}{'workers':>8}{'req/s':>10}{'speedup':>9}{'eficiencia':>12}")
+    for name in args.scenarios:
+        base_rps = runs[base_workers][name]["throughput_rps"] or 1.0
+        for workers in args.workers:
+            summary = runs[workers][name]
+            speedup = summary["throughput_rps"] / base_rps
+            efficiency = speedup / (workers / base_workers)
+            summary["speedup"] = round(speedup, 2)
+            summary["efficiency"] = round(efficiency, 2)
+            print(f"{name:<24}{workers:>8}{summary['throughput_rps']:>10}{speedup:>9.2f}{efficiency:>12.0%}")
+
+    if args.output:
+        report = {
+            "meta": {
+                "git_revision": git_revision(),
+                "cpus": os.cpu_count(),
+                "concurrency_per_worker": args.concurrency_per_worker,
+                "client_processes": args.client_processes,
+                "duration_seconds": args.duration,
+            },
+            "runs": {str(workers): scenarios for workers, scenarios in runs.items()},
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Informe guardado en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# benchmarks/seed.py
+# Puebla una base de datos PostgreSQL LOCAL con volúmenes realistas para las pruebas
+# de carga. ¡No ejecutar contra producción! Con --reset vacía las tablas antes.
+#
+#   python -m benchmarks.seed --users 50 --products 5000 --transactions 1000000 --kpis 500 --reset
+#
+# Crea además el usuario de benchmark (BENCH_EMAIL / BENCH_PASSWORD), dueño de una
+# parte de los productos para que los listados devuelvan páginas completas.
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import create_engine, insert, text
+
+from app.core.config import settings
+from app.db.base import Base
+from app.models import user, profile, product, category, transaction, kpi, kpi_history, ai_log # Registra las tablas
+from app.models.kpi import KpiCategoryDB, KpiTrendDB
+from app.models.transaction import TransactionType
+from app.security.core import get_password_hash
+
+BENCH_EMAIL = "bench@vectorkpi.com"
+BENCH_PASSWORD = "BenchPassword123"
+BATCH_SIZE = 10_000
+
+TABLES_TO_RESET = ["transactions", "products", "categories", "kpi_history", "kpis", "ai_logs", "profiles", "users"]
+
+
+def _batched_insert(conn, table, rows_iter, total: int, label: str) -> None:
+    batch, done, start = [], 0, time.perf_counter()
+    for row in rows_iter:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            conn.execute(insert(table), batch)
+            done += len(batch)
+            batch.clear()
+            print(f"  {label}: {done}/{total} ({done / (time.perf_counter() - start):,.0f} filas/s)", end="\r")
+    if batch:
+        conn.execute(insert(table), batch)
+        done += len(batch)
+    print(f"  {label}: {done} filas en {time.perf_counter() - start:.1f}s" + " " * 20)
+
+
+def seed(args) -> None:
+    rng = random.Random(args.seed)
+    engine = create_engine(args.database_url)
+    now = datetime.now(timezone.utc)
+    tables = Base.metadata.tables
+
+    with engine.begin() as conn:
+        if args.reset:
+            conn.execute(text(f"TRUNCATE {', '.join(TABLES_TO_RESET)} RESTART IDENTITY CASCADE"))
+
+        # --- Usuarios (el primero es el de benchmark) ---
+        # Hashear una sola vez: bcrypt es deliberadamente lento
+        bench_hash = get_password_hash(BENCH_PASSWORD)
+        other_hash = get_password_hash("SeedPassword123")
+        user_rows = [{"email": BENCH_EMAIL, "hashed_password": bench_hash, "is_active": True}]
+        user_rows += [
+            {"email": f"user{i}@seed.vectorkpi.com", "hashed_password": other_hash, "is_active": True}
+            for i in range(1, args.users)
+        ]
+        user_ids = [row.id for row in conn.execute(insert(tables["users"]).returning(tables["users"].c.id), user_rows)]
+        conn.execute(insert(tables["profiles"]), [{"user_id": uid, "full_name": f"Usuario {uid}"} for uid in user_ids])
+        print(f"  users: {len(user_ids)}")
+
+        # --- Categorías ---
+        category_rows = [{"name": f"Categoría {i}", "description": "Generada para benchmark"} for i in range(args.categories)]
+        category_ids = [row.id for row in conn.execute(insert(tables["categories"]).returning(tables["categories"].c.id), category_rows)]
+
+        # --- Productos (una fracción pertenece al usuario de benchmark) ---
+        bench_user_id = user_ids[0]
+        product_rows = [
+            {
+                "name": f"Producto {i}",
+                "description": None,
+                "price": Decimal(rng.randint(100, 100_000)) / 100,
+                "stock": rng.randint(0, 5_000),
+                "sku": f"SKU-{i:08d}",
+                "category_id": rng.choice(category_ids),
+                "owner_id": bench_user_id if rng.random() < args.bench_share else rng.choice(user_ids),
+            }
+            for i in range(args.products)
+        ]
+        product_ids = [row.id for row in conn.execute(insert(tables["products"]).returning(tables["products"].c.id), product_rows)]
+        print(f"  products: {len(product_ids)}")
+
+        # --- Transacciones repartidas en el último año ---
+        types = [TransactionType.IN, TransactionType.OUT, TransactionType.ADJUSTMENT]
+        weights = [0.35, 0.6, 0.05]
+
+        def transaction_rows():
+            for _ in range(args.transactions):
+                yield {
+                    "product_id": rng.choice(product_ids),
+                    "user_id": rng.choice(user_ids),
+                    "quantity": rng.randint(1, 200),
+                    "type": rng.choices(types, weights)[0],
+                    "reason": None,
+                    "timestamp": now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600)),
+                }
+
+        _batched_insert(conn, tables["transactions"], transaction_rows(), args.transactions, "transactions")
+
+        # --- KPIs ---
+        kpi_categories = list(KpiCategoryDB)
+        trends = list(KpiTrendDB)
+        kpi_rows = [
+            {
+                "name": f"KPI {i}",
+                "value": Decimal(rng.randint(0, 10_000)) / 100,
+                "target": Decimal(rng.randint(0, 10_000)) / 100,
+                "unit": rng.choice(["%", "bbl/día", "USD/bbl", "días"]),
+                "category": rng.choice(kpi_categories),
+                "trend": rng.choice(trends),
+                "owner_id": rng.choice(user_ids),
+            }
+            for i in range(args.kpis)
+        ]
+        conn.execute(insert(tables["kpis"]), kpi_rows)
+        print(f"  kpis: {len(kpi_rows)}")
+
+    with engine.connect() as conn:
+        # Estadísticas frescas para que el planificador elija bien los planes
+        conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("ANALYZE"))
+    engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Puebla la base de datos local para benchmarks.")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--categories", type=int, default=40)
+    parser.add_argument("--products", type=int, default=5_000)
+    parser.add_argument("--transactions", type=int, default=1_000_000)
+    parser.add_argument("--kpis", type=int, default=500)
+    parser.add_argument("--bench-share", type=float, default=0.2, help="Fracción de productos del usuario de benchmark")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla: mismos argumentos = mismos datos")
+    parser.add_argument("--reset", action="store_true", help="Vacía las tablas antes de poblar")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    seed(args)
+    print(f"Datos generados en {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# benchmarks/serialization_bench.py
+# Mide el coste de serializar una página de listado (por defecto 500 filas) en cada
+# modo de FAST_JSON_MODE, sin base de datos: construye objetos ORM en memoria con
+# las relaciones ya cargadas, como los devuelve el CRUD.
+#
+#   python -m benchmarks.serialization_bench --rows 500 --repeat 50
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Callable, List
+
+from pydantic import TypeAdapter
+
+from app.core import fast_json
+from app.core.config import settings
+from app.models.category import Category
+from app.models.kpi import KPI, KpiCategoryDB, KpiTrendDB
+from app.models.product import Product
+from app.models.profile import Profile
+from app.models.transaction import Transaction, TransactionType
+from app.models.user import User
+from app.models import ai_log, kpi_history # Registra los mappers relacionados
+from app.schemas.kpi import KpiRead
+from app.schemas.product import ProductRead
+from app.schemas.transaction import TransactionRead
+
+
+def build_transactions(rows: int) -> List[Transaction]:
+    now = datetime.now(timezone.utc)
+    category = Category(id=1, name="Crudo Pesado", description="Alta densidad", created_at=now)
+    user = User(id=1, email="bench@vectorkpi.com", is_active=True, created_at=now)
+    user.profile = Profile(id=1, user_id=1, full_name="Usuario Bench", created_at=now)
+    products = [
+        Product(
+            id=i, name=f"Producto {i}", price=Decimal("85.50"), stock=1000 + i, sku=f"SKU-{i:08d}",
+            category_id=1, category=category, owner_id=1, created_at=now,
+        )
+        for i in range(1, 51)
+    ]
+    return [
+        Transaction(
+            id=i, product_id=products[i % 50].id, product=products[i % 50], quantity=10 + i % 90,
+            type=TransactionType.OUT, reason=None, timestamp=now - timedelta(minutes=i), user_id=1, user=user,
+        )
+        for i in range(rows)
+    ]
+
+
+def build_products(rows: int) -> List[Product]:
+    now = datetime.now(timezone.utc)
+    category = Category(id=1, name="Crudo Pesado", description="Alta densidad", created_at=now)
+    return [
+        Product(
+            id=i, name=f"Producto {i}", description="Generado", price=Decimal("85.50"), stock=i,
+            sku=f"SKU-{i:08d}", category_id=1, category=category, owner_id=1, created_at=now,
+        )
+        for i in range(rows)
+    ]
+
+
+def build_kpis(rows: int) -> List[KPI]:
+    now = datetime.now(timezone.utc)
+    return [
+        KPI(
+            id=i, name=f"KPI {i}", value=Decimal("85.50000"), target=Decimal("90.00000"), unit="%",
+            category=KpiCategoryDB.perforacion, trend=KpiTrendDB.up, owner_id=1, last_updated=now, created_at=now,
+        )
+        for i in range(rows)
+    ]
+
+
+def fastapi_default(adapter: TypeAdapter, rows) -> bytes:
+    """Lo que hace FastAPI con response_model: validar, volcar a tipos JSON y json.dumps."""
+    content = adapter.dump_python(adapter.validate_python(rows, from_attributes=True), mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def with_mode(mode: str, schema, rows) -> Callable[[], bytes]:
+    def render() -> bytes:
+        settings.FAST_JSON_MODE = mode
+        return fast_json.list_response(schema, rows).body
+    return render
+
+
+def timed(func: Callable[[], bytes], repeat: int) -> float:
+    func() # Calentamiento (compila adapters/serializadores)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de serialización de listados.")
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    cases = [
+        ("TransactionRead", TransactionRead, build_transactions(args.rows)),
+        ("ProductRead", ProductRead, build_products(args.rows)),
+        ("KpiRead", KpiRead, build_kpis(args.rows)),
+    ]
+    print(f"Mediana por página de {args.rows} filas ({args.repeat} repeticiones)")
+    for name, schema, rows in cases:
+        adapter = TypeAdapter(List[schema]) # FastAPI también lo crea una vez por ruta
+        baseline = timed(lambda: fastapi_default(adapter, rows), args.repeat)
+        print(f"\n{name}\n  off (FastAPI)  {baseline:8.2f} ms")
+        for mode in ("validated", "trusted"):
+            elapsed = timed(with_mode(mode, schema, rows), args.repeat)
+            print(f"  {mode:<14} {elapsed:8.2f} ms  (x{baseline / elapsed:.1f})")
+
+
+if __name__ == "__main__":
+    main()
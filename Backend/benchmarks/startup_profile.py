@@ -0,0 +1,100 @@
+# benchmarks/startup_profile.py
+# Mide el arranque de un worker: tiempo de importar app.main y de completar el lifespan
+# (tareas de fondo), en procesos nuevos para no falsear el resultado con módulos ya
+# cargados. Con -X importtime desglosa qué paquetes se llevan el tiempo.
+#
+#   python -m benchmarks.startup_profile --runs 5 --top 15
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+# Se ejecuta en el proceso hijo: importa la app y recorre el lifespan completo
+CHILD_CODE = """
+import asyncio, json, time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+
+async def lifespan():
+    async with app.main.app.router.lifespan_context(app.main.app):
+        return time.perf_counter()
+
+ready = asyncio.run(lifespan())
+print(json.dumps({"import_ms": (imported - start) * 1000, "ready_ms": (ready - start) * 1000}))
+"""
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """(módulo, self_us, cumulative_us) de cada línea de -X importtime."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line.split(":", 1)[1].split("|"))
+        modules.append((name, int(self_us), int(cumulative_us)))
+    return modules
+
+
+def by_package(modules: List[Tuple[str, int, int]]) -> Dict[str, float]:
+    """Tiempo propio (self) agregado por paquete de primer nivel, en ms."""
+    totals: Dict[str, float] = defaultdict(float)
+    for name, self_us, _ in modules:
+        totals[name.split(".")[0]] += self_us / 1000
+    return dict(totals)
+
+
+def run_once(env: Dict[str, str]) -> Tuple[dict, List[Tuple[str, int, int]]]:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD_CODE],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    timings = json.loads(completed.stdout.strip().splitlines()[-1])
+    return timings, parse_importtime(completed.stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Perfil de arranque de la aplicación.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Paquetes más costosos a mostrar")
+    parser.add_argument("--output", help="Guarda el resultado en JSON")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    # Sin tareas que necesiten base de datos o SMTP: se mide solo el arranque
+    env.setdefault("EMAIL_OUTBOX_WORKER_ENABLED", "False")
+    env.setdefault("DATABASE_REPLICA_URLS", "")
+
+    import_ms, ready_ms = [], []
+    packages: Dict[str, List[float]] = defaultdict(list)
+    for _ in range(args.runs):
+        timings, modules = run_once(env)
+        import_ms.append(timings["import_ms"])
+        ready_ms.append(timings["ready_ms"])
+        for package, ms in by_package(modules).items():
+            packages[package].append(ms)
+
+    package_medians = sorted(
+        ((name, statistics.median(values)) for name, values in packages.items()), key=lambda item: item[1], reverse=True
+    )
+    result = {
+        "runs": args.runs,
+        "import_ms": round(statistics.median(import_ms), 1),
+        "ready_ms": round(statistics.median(ready_ms), 1),
+        "packages_ms": {name: round(ms, 1) for name, ms in package_medians[: args.top]},
+    }
+    print(f"Importación de app.main: {result['import_ms']} ms | lista (lifespan): {result['ready_ms']} ms  (mediana de {args.runs})")
+    print("Paquetes con más tiempo de importación (self, ms):")
+    for name, ms in result["packages_ms"].items():
+        print(f"  {name:<28}{ms:>8.1f}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# gunicorn.conf.py
+# Perfil de producción: gunicorn como gestor de procesos y workers de uvicorn (ASGI).
+#
+#   gunicorn -c gunicorn.conf.py app.main:app
+#
+# Todo se puede ajustar por variables de entorno (WEB_CONCURRENCY, PORT, GUNICORN_*).
+# Métricas con varios workers: exportar PROMETHEUS_MULTIPROC_DIR apuntando a un directorio
+# vacío y escribible; /metrics agrega entonces los contadores de todos los workers.
+import os
+import shutil
+
+
+def cpu_count() -> int:
+    """CPUs realmente disponibles para el proceso (respeta cgroups/affinity en contenedores)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError: # macOS / Windows
+        return os.cpu_count() or 1
+
+
+# --- Servidor ---
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+worker_class = "uvicorn_worker.UvicornWorker"
+# Los workers son asíncronos: uno por CPU basta para saturarla (no hace falta 2n+1)
+workers = int(os.getenv("WEB_CONCURRENCY", str(cpu_count())))
+backlog = int(os.getenv("GUNICORN_BACKLOG", "2048"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# --- Precarga ---
+# La app se importa una vez en el master y los workers la heredan por fork (copy-on-write):
+# arrancan antes y comparten la memoria de los módulos. Los engines de base de datos no se
+# crean al importar (ver app/db/pool.py), y post_fork descarta cualquiera heredado.
+preload_app = os.getenv("GUNICORN_PRELOAD", "True").lower() == "true"
+
+# --- Reciclado de workers ---
+# Cada worker se reinicia tras ~max_requests peticiones; el jitter evita que todos lo hagan a la vez
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "200"))
+
+# --- Apagado ordenado ---
+# Con SIGTERM el worker deja de aceptar conexiones, termina las peticiones en curso y ejecuta
+# el lifespan (para las tareas de fondo y cierra los pools). Pasado graceful_timeout se mata.
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+# Un worker que no da señales de vida en `timeout` segundos se reinicia
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+
+# --- Logs ---
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-") or None # Vacío desactiva el log de accesos
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def on_starting(server):
+    # Restos de métricas de una ejecución anterior falsearían los contadores
+    multiproc_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def post_fork(server, worker):
+    # Las conexiones de un pool no se pueden compartir entre procesos: cada worker crea las suyas
+    from app.db.session import reset_engines
+    reset_engines()
+
+
+def child_exit(server, worker):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
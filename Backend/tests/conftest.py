@@ -0,0 +1,82 @@
+# tests/conftest.py
+# Pruebas sin PostgreSQL: SQLite en memoria (aiosqlite) para lo que necesita base de datos.
+# Desde Backend/: pip install -r tests/requirements.txt && python -m pytest -q
+import os
+
+# Antes de importar la aplicación: sin tareas de fondo que hablen con la base real
+os.environ.setdefault("EMAIL_OUTBOX_WORKER_ENABLED", "False")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.main  # noqa: F401 (registra todos los modelos en Base.metadata)
+from app.db import session as db_session
+from app.db.base import Base
+from app.services.ai_log_writer import ai_log_writer
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def async_session_factory(monkeypatch):
+    """Base SQLite vacía con todas las tablas; sustituye a db_session.AsyncSessionLocal."""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    monkeypatch.setattr(db_session, "AsyncSessionLocal", factory)
+    yield factory
+    await engine.dispose()
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """
+    TestClient de la aplicación sobre un fichero SQLite (motores síncrono y asíncrono sobre
+    la misma base), con un usuario registrado; las cabeceras de autenticación quedan en
+    `client.auth_headers`.
+    """
+    url = f"sqlite:///{tmp_path / 'test.db'}"
+    sync_engine = create_engine(url, connect_args={"check_same_thread": False})
+    async_engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"))
+    Base.metadata.create_all(sync_engine)
+    session_factory = sessionmaker(bind=sync_engine, autoflush=False)
+    async_session_factory = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    def get_db():
+        with session_factory() as db:
+            yield db
+
+    async def get_async_db():
+        async with async_session_factory() as db:
+            yield db
+
+    application = app.main.app
+    monkeypatch.setitem(application.dependency_overrides, db_session.get_db, get_db)
+    monkeypatch.setitem(application.dependency_overrides, db_session.get_async_db, get_async_db)
+    monkeypatch.setattr(db_session, "SessionLocal", session_factory)
+    monkeypatch.setattr(db_session, "AsyncSessionLocal", async_session_factory)
+    monkeypatch.setattr(ai_log_writer, "fallback_path", str(tmp_path / "ai_logs_fallback.jsonl"))
+    with TestClient(application) as test_client:
+        credentials = {"email": "test@example.com", "password": "12345678"}
+        assert test_client.post("/api/v1/user/", json=credentials).status_code == 201
+        token = test_client.post(
+            "/api/v1/auth/token", data={"username": credentials["email"], "password": credentials["password"]}
+        ).json()["access_token"]
+        test_client.auth_headers = {"Authorization": f"Bearer {token}"}
+        yield test_client
+    sync_engine.dispose()
@@ -0,0 +1,83 @@
+# tests/test_ai_guard.py
+import pytest
+
+from app.services import ai_guard
+from app.services.ai_guard import CLOSED, HALF_OPEN, OPEN, AIUnavailableError, CircuitBreaker
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ai_guard.time, "monotonic", lambda: now[0])
+    return now
+
+
+def _open(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.failure_threshold):
+        breaker.before_call()
+        breaker.record_failure()
+
+
+def test_se_abre_al_llegar_al_umbral(clock):
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_seconds=30)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+
+    breaker.before_call()
+    breaker.record_failure()
+
+    assert breaker.state == OPEN
+    with pytest.raises(AIUnavailableError) as error:
+        breaker.before_call()
+    assert error.value.reason == "circuit_open"
+
+
+def test_un_exito_reinicia_los_fallos(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_seconds=30)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == CLOSED
+
+
+def test_half_open_deja_pasar_una_sola_llamada_de_prueba(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_seconds=30)
+    _open(breaker)
+    clock[0] += 31
+
+    breaker.before_call()
+
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(AIUnavailableError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    breaker.before_call()
+
+
+def test_fallo_en_half_open_vuelve_a_abrir(clock):
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_seconds=30)
+    _open(breaker)
+    clock[0] += 31
+    breaker.before_call()
+
+    breaker.record_failure()
+
+    assert breaker.state == OPEN
+    with pytest.raises(AIUnavailableError):
+        breaker.check()
+
+
+def test_prueba_ignorada_libera_el_turno(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_seconds=30)
+    _open(breaker)
+    clock[0] += 31
+    breaker.before_call()
+
+    breaker.record_ignored()
+
+    assert breaker.state == HALF_OPEN
+    breaker.before_call()
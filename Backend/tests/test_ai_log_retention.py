@@ -0,0 +1,87 @@
+# tests/test_ai_log_retention.py
+from collections import namedtuple
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timezone
+
+import pytest
+
+from app.core.config import settings
+from app.crud.aio import ai_log_partitions as crud_partitions
+from app.crud.aio.ai_log_partitions import LeafPartition
+from app.services import ai_log_retention
+from app.services.ai_log_retention import expired_partitions
+
+NOW = datetime(2026, 10, 19, tzinfo=timezone.utc)
+PARTITIONS = {
+    date(2025, 1, 1): [
+        LeafPartition("ai_logs_y2025m01_kpianalysis", ("KpiAnalysis",), False),
+        LeafPartition("ai_logs_y2025m01_default", None, False),
+    ],
+    date(2025, 11, 1): [LeafPartition("ai_logs_y2025m11_default", None, False)],
+    date(2026, 10, 1): [LeafPartition("ai_logs_y2026m10_default", None, False)],
+}
+
+
+def test_borra_subparticiones_vencidas_y_el_mes_vacio():
+    leaves, months = expired_partitions(PARTITIONS, NOW, 365, {"KpiAnalysis": 90})
+
+    assert leaves == ["ai_logs_y2025m01_kpianalysis", "ai_logs_y2025m01_default"]
+    assert months == ["ai_logs_y2025m01"]
+
+
+def test_la_default_espera_al_area_mas_exigente_sin_subparticion():
+    # 2025-11 no tiene subpartición de KpiAnalysis: su DEFAULT la contiene
+    assert expired_partitions(PARTITIONS, NOW, 30, {"KpiAnalysis": 730}) == (["ai_logs_y2025m01_default"], [])
+    # 0 = sin límite
+    assert expired_partitions(PARTITIONS, NOW, 30, {"KpiAnalysis": 0}) == (["ai_logs_y2025m01_default"], [])
+
+
+def test_el_mes_en_curso_no_se_borra_aunque_este_vacio():
+    partitions = {date(2026, 10, 1): []}
+
+    assert expired_partitions(partitions, NOW, 1, {}) == ([], [])
+
+
+def test_feature_retention(monkeypatch):
+    monkeypatch.setattr(settings, "AI_LOG_RETENTION_BY_FEATURE", " InventoryRestock=90 , KpiAnalysis=0,")
+
+    assert ai_log_retention.feature_retention() == {"InventoryRestock": 90, "KpiAnalysis": 0}
+
+
+def test_archivo_de_payloads_ida_y_vuelta(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "AI_LOG_ARCHIVE_DIR", str(tmp_path))
+    Row = namedtuple("Row", "id timestamp input_data output_data")
+    rows = [Row(i, NOW, "x" * 5000 + str(i), "ñ" + str(i)) for i in range(10, 13)]
+
+    refs = ai_log_retention.write_archive("ai_logs_y2025m01_default", rows)
+
+    assert [ref for _, _, ref in refs] == [f"ai_logs_y2025m01_default/10-12.jsonl.gz:{n}" for n in (1, 2, 3)]
+    assert ai_log_retention.load_archived_payload(refs[1][2]) == {"input_data": "x" * 5000 + "11", "output_data": "ñ11"}
+
+
+class FakeSession:
+    @asynccontextmanager
+    async def begin_nested(self):
+        yield
+
+
+@pytest.mark.anyio
+async def test_empty_default_pasa_las_filas_a_su_mes(monkeypatch):
+    moved = []
+
+    async def get_default_months(db):
+        return {date(2026, 8, 1): 3, date(2024, 1, 1): 2}
+
+    async def move_default_rows(db, month, features):
+        if month.year == 2024:
+            raise RuntimeError("bloqueo")
+        moved.append(month)
+        return 3
+
+    monkeypatch.setattr(crud_partitions, "get_default_months", get_default_months)
+    monkeypatch.setattr(crud_partitions, "move_default_rows", move_default_rows)
+
+    await ai_log_retention.empty_default(FakeSession())
+
+    assert moved == [date(2026, 8, 1)]
+    assert ai_log_retention.AI_LOG_DEFAULT_ROWS._value.get() == 2
@@ -0,0 +1,116 @@
+# tests/test_ai_log_writer.py
+import json
+import os
+
+import pytest
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.crud.aio import ai_log as crud_ai_log
+from app.db.query_inspector import assert_max_queries
+from app.models.ai_log import AiLog
+from app.schemas.ai import AiLogCreate
+from app.services.ai_log_writer import AiLogWriter
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeAllocator:
+    """
+    IDs reservados a demanda; None simula la ventana de reintento tras un fallo. En SQLite
+    la base asigna max(id) + 1, así que los reservados van por debajo para no chocar (en
+    PostgreSQL ambos salen de la misma secuencia).
+    """
+
+    def __init__(self, ids):
+        self.ids = list(ids)
+
+    async def next_id(self):
+        return self.ids.pop(0)
+
+
+def _log(n: int) -> AiLogCreate:
+    return AiLogCreate(feature_area="KpiAnalysis", input_data=f"in {n}", metrics={"latency_ms": n})
+
+
+async def _stored(factory):
+    async with factory() as db:
+        return (await db.execute(select(AiLog.id, AiLog.input_data).order_by(AiLog.input_data))).all()
+
+
+@pytest.fixture
+def writer(async_session_factory, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "AI_LOG_BATCH_SIZE", 2)
+    writer = AiLogWriter()
+    writer.fallback_path = str(tmp_path / "ai_logs_fallback.jsonl")
+    return writer
+
+
+@pytest.mark.parametrize("ids", [[None, 501, None], [501, None, 502]])
+async def test_create_logs_mezcla_filas_con_y_sin_id(async_session_factory, ids):
+    rows = [{"feature_area": "KpiAnalysis", "input_data": f"in {n}"} for n in range(len(ids))]
+    for row, log_id in zip(rows, ids):
+        if log_id is not None:
+            row["id"] = log_id
+    async with async_session_factory() as db:
+        await crud_ai_log.create_logs(db, rows=rows)
+
+    stored = await _stored(async_session_factory)
+    assert len(stored) == len(ids)
+    for (log_id, _), expected in zip(stored, ids):
+        if expected is not None:
+            assert log_id == expected  # Los IDs reservados se respetan
+
+
+async def test_flush_inserta_por_lotes_con_y_sin_id(writer, async_session_factory):
+    writer._ids = FakeAllocator([101, None, 50, None, None])
+    returned = [await writer.submit(_log(n)) for n in range(5)]
+
+    assert returned == [101, None, 50, None, None]
+    assert writer.pending == 5
+    await writer.flush()
+
+    assert writer.pending == 0
+    stored = await _stored(async_session_factory)
+    assert [input_data for _, input_data in stored] == [f"in {n}" for n in range(5)]
+    assert {101, 50} <= {log_id for log_id, _ in stored}
+
+
+async def test_replay_del_fichero_de_respaldo_con_y_sin_id(writer, async_session_factory):
+    writer._ids = FakeAllocator([201, None, 150])
+    rows = []
+    for n in range(3):
+        await writer.submit(_log(n))
+        rows.append(writer._queue.get_nowait())
+    await writer._write_fallback(rows)
+
+    await writer.flush()
+
+    stored = await _stored(async_session_factory)
+    assert len(stored) == 3
+    assert {201, 150} <= {log_id for log_id, _ in stored}
+    assert not os.path.exists(writer.fallback_path)
+    assert not os.path.exists(writer.fallback_path + ".replaying")
+
+
+async def test_replay_aparta_las_filas_que_la_base_rechaza(writer, async_session_factory):
+    # feature_area es NOT NULL: reintentar no lo arregla, el fichero no debe bloquear la cola
+    with open(writer.fallback_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"feature_area": None, "timestamp": "2026-10-01T00:00:00+00:00"}) + "\n")
+
+    await writer.flush()
+
+    assert not os.path.exists(writer.fallback_path + ".replaying")
+    assert [name for name in os.listdir(os.path.dirname(writer.fallback_path)) if ".rejected-" in name]
+    assert await _stored(async_session_factory) == []
+
+
+async def test_create_logs_una_sentencia_por_conjunto_de_columnas(async_session_factory):
+    rows = [{"feature_area": "KpiAnalysis", "input_data": f"in {n}"} for n in range(4)]
+    rows[1]["id"], rows[3]["id"] = 701, 702
+
+    async with async_session_factory() as db:
+        with assert_max_queries(2):
+            await crud_ai_log.create_logs(db, rows=rows)
+
+    assert len(await _stored(async_session_factory)) == 4
@@ -0,0 +1,57 @@
+# tests/test_dependencies.py
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.api.dependencies import get_current_user_async_read
+from app.db.base import Base
+from app.db.query_inspector import count_queries
+from app.models.user import User
+from app.security import core as security_core
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def replica_factory():
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def _add_user(factory, email: str) -> None:
+    async with factory() as db:
+        db.add(User(email=email, hashed_password="x"))
+        await db.commit()
+
+
+async def test_el_usuario_se_busca_en_la_replica(async_session_factory, replica_factory):
+    await _add_user(replica_factory, "a@example.com")
+    token = security_core.create_access_token("a@example.com")
+
+    async with replica_factory() as read_db, async_session_factory() as db:
+        user = await get_current_user_async_read(read_db, db, token)
+
+    assert user is not None and user.email == "a@example.com"
+
+
+async def test_alta_reciente_sin_replicar_cae_al_primario(async_session_factory, replica_factory):
+    await _add_user(async_session_factory, "nuevo@example.com")
+    token = security_core.create_access_token("nuevo@example.com")
+
+    async with replica_factory() as read_db, async_session_factory() as db:
+        user = await get_current_user_async_read(read_db, db, token)
+
+    assert user is not None and user.email == "nuevo@example.com"
+
+
+async def test_sin_replica_no_repite_la_consulta(async_session_factory):
+    token = security_core.create_access_token("nadie@example.com")
+
+    async with async_session_factory() as db:
+        with count_queries() as counter:
+            assert await get_current_user_async_read(db, db, token) is None
+
+    assert counter.count == 1
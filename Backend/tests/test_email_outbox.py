@@ -0,0 +1,168 @@
+# tests/test_email_outbox.py
+# Envío real contra un servidor SMTP local (aiosmtpd). La reserva de claim_due_emails usa
+# aritmética de fechas de PostgreSQL, así que aquí se sustituye por una equivalente.
+import socket
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from aiosmtpd.controller import Controller
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.config import settings
+from app.crud import email_outbox as crud_email_outbox
+from app.db.base import Base
+from app.models.email_outbox import EmailOutbox, EmailStatus
+from app.services import email_outbox
+from app.services.email_outbox import EmailOutboxSender
+
+pytestmark = pytest.mark.anyio
+
+
+class RecordingHandler:
+    """Guarda cada mensaje con su sesión SMTP; los primeros `fail_next` DATA responden 451."""
+
+    def __init__(self):
+        self.delivered = []
+        self.fail_next = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.fail_next:
+            self.fail_next -= 1
+            return "451 4.3.0 Inténtelo más tarde"
+        self.delivered.append((session, envelope))
+        return "250 OK"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server(monkeypatch):
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    for name, value in {
+        "EMAILS_ENABLED": True, "MAIL_SERVER": "127.0.0.1", "MAIL_PORT": controller.port,
+        "MAIL_SSL_TLS": False, "MAIL_STARTTLS": False, "USE_CREDENTIALS": False,
+    }.items():
+        monkeypatch.setattr(settings, name, value)
+    yield handler
+    controller.stop()
+
+
+@pytest.fixture
+def session_factory(monkeypatch):
+    # run_in_threadpool: la conexión se usa desde otros hilos
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine, tables=[EmailOutbox.__table__])
+    factory = sessionmaker(bind=engine, autoflush=False)
+    monkeypatch.setattr(email_outbox, "SessionLocal", factory)
+    yield factory
+    engine.dispose()
+
+
+@pytest.fixture
+def sender(session_factory, monkeypatch):
+    def claim(self):
+        # Como claim_due_emails: pendientes vencidos, un intento más y lease
+        with session_factory() as db:
+            emails = list(db.scalars(
+                select(EmailOutbox).where(
+                    EmailOutbox.status == EmailStatus.pending,
+                    EmailOutbox.next_attempt_at <= datetime.now(timezone.utc),
+                )
+            ))
+            for email in emails:
+                email.attempts += 1
+                email.next_attempt_at = datetime.now(timezone.utc) + timedelta(seconds=60)
+            db.commit()
+            for email in emails:
+                db.refresh(email)
+                db.expunge(email)
+            return emails
+
+    monkeypatch.setattr(EmailOutboxSender, "_claim", claim)
+    return EmailOutboxSender()
+
+
+def _enqueue(factory, *recipients):
+    with factory() as db:
+        for recipient in recipients:
+            crud_email_outbox.enqueue_email(db, recipient=recipient, subject="Reset", body="<p>hola</p>")
+        db.execute(update(EmailOutbox).values(next_attempt_at=datetime.now(timezone.utc) - timedelta(seconds=1)))
+        db.commit()
+
+
+def _emails(factory):
+    with factory() as db:
+        return list(db.scalars(select(EmailOutbox).order_by(EmailOutbox.id)))
+
+
+async def test_envia_el_lote_por_una_sola_conexion(smtp_server, session_factory, sender):
+    _enqueue(session_factory, "a@example.com", "b@example.com", "c@example.com")
+
+    assert await sender.process_batch() == 3
+    await sender.close()
+
+    assert [envelope.rcpt_tos for _, envelope in smtp_server.delivered] == [
+        ["a@example.com"], ["b@example.com"], ["c@example.com"]
+    ]
+    sessions = {id(session) for session, _ in smtp_server.delivered}
+    assert len(sessions) == 1
+    assert [email.status for email in _emails(session_factory)] == [EmailStatus.sent] * 3
+
+
+async def test_error_transitorio_se_reintenta(smtp_server, session_factory, sender):
+    _enqueue(session_factory, "a@example.com")
+    smtp_server.fail_next = 1
+
+    await sender.process_batch()
+
+    [email] = _emails(session_factory)
+    assert email.status == EmailStatus.pending
+    assert email.attempts == 1
+    assert "451" in email.last_error
+    assert not smtp_server.delivered
+
+    # Vence el backoff: el siguiente ciclo lo entrega
+    with session_factory() as db:
+        db.execute(update(EmailOutbox).values(next_attempt_at=datetime.now(timezone.utc) - timedelta(seconds=1)))
+        db.commit()
+    await sender.process_batch()
+    await sender.close()
+
+    [email] = _emails(session_factory)
+    assert email.status == EmailStatus.sent
+    assert email.attempts == 2
+    assert [envelope.rcpt_tos for _, envelope in smtp_server.delivered] == [["a@example.com"]]
+
+
+async def test_un_mensaje_invalido_no_frena_el_lote(smtp_server, session_factory, sender):
+    _enqueue(session_factory, "a@example.com", "b@example.com")
+    with session_factory() as db:
+        db.execute(update(EmailOutbox).where(EmailOutbox.id == 1).values(subject="Reset\nBcc: x@example.com"))
+        db.commit()
+
+    await sender.process_batch()
+    await sender.close()
+
+    first, second = _emails(session_factory)
+    assert first.status == EmailStatus.pending and "Mensaje inválido" in first.last_error
+    assert second.status == EmailStatus.sent
+    assert [envelope.rcpt_tos for _, envelope in smtp_server.delivered] == [["b@example.com"]]
+
+
+def test_fail_exhausted_emails(session_factory, monkeypatch):
+    _enqueue(session_factory, "a@example.com", "b@example.com")
+    with session_factory() as db:
+        db.execute(update(EmailOutbox).where(EmailOutbox.id == 1).values(attempts=settings.EMAIL_OUTBOX_MAX_ATTEMPTS))
+        db.commit()
+        assert crud_email_outbox.fail_exhausted_emails(db, max_attempts=settings.EMAIL_OUTBOX_MAX_ATTEMPTS) == 1
+        db.commit()
+
+    assert [email.status for email in _emails(session_factory)] == [EmailStatus.failed, EmailStatus.pending]
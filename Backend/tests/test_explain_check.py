@@ -0,0 +1,27 @@
+# tests/test_explain_check.py
+from benchmarks.explain_check import PlanSummary
+
+
+def test_indices_y_tablas_de_particiones_se_comparan_por_su_raiz():
+    plan = PlanSummary(
+        nodes=[
+            {"Node Type": "Merge Append"},
+            {"Node Type": "Index Scan", "Index Name": "ai_logs_y2026m10_default_user_id_timestamp_idx",
+             "Relation Name": "ai_logs_y2026m10_default"},
+            {"Node Type": "Index Scan", "Index Name": "ai_logs_y2026m09_default_user_id_timestamp_idx",
+             "Relation Name": "ai_logs_y2026m09_default"},
+            {"Node Type": "Seq Scan", "Relation Name": "ai_logs_y2026m08_default"},
+            {"Node Type": "Index Scan", "Index Name": "users_pkey", "Relation Name": "users"},
+        ],
+        roots={
+            "ai_logs_y2026m10_default_user_id_timestamp_idx": "ix_ai_logs_user_id_timestamp",
+            "ai_logs_y2026m09_default_user_id_timestamp_idx": "ix_ai_logs_user_id_timestamp",
+            "ai_logs_y2026m10_default": "ai_logs",
+            "ai_logs_y2026m09_default": "ai_logs",
+            "ai_logs_y2026m08_default": "ai_logs",
+        },
+    )
+
+    assert plan.indexes() == ["ix_ai_logs_user_id_timestamp", "users_pkey"]
+    assert plan.seq_scans() == ["ai_logs"]
+    assert not plan.has_sort()
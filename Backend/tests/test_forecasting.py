@@ -0,0 +1,55 @@
+# tests/test_forecasting.py
+import numpy as np
+
+from app.services.forecasting import forecast_demand, restock_plan
+
+
+def test_demanda_constante_usa_ses_sin_error():
+    forecast = forecast_demand(np.full((1, 60), 4.0), alpha=0.2)
+
+    assert not forecast.croston[0]
+    assert forecast.rate[0] == 4.0
+    assert forecast.mae[0] == 0.0
+    assert forecast.demand_days[0] == 60
+
+
+def test_demanda_intermitente_usa_croston():
+    history = np.zeros((1, 90))
+    history[0, ::10] = 20.0  # 20 unidades cada 10 días: 2/día de media
+
+    forecast = forecast_demand(history, alpha=0.1)
+
+    assert forecast.croston[0]
+    assert forecast.demand_days[0] == 9
+    # Croston con la corrección SBA (1 - alpha/2) queda algo por debajo de la media
+    assert 1.5 < forecast.rate[0] < 2.0
+
+
+def test_producto_sin_salidas():
+    forecast = forecast_demand(np.zeros((2, 30)), alpha=0.2)
+
+    assert list(forecast.rate) == [0.0, 0.0]
+    assert list(forecast.mae) == [0.0, 0.0]
+    assert not forecast.croston.any()
+
+
+def test_productos_independientes_en_un_mismo_lote():
+    history = np.zeros((2, 60))
+    history[0] = 3.0
+    history[1, ::15] = 30.0
+
+    batch = forecast_demand(history, alpha=0.2)
+    for row in range(2):
+        single = forecast_demand(history[row:row + 1], alpha=0.2)
+        assert batch.rate[row] == single.rate[0]
+        assert batch.croston[row] == single.croston[0]
+
+
+def test_restock_plan_descuenta_el_stock():
+    demand = forecast_demand(np.full((2, 60), 5.0), alpha=0.2)
+
+    quantity, confidence = restock_plan(demand, np.array([10.0, 500.0]), horizon_days=14, service_level_z=1.65)
+
+    assert quantity[0] == 60  # 5/día x 14 días, sin error no hay stock de seguridad
+    assert quantity[1] == 0
+    assert ((confidence >= 0.05) & (confidence <= 0.95)).all()
@@ -0,0 +1,44 @@
+# tests/test_instrumentation.py
+import contextvars
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from app.db.instrumentation import start_request_stats
+
+
+def _in_request(func):
+    # Cada petición corre en su propio contexto (como en el middleware)
+    return contextvars.copy_context().run(func)
+
+
+def test_cuenta_consultas_y_tiempo():
+    engine = create_engine("sqlite://")
+
+    def request():
+        stats = start_request_stats()
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+        return stats
+
+    stats = _in_request(request)
+    assert stats.query_count == 2
+    assert stats.db_time > 0
+
+
+def test_una_sentencia_fallida_no_deja_su_inicio_en_la_pila():
+    engine = create_engine("sqlite://")
+
+    def request():
+        stats = start_request_stats()
+        with engine.connect() as conn:
+            with pytest.raises(exc.OperationalError):
+                conn.execute(text("SELECT * FROM no_existe"))
+            assert not conn.info.get("query_start_time")
+            conn.execute(text("SELECT 1"))
+            assert not conn.info.get("query_start_time")
+        return stats
+
+    stats = _in_request(request)
+    assert stats.query_count == 2
@@ -0,0 +1,45 @@
+# tests/test_list_queries.py
+# Número de consultas de los listados: fijo, no crece con las filas (sin N+1 al serializar
+# las relaciones). Incluye la del usuario autenticado.
+import pytest
+
+from app.db.query_inspector import assert_max_queries
+
+ROWS = 5
+
+
+@pytest.fixture
+def seeded(client):
+    headers = client.auth_headers
+    for n in range(ROWS):
+        category = client.post("/api/v1/inventory/categories/", json={"name": f"Cat {n}"}, headers=headers).json()
+        response = client.post(
+            "/api/v1/inventory/products/",
+            json={"name": f"Prod {n}", "category_id": category["id"], "stock": 100, "price": "5.50", "sku": f"SKU{n}", "owner_id": 1},
+            headers=headers,
+        )
+        assert response.status_code == 201, response.text
+        product = response.json()
+        client.post(
+            "/api/v1/inventory/transactions/", json={"product_id": product["id"], "quantity": 1, "type": "OUT"},
+            headers=headers,
+        )
+        client.post(
+            "/api/v1/kpis/", json={"name": f"KPI {n}", "value": "85.5", "unit": "%", "category": "perforación"},
+            headers=headers,
+        )
+    return client
+
+
+@pytest.mark.parametrize("url, max_queries", [
+    ("/api/v1/kpis/", 3), # usuario, KPIs con su propietario (joinedload) y total
+    ("/api/v1/inventory/products/", 2), # usuario, productos con su categoría
+    ("/api/v1/inventory/transactions/", 2), # usuario, transacciones con producto, categoría y usuario
+])
+def test_listados_sin_n_mas_1(seeded, url, max_queries):
+    with assert_max_queries(max_queries):
+        response = seeded.get(url, headers=seeded.auth_headers)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["results"] if isinstance(body, dict) else body) == ROWS
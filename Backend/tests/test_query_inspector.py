@@ -0,0 +1,60 @@
+# tests/test_query_inspector.py
+import contextvars
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+from app.db import query_inspector
+from app.db.instrumentation import start_request_stats
+from app.db.query_inspector import assert_max_queries, explain, fingerprint
+
+
+@pytest.fixture
+def explain_enabled(monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_INSPECTOR_EXPLAIN", True)
+    monkeypatch.setattr(query_inspector, "_explained", set())
+
+
+def test_fingerprint_ignora_valores_y_longitud_de_in():
+    assert fingerprint("SELECT * FROM t WHERE id = 1 AND name = 'x'") == fingerprint(
+        "SELECT * FROM t WHERE id = 2 AND name = 'y'"
+    )
+    assert fingerprint("SELECT * FROM t WHERE id IN (?, ?)") == fingerprint("SELECT * FROM t WHERE id IN (?)")
+
+
+def test_explain_no_cuenta_en_las_metricas_de_la_peticion(explain_enabled):
+    engine = create_engine("sqlite://")
+
+    def request():
+        stats = start_request_stats()
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY)"))
+            plan = explain(conn, "k", "SELECT * FROM t WHERE id = ?", (1,))
+        return stats, plan
+
+    stats, plan = contextvars.copy_context().run(request)
+    assert plan and "t" in plan
+    assert stats.query_count == 1  # Solo el CREATE TABLE
+
+
+def test_un_explain_fallido_no_rompe_la_transaccion(explain_enabled):
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY)"))
+        conn.execute(text("INSERT INTO t VALUES (1)"))
+
+        plan = explain(conn, "k", "SELECT * FROM no_existe", ())
+
+        assert plan.startswith("(EXPLAIN falló")
+        assert conn.execute(text("SELECT count(*) FROM t")).scalar() == 1
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM t")).scalar() == 1
+
+
+def test_assert_max_queries_falla_con_el_detalle_por_forma():
+    engine = create_engine("sqlite://")
+    with pytest.raises(AssertionError, match=r"2x SELECT \?"):
+        with assert_max_queries(1), engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
@@ -0,0 +1,74 @@
+# tests/test_singleflight.py
+import asyncio
+
+import pytest
+
+from app.core.singleflight import SingleFlight
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_llamadas_concurrentes_con_la_misma_clave_se_agrupan():
+    flight = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "ok"
+
+    waiting = [asyncio.ensure_future(flight.do("k", work)) for _ in range(5)]
+    await asyncio.sleep(0)
+    assert len(flight) == 1
+    release.set()
+    results = await asyncio.gather(*waiting)
+
+    assert calls == 1
+    assert [result for result, _ in results] == ["ok"] * 5
+    assert [shared for _, shared in results] == [False] + [True] * 4
+    assert len(flight) == 0
+
+
+async def test_claves_distintas_no_se_agrupan():
+    flight = SingleFlight()
+
+    async def work(value):
+        await asyncio.sleep(0)
+        return value
+
+    results = await asyncio.gather(flight.do("a", lambda: work(1)), flight.do("b", lambda: work(2)))
+
+    assert results == [(1, False), (2, False)]
+
+
+async def test_la_excepcion_se_comparte_y_la_clave_se_libera():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0)
+        raise ValueError("proveedor caído")
+
+    results = await asyncio.gather(flight.do("k", fail), flight.do("k", fail), return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert len(flight) == 0
+    assert await flight.do("k", lambda: asyncio.sleep(0, result="otra vez")) == ("otra vez", False)
+
+
+async def test_cancelar_al_primero_no_cancela_a_los_demas():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+        return 42
+
+    first = asyncio.ensure_future(flight.do("k", work))
+    second = asyncio.ensure_future(flight.do("k", work))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+
+    assert await second == (42, True)